@@ -4,6 +4,7 @@ import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .progress import report_progress, step_message
 from .registry import ToolRegistry
 from .run_step import run_step_v1
 
@@ -27,40 +28,28 @@ def benchmark_smoke_v1(
     workspace = out_dir / "workspace.blend"
     snaps = out_dir / "snaps"
 
+    plan = [
+        ("atlas.blender.add_cube_v1", {"name": "ATLAS_Bench_Cube_A", "location": {"x": 0.0, "y": 0.0, "z": 0.0}}),
+        ("atlas.blender.add_cube_v1", {"name": "ATLAS_Bench_Cube_B", "location": {"x": 2.0, "y": 0.0, "z": 0.0}}),
+        ("atlas.ping", {}),
+    ]
     steps: List[JSON] = []
 
-    steps.append(
-        run_step_v1(
+    for i, (tool, args) in enumerate(plan, 1):
+        s = run_step_v1(
             reg,
-            action_tool="atlas.blender.add_cube_v1",
-            action_args={"name": "ATLAS_Bench_Cube_A", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+            action_tool=tool,
+            action_args=args,
             snapshot_out_dir=snaps,
-            run_id=f"{run_id}-01",
+            run_id=f"{run_id}-{i:02d}",
             workspace_blend_path=workspace,
         )
-    )
+        entry = {"run_id": s["run_id"], "score": s["score"], "diff_counts": s["diff"]["counts"]}
+        steps.append(entry)
+        report_progress(i, len(plan), message=step_message(i, len(plan), entry), partial=entry)
 
-    steps.append(
-        run_step_v1(
-            reg,
-            action_tool="atlas.blender.add_cube_v1",
-            action_args={"name": "ATLAS_Bench_Cube_B", "location": {"x": 2.0, "y": 0.0, "z": 0.0}},
-            snapshot_out_dir=snaps,
-            run_id=f"{run_id}-02",
-            workspace_blend_path=workspace,
-        )
-    )
-
-    steps.append(
-        run_step_v1(
-            reg,
-            action_tool="atlas.ping",
-            action_args={},
-            snapshot_out_dir=snaps,
-            run_id=f"{run_id}-03",
-            workspace_blend_path=workspace,
-        )
-    )
+    # checkpoint: a resident worker may still hold unsaved steps
+    reg.call_tool("atlas.blender.flush_v1", {"blend_path": str(workspace)})
 
     total = sum(float(s.get("score", 0.0)) for s in steps)
 
@@ -68,6 +57,6 @@ def benchmark_smoke_v1(
         "schema": "atlas.benchmark.smoke.v1",
         "run_id": run_id,
         "workspace_blend": str(workspace),
-        "steps": [{"run_id": s["run_id"], "score": s["score"], "diff_counts": s["diff"]["counts"]} for s in steps],
+        "steps": steps,
         "total_score": float(total),
     }
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import json
 import os
 import subprocess
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from .blender_pool import BlenderWorkerPool, script_failure
+from .cancel import check_cancelled, kill_on_cancel
 from .contract import AtlasError
+from .framing import MAX_LINE, OutputTail, ResultChannel, read_frames, read_frames_async
 
 JSON = Dict[str, Any]
 
@@ -21,86 +27,267 @@ def get_blender_exe() -> str:
     return exe
 
 
-def _parse_json_from_stdout(stdout: str) -> JSON:
-    s = (stdout or "").strip()
-    if not s:
-        raise AtlasError("INTERNAL_ERROR", "Blender produced empty stdout")
+_POOL: Optional[BlenderWorkerPool] = None
+_POOL_LOCK = threading.Lock()
 
-    # 1) Fast path: whole stdout is JSON
+
+def _env_int(name: str, default: int) -> int:
     try:
-        return json.loads(s)
-    except Exception:
-        pass
-
-    # 2) Try line-by-line from the end (common case: last line is JSON)
-    lines = [ln.strip() for ln in s.splitlines() if ln.strip()]
-    for ln in reversed(lines):
-        if not (ln.startswith("{") and ln.endswith("}")):
-            continue
-        try:
-            return json.loads(ln)
-        except Exception:
-            continue
-
-    # 3) Try to extract a JSON object by slicing from last '{' to last '}'
-    last_lbrace = s.rfind("{")
-    last_rbrace = s.rfind("}")
-    if 0 <= last_lbrace < last_rbrace:
-        candidate = s[last_lbrace : last_rbrace + 1]
-        try:
-            return json.loads(candidate)
-        except Exception:
-            pass
-
-    raise AtlasError(
-        "INTERNAL_ERROR",
-        "Could not parse JSON from Blender stdout",
-        data={"stdout_tail": s[-4000:]},
-    )
+        return int(os.environ.get(name, str(default)) or str(default))
+    except ValueError:
+        raise AtlasError("INVALID_REQUEST", f"{name} must be an integer")
 
 
-def run_blender_script(
-    script_path: Path,
-    *,
-    out_json_path: Optional[Path] = None,
-    extra_args: Optional[Sequence[str]] = None,
-) -> JSON:
-    exe = get_blender_exe()
-    script_path = script_path.resolve()
-    extra_args = list(extra_args or [])
+def get_blender_pool() -> Optional[BlenderWorkerPool]:
+    # ATLAS_BLENDER_POOL_SIZE > 0 routes run_blender_script through warm workers.
+    # ATLAS_BLENDER_RESIDENT=1 keeps workspaces loaded, saving every
+    # ATLAS_BLENDER_CHECKPOINT_EVERY mutations (0 = only on flush/shutdown).
+    size = _env_int("ATLAS_BLENDER_POOL_SIZE", 0)
+    if size <= 0:
+        return None
 
-    cmd = [exe, "-b", "--factory-startup", "--python", str(script_path), "--"]
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = BlenderWorkerPool(
+                size,
+                exe=get_blender_exe(),
+                resident=os.environ.get("ATLAS_BLENDER_RESIDENT", "") not in ("", "0"),
+                checkpoint_every=_env_int("ATLAS_BLENDER_CHECKPOINT_EVERY", 10),
+                # the scene went back to its last checkpoint, which the file key can't see
+                on_lost_workspace=lambda path: _bump_workspace_generation(Path(path)),
+            )
+            atexit.register(shutdown_blender_pool)
+        return _POOL
 
-    if out_json_path:
-        out_json_path = out_json_path.resolve()
-        out_json_path.parent.mkdir(parents=True, exist_ok=True)
-        cmd += ["--out", str(out_json_path)]
 
-    cmd += list(extra_args)
+def shutdown_blender_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown()
+
+
+_WORKSPACE_GEN: Dict[str, int] = {}
+
+
+def workspace_generation(blend_path: Path) -> int:
+    # Bumped on every mutating script run against the workspace (see SnapshotCache).
+    with _POOL_LOCK:
+        return _WORKSPACE_GEN.get(str(blend_path.resolve()), 0)
+
 
+def _bump_workspace_generation(blend_path: Path) -> None:
+    key = str(blend_path.resolve())
+    with _POOL_LOCK:
+        _WORKSPACE_GEN[key] = _WORKSPACE_GEN.get(key, 0) + 1
+
+
+def flush_blender_workspaces(blend_path: Optional[Path] = None) -> List[JSON]:
+    # Checkpoint resident workspaces; without a resident pool everything is already on disk.
+    with _POOL_LOCK:
+        pool = _POOL
+    if pool is None or not pool.resident:
+        return []
+    return pool.flush(blend_path)
+
+
+def _run_oneshot(cmd: List[str]) -> Tuple[int, List[Any], OutputTail, OutputTail]:
+    # One `blender -b` launch. Results come back as frames on a dedicated pipe (framed
+    # stdout where fds can't be inherited); stdout/stderr are kept only as bounded tails.
+    chan = ResultChannel()
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             cmd,
-            capture_output=True,
-            text=True,
-            check=False,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **chan.popen_kwargs(),
         )
     except Exception as e:
+        chan.close()
         raise AtlasError("INTERNAL_ERROR", f"Failed to start Blender: {e}")
+    chan.spawned()
+
+    assert proc.stdout is not None and proc.stderr is not None
+    frames: List[Any] = []
+    out_tail = OutputTail()
+    err_tail = OutputTail()
+    threads = [threading.Thread(target=err_tail.drain, args=(proc.stderr,), daemon=True)]
+    if chan.on_stdout:
+        threads.append(threading.Thread(target=read_frames, args=(proc.stdout, frames, out_tail.append), daemon=True))
+    else:
+        threads.append(threading.Thread(target=out_tail.drain, args=(proc.stdout,), daemon=True))
+        threads.append(threading.Thread(target=read_frames, args=(chan.reader(proc.stdout), frames), daemon=True))
+    for t in threads:
+        t.start()
+    try:
+        # cancelling the tool call kills the child; the call then fails as CANCELLED
+        with kill_on_cancel(proc.kill):
+            returncode = proc.wait()
+            for t in threads:
+                t.join()
+    finally:
+        chan.close()
+        proc.stdout.close()
+        proc.stderr.close()
+    return returncode, frames, out_tail, err_tail
+
+
+async def _run_oneshot_async(cmd: List[str]) -> Tuple[int, List[Any], OutputTail, OutputTail]:
+    # _run_oneshot on the event loop: the child's pipes are read by coroutines, not threads
+    chan = ResultChannel()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            limit=MAX_LINE,
+            **chan.popen_kwargs(),
+        )
+    except Exception as e:
+        chan.close()
+        raise AtlasError("INTERNAL_ERROR", f"Failed to start Blender: {e}")
+    chan.spawned()
+
+    assert proc.stdout is not None and proc.stderr is not None
+    frames: List[Any] = []
+    out_tail = OutputTail()
+    err_tail = OutputTail()
+    readers = [err_tail.drain_async(proc.stderr)]
+    transport = None
+    try:
+        if chan.on_stdout:
+            readers.append(read_frames_async(proc.stdout, frames, out_tail.append))
+        else:
+            loop = asyncio.get_running_loop()
+            results = asyncio.StreamReader(limit=MAX_LINE)
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(results), chan.reader(None)  # type: ignore[arg-type]
+            )
+            readers.append(out_tail.drain_async(proc.stdout))
+            readers.append(read_frames_async(results, frames))
+        await asyncio.gather(*readers)
+        returncode = await proc.wait()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    finally:
+        if transport is not None:
+            transport.close()
+        chan.close()
+    return returncode, frames, out_tail, err_tail
+
 
-    if proc.returncode != 0:
+def _script_args(
+    script_path: Path, out_json_path: Optional[Path], extra_args: Optional[Sequence[str]]
+) -> Tuple[Path, Optional[Path], List[str]]:
+    args: List[str] = []
+    if out_json_path:
+        out_json_path = out_json_path.resolve()
+        out_json_path.parent.mkdir(parents=True, exist_ok=True)
+        args += ["--out", str(out_json_path)]
+    args += list(extra_args or [])
+    return script_path.resolve(), out_json_path, args
+
+
+def _oneshot_result(
+    script_path: Path,
+    out_json_path: Optional[Path],
+    returncode: int,
+    frames: List[Any],
+    out_tail: OutputTail,
+    err_tail: OutputTail,
+) -> JSON:
+    if returncode != 0:
         raise AtlasError(
             "INTERNAL_ERROR",
             "Blender returned non-zero exit code",
-            data={
-                "returncode": proc.returncode,
-                "stdout": (proc.stdout or "")[-4000:],
-                "stderr": (proc.stderr or "")[-4000:],
-            },
+            data={"returncode": returncode, "stdout": out_tail.text(), "stderr": err_tail.text()},
         )
 
     if out_json_path:
         txt = out_json_path.read_text(encoding="utf-8")
         return json.loads(txt)
 
-    return _parse_json_from_stdout(proc.stdout)
+    if not frames:
+        raise AtlasError(
+            "INTERNAL_ERROR",
+            "Blender produced no result",
+            data={"script": str(script_path), "stdout": out_tail.text(), "stderr": err_tail.text()},
+        )
+    result = frames[-1]
+    if isinstance(result, dict) and result.get("ok") is False:
+        # same shape as the pool's failure (tools/atlas_bpy_io.run_script)
+        raise script_failure({"message": "script reported failure", "result": result})
+    return result
+
+
+def run_blender_script(
+    script_path: Path,
+    *,
+    out_json_path: Optional[Path] = None,
+    extra_args: Optional[Sequence[str]] = None,
+    blend_path: Optional[Path] = None,
+    mutates: bool = False,
+) -> JSON:
+    # blend_path: workspace the script works on; passed as a trailing `--blend`, or
+    # kept loaded in a resident worker (then `mutates` drives its dirty tracking).
+    script_path, out_json_path, args = _script_args(script_path, out_json_path, extra_args)
+
+    check_cancelled()
+    if mutates and blend_path is not None:
+        _bump_workspace_generation(blend_path)
+
+    pool = get_blender_pool()
+    resident = pool is not None and pool.resident and blend_path is not None
+    if blend_path is not None and not resident:
+        args += ["--blend", str(blend_path)]
+
+    if pool is not None:
+        if resident:
+            result = pool.run_script(script_path, args, workspace=blend_path, mutates=mutates)
+        else:
+            result = pool.run_script(script_path, args)
+        if out_json_path:
+            return json.loads(out_json_path.read_text(encoding="utf-8"))
+        if result is None:
+            raise AtlasError("INTERNAL_ERROR", "Blender script produced no result", data={"script": str(script_path)})
+        return result
+
+    exe = get_blender_exe()
+    cmd = [exe, "-b", "--factory-startup", "--python", str(script_path), "--", *args]
+    return _oneshot_result(script_path, out_json_path, *_run_oneshot(cmd))
+
+
+async def run_blender_script_async(
+    script_path: Path,
+    *,
+    out_json_path: Optional[Path] = None,
+    extra_args: Optional[Sequence[str]] = None,
+    blend_path: Optional[Path] = None,
+    mutates: bool = False,
+) -> JSON:
+    # run_blender_script for asyncio callers: a one-shot Blender is awaited on the event
+    # loop, so concurrent jobs don't hold a thread each. The warm worker pool is
+    # thread-based; with ATLAS_BLENDER_POOL_SIZE set the call runs in a thread instead.
+    if get_blender_pool() is not None:
+        return await asyncio.to_thread(
+            run_blender_script,
+            script_path,
+            out_json_path=out_json_path,
+            extra_args=extra_args,
+            blend_path=blend_path,
+            mutates=mutates,
+        )
+    script_path, out_json_path, args = _script_args(script_path, out_json_path, extra_args)
+    if mutates and blend_path is not None:
+        _bump_workspace_generation(blend_path)
+    if blend_path is not None:
+        args += ["--blend", str(blend_path)]
+    cmd = [get_blender_exe(), "-b", "--factory-startup", "--python", str(script_path), "--", *args]
+    return _oneshot_result(script_path, out_json_path, *await _run_oneshot_async(cmd))
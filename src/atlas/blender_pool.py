@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence
+
+from .cancel import kill_on_cancel
+from .contract import AtlasError
+from .framing import OutputTail, ResultChannel, encode_frame, read_frame
+
+JSON = Dict[str, Any]
+
+WORKER_SCRIPT = Path("tools/blender_worker_v1.py")
+TAIL_LINES = 200
+
+
+class BlenderWorker:
+    # One long-lived `blender -b --python tools/blender_worker_v1.py` process.
+
+    def __init__(self, exe: str, worker_script: Path, index: int = 0) -> None:
+        self.exe = exe
+        self.worker_script = worker_script
+        self.index = index
+        self.restarts = 0
+        self.requests = 0
+        self._proc: Optional[subprocess.Popen[bytes]] = None
+        self._responses: "queue.Queue[Optional[JSON]]" = queue.Queue()
+        self._stdout_tail = OutputTail(TAIL_LINES)
+        self._stderr_tail = OutputTail(TAIL_LINES)
+        self._next_id = 0
+        self._broken = False
+        self.workspace: Optional[str] = None  # resident .blend (mirrors the worker's state)
+        self.last_used = 0.0
+
+    def start(self) -> None:
+        cmd = [self.exe, "-b", "--factory-startup", "--python", str(self.worker_script.resolve()), "--"]
+        chan = ResultChannel()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **chan.popen_kwargs(),
+            )
+        except Exception as e:
+            chan.close()
+            raise AtlasError("INTERNAL_ERROR", f"Failed to start Blender worker: {e}")
+        chan.spawned()
+        self._proc = proc
+        self._broken = False
+        self._responses = queue.Queue()
+        assert proc.stdout is not None and proc.stderr is not None
+        frames = chan.reader(proc.stdout)
+        if not chan.on_stdout:
+            # result frames arrive on their own pipe; stdout is only Blender's noise
+            threading.Thread(target=self._stdout_tail.drain, args=(proc.stdout,), daemon=True).start()
+        threading.Thread(target=self._read_frames, args=(frames, self._responses, not chan.on_stdout), daemon=True).start()
+        threading.Thread(target=self._stderr_tail.drain, args=(proc.stderr,), daemon=True).start()
+
+    def _read_frames(self, stream: BinaryIO, responses: "queue.Queue[Optional[JSON]]", owned: bool) -> None:
+        try:
+            while True:
+                frame = read_frame(stream, self._stdout_tail.append)
+                if frame is None:
+                    break
+                responses.put(frame)
+        except Exception:
+            pass
+        if owned:
+            stream.close()
+        responses.put(None)  # EOF -> worker is gone
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    def alive(self) -> bool:
+        return self._proc is not None and not self._broken and self._proc.poll() is None
+
+    def tails(self, n: int = 40) -> JSON:
+        return {"stdout": self._stdout_tail.lines(n), "stderr": self._stderr_tail.lines(n)}
+
+    def _failure(self, message: str) -> AtlasError:
+        data = {"worker": self.index, "returncode": self._proc.poll() if self._proc else None}
+        data.update(self.tails())
+        return AtlasError("INTERNAL_ERROR", message, data=data)
+
+    def request(self, msg: JSON, timeout: Optional[float] = None) -> JSON:
+        if not self.alive():
+            raise self._failure("Blender worker is not running")
+        assert self._proc is not None and self._proc.stdin is not None
+
+        self._next_id += 1
+        rid = self._next_id
+        self.requests += 1
+        try:
+            self._proc.stdin.write(encode_frame(dict(msg, id=rid)))
+            self._proc.stdin.flush()
+        except OSError:
+            self._broken = True
+            raise self._failure("Blender worker crashed")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                resp = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                self._broken = True
+                self.kill()
+                raise self._failure("Blender worker timed out")
+            if resp is None:
+                self._broken = True
+                raise self._failure("Blender worker crashed")
+            if resp.get("id") == rid:
+                return resp
+            # stale answer to an abandoned request: skip
+
+    def kill(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        proc = self._proc
+        if proc is None:
+            return
+        if proc.poll() is None:
+            try:
+                assert proc.stdin is not None
+                proc.stdin.write(encode_frame({"id": 0, "op": "shutdown"}))
+                proc.stdin.flush()
+                proc.stdin.close()
+                proc.wait(timeout=timeout)
+            except Exception:
+                self.kill()
+        self._proc = None
+
+    def restart(self) -> None:
+        self.kill()
+        self._proc = None
+        self.restarts += 1
+        self.start()
+
+
+def script_failure(error: Any, **context: Any) -> AtlasError:
+    # A tool script that failed inside Blender (raised, or reported {"ok": false}), as
+    # run_blender_script raises it; fused steps rebuild their action's failure with it.
+    data: JSON = dict(context)
+    data["error"] = error
+    return AtlasError("INTERNAL_ERROR", "Blender script failed", data=data)
+
+
+class BlenderWorkerPool:
+    # Warm pool of headless Blender workers; tool scripts run in-process instead of
+    # paying a Blender cold start per call. Crashed workers are restarted.
+    #
+    # resident=True keeps each workspace .blend loaded in one worker (requests for it
+    # are routed there); mutations are saved every `checkpoint_every` runs, on flush(),
+    # when the worker is reassigned, and on shutdown. A worker that dies loses the edits
+    # since its last checkpoint: on_lost_workspace(path) is told (see SnapshotCache).
+
+    def __init__(
+        self,
+        size: int,
+        *,
+        exe: str,
+        worker_script: Optional[Path] = None,
+        ping_timeout: float = 60.0,
+        resident: bool = False,
+        checkpoint_every: int = 10,
+        on_lost_workspace: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        if size < 1:
+            raise AtlasError("INVALID_REQUEST", "Blender pool size must be >= 1")
+        self.size = int(size)
+        self.ping_timeout = float(ping_timeout)
+        self.resident = bool(resident)
+        self.checkpoint_every = int(checkpoint_every)
+        self.on_lost_workspace = on_lost_workspace
+        script = worker_script or WORKER_SCRIPT
+        self._workers = [BlenderWorker(exe, script, i) for i in range(self.size)]
+        self._cond = threading.Condition()
+        self._idle: List[BlenderWorker] = []
+        self._closed = False
+        for w in self._workers:
+            w.start()
+            self._idle.append(w)
+
+    def _pick(self, workspace: Optional[str]) -> Optional[BlenderWorker]:
+        if workspace is not None:
+            holder = next((w for w in self._workers if w.workspace == workspace), None)
+            if holder is not None:
+                # affinity: wait for the worker that has the scene loaded
+                return holder if holder in self._idle else None
+        if not self._idle:
+            return None
+        free = [w for w in self._idle if w.workspace is None]
+        if free:
+            return free[0]
+        # reassign the least recently used resident worker (it saves before switching)
+        return min(self._idle, key=lambda w: w.last_used)
+
+    def _acquire(self, workspace: Optional[str] = None, *, exact: bool = False) -> BlenderWorker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise AtlasError("INTERNAL_ERROR", "Blender pool is shut down")
+                if exact:
+                    holder = next((x for x in self._workers if x.workspace == workspace), None)
+                    if holder is None:
+                        raise AtlasError("INVALID_REQUEST", f"Workspace is not resident: {workspace}")
+                    w = holder if holder in self._idle else None
+                else:
+                    w = self._pick(workspace)
+                if w is not None:
+                    self._idle.remove(w)
+                    break
+                self._cond.wait()
+        if not w.alive():
+            try:
+                w.restart()
+            except AtlasError:
+                self._release(w)
+                raise
+        return w
+
+    def _release(self, w: BlenderWorker) -> None:
+        with self._cond:
+            w.last_used = time.monotonic()
+            self._idle.append(w)
+            self._cond.notify_all()
+
+    def _lose_workspace(self, w: BlenderWorker) -> Optional[str]:
+        # the worker is gone (or about to be restarted) with its unsaved scene
+        lost, w.workspace = w.workspace, None
+        if lost is not None and self.on_lost_workspace is not None:
+            self.on_lost_workspace(lost)
+        return lost
+
+    def _call(self, msg: JSON, *, workspace: Optional[str] = None, exact: bool = False, timeout: Optional[float] = None) -> JSON:
+        w = self._acquire(workspace, exact=exact)
+        try:
+            # a cancelled call kills its worker (restarted below, like a crash)
+            with kill_on_cancel(w.kill):
+                resp = w.request(msg, timeout=timeout)
+            w.workspace = (resp.get("resident") or {}).get("path")
+        except AtlasError as e:
+            # restart-on-crash: hand back a warm replacement, surface the failure
+            if not w.alive():
+                lost = self._lose_workspace(w)
+                if lost is not None:
+                    e.data["lost_workspace"] = lost  # unsaved edits since last checkpoint
+                try:
+                    w.restart()
+                except AtlasError:
+                    pass
+            raise
+        finally:
+            self._release(w)
+        if not resp.get("ok"):
+            err = script_failure(resp.get("error"), worker=w.index)
+            err.data.update(w.tails())
+            raise err
+        return resp
+
+    def run_script(
+        self,
+        script_path: Path,
+        argv: Sequence[str],
+        *,
+        workspace: Optional[Path] = None,
+        mutates: bool = False,
+    ) -> Any:
+        # workspace is only honoured by resident pools; callers pass --blend otherwise
+        ws = str(workspace.resolve()) if (workspace is not None and self.resident) else None
+        msg: JSON = {"op": "run", "script": str(script_path.resolve()), "argv": [str(a) for a in argv]}
+        if ws is not None:
+            msg.update({"workspace": ws, "mutates": bool(mutates), "checkpoint_every": self.checkpoint_every})
+        resp = self._call(msg, workspace=ws)
+        return resp.get("result")
+
+    def resident_workspaces(self) -> List[str]:
+        return sorted(w.workspace for w in self._workers if w.workspace is not None)
+
+    def flush(self, workspace: Optional[Path] = None) -> List[JSON]:
+        # Save dirty resident scenes now (one workspace, or all of them).
+        targets = [str(workspace.resolve())] if workspace is not None else self.resident_workspaces()
+        out: List[JSON] = []
+        for ws in targets:
+            try:
+                resp = self._call({"op": "flush"}, workspace=ws, exact=True)
+            except AtlasError as e:
+                if e.code == "INVALID_REQUEST":
+                    continue  # not (or no longer) resident: nothing to save
+                raise
+            out.append({"path": ws, "saved": bool((resp.get("resident") or {}).get("saved"))})
+        return out
+
+    def health_check(self) -> List[JSON]:
+        # Ping every currently idle worker; unresponsive ones are restarted.
+        with self._cond:
+            checked = list(self._idle)
+            self._idle.clear()
+
+        report: List[JSON] = []
+        try:
+            for w in checked:
+                ok = False
+                try:
+                    ok = bool(w.alive() and w.request({"op": "ping"}, timeout=self.ping_timeout).get("ok"))
+                except AtlasError:
+                    ok = False
+                if not ok:
+                    self._lose_workspace(w)
+                    try:
+                        w.restart()
+                    except AtlasError:
+                        pass
+                report.append({"worker": w.index, "ok": ok, "pid": w.pid, "restarts": w.restarts})
+        finally:
+            for w in checked:
+                self._release(w)
+        return sorted(report, key=lambda r: r["worker"])
+
+    def stats(self) -> JSON:
+        with self._cond:
+            idle = len(self._idle)
+        return {
+            "size": self.size,
+            "idle": idle,
+            "resident": self.resident,
+            "workers": [
+                {
+                    "worker": w.index,
+                    "alive": w.alive(),
+                    "pid": w.pid,
+                    "requests": w.requests,
+                    "restarts": w.restarts,
+                    "workspace": w.workspace,
+                }
+                for w in self._workers
+            ],
+        }
+
+    def shutdown(self) -> None:
+        # workers save their dirty resident scene before exiting
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        for w in self._workers:
+            w.stop()
+            w.workspace = None
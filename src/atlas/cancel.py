@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .contract import AtlasError
+
+JSON = Dict[str, Any]
+
+# the running tool call's token (servers set one per request, tools with a timeout nest one)
+_CURRENT: ContextVar[Optional["CancelToken"]] = ContextVar("atlas_cancel_token", default=None)
+
+
+class CancelToken:
+    # Cooperative cancellation of one tool call. cancel() (a client's cancel notification,
+    # or the timeout firing) runs the registered callbacks - they kill the Blender child
+    # in flight - and makes check() raise at the next step boundary. A child token is
+    # cancelled with its parent.
+
+    def __init__(self, timeout: Optional[float] = None, *, parent: Optional["CancelToken"] = None) -> None:
+        self.timeout = timeout
+        self.reason: Optional[str] = None  # "cancelled" | "timeout"
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._detach: Optional[Callable[[], None]] = None
+        if parent is not None:
+            self._detach = parent.on_cancel(lambda: self.cancel(parent.reason or "cancelled"))
+        if timeout:
+            self._timer = threading.Timer(float(timeout), self.cancel, args=("timeout",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def on_cancel(self, cb: Callable[[], None]) -> Callable[[], None]:
+        # -> unregister; runs cb right away if already cancelled
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(cb)
+                return lambda: self._discard(cb)
+        cb()
+        return lambda: None
+
+    def _discard(self, cb: Callable[[], None]) -> None:
+        with self._lock:
+            if cb in self._callbacks:
+                self._callbacks.remove(cb)
+
+    def error(self) -> AtlasError:
+        if self.reason == "timeout" and self.timeout:
+            data = {"reason": "timeout", "timeout": self.timeout}
+            return AtlasError("CANCELLED", f"Tool call timed out after {self.timeout:g}s", data=data)
+        return AtlasError("CANCELLED", "Tool call cancelled", data={"reason": self.reason or "cancelled"})
+
+    def check(self) -> None:
+        if self.reason is not None:
+            raise self.error()
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._detach is not None:
+            self._detach()
+
+
+def current_token() -> Optional[CancelToken]:
+    return _CURRENT.get()
+
+
+def check_cancelled() -> None:
+    # step boundary: raise CANCELLED if the running tool call was cancelled
+    token = _CURRENT.get()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def active(token: CancelToken) -> Iterator[CancelToken]:
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+@contextmanager
+def cancel_scope(timeout: Optional[float] = None) -> Iterator[CancelToken]:
+    # a token for the block, cancelled with the current one (if any) or after timeout
+    token = CancelToken(timeout, parent=_CURRENT.get())
+    try:
+        with active(token):
+            yield token
+    finally:
+        token.close()
+
+
+@contextmanager
+def kill_on_cancel(kill: Callable[[], None]) -> Iterator[None]:
+    # Around a blocking wait on a child process: cancelling the current call runs kill(),
+    # and whatever the dead child made the block raise is reported as CANCELLED.
+    token = _CURRENT.get()
+    if token is None:
+        yield
+        return
+    token.check()
+    unregister = token.on_cancel(kill)
+    try:
+        yield
+    except Exception as e:
+        if token.cancelled:
+            raise token.error() from e
+        raise
+    finally:
+        unregister()
+    token.check()
+
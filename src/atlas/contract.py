@@ -7,12 +7,17 @@ from typing import Any, Dict, List, Literal, Optional, TypedDict
 JSON = Dict[str, Any]
 
 
-class ToolSpec(TypedDict):
+class _ToolSpecRequired(TypedDict):
     name: str
     description: str
     inputSchema: JSON
 
 
+class ToolSpec(_ToolSpecRequired, total=False):
+    pure: bool  # result depends on the arguments only; the registry may memoize it
+    timeout: float  # default time limit of one call, in seconds
+
+
 class ToolResult(TypedDict):
     # MCP-style "content" (text only for v0.1)
     content: List[Dict[str, str]]
@@ -29,6 +34,7 @@ ErrorCode = Literal[
     "TOOL_NOT_FOUND",
     "INVALID_ARGUMENTS",
     "INTERNAL_ERROR",
+    "CANCELLED",  # client cancel or tool timeout (see atlas.cancel)
 ]
 
 
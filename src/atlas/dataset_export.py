@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import sys
+import uuid
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from .contract import AtlasError
+from .log_reader import LogQuery, iter_log_events
+from .snapshot_diff_v2 import fingerprint
+
+JSON = Dict[str, Any]
+
+PathLike = Union[str, Path]
+
+DATASET_SCHEMA = "atlas.dataset.v1"
+FORMATS = ("npy", "parquet")
+
+_STEP_KINDS = (
+    "action",
+    "diff",
+    "diff_v2",
+    "score",
+    "score_v2",
+    "snapshot_before",
+    "snapshot_before_v2",
+    "snapshot_after",
+    "snapshot_after_v2",
+)
+_ENDIAN = "<" if sys.byteorder == "little" else ">"
+
+# fixed columns; flattened action args follow as "arg.<dotted key>". row_index numbers
+# the dataset's rows (across shards); a row's step is its run_id.
+BASE_COLUMNS = (
+    "row_index",
+    "run_id",
+    "action_tool",
+    "action_ok",
+    "added",
+    "removed",
+    "changed",
+    "score",
+    "before_fingerprint",
+    "after_fingerprint",
+)
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise AtlasError("INVALID_ARGUMENTS", "parquet export needs the 'pyarrow' package")
+    return pyarrow
+
+
+def _flatten(value: Any, prefix: str, out: JSON) -> None:
+    if isinstance(value, dict):
+        for k in sorted(value):
+            _flatten(value[k], f"{prefix}.{k}", out)
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            _flatten(v, f"{prefix}.{i}", out)
+    else:
+        out[prefix] = value
+
+
+def _snapshot_fp(payload: Optional[JSON]) -> str:
+    if not payload:
+        return ""
+    if payload.get("fingerprint"):
+        return str(payload["fingerprint"])
+    snap = payload.get("snapshot")
+    return fingerprint(snap) if snap is not None else ""
+
+
+def step_rows(events: Iterable[JSON]) -> List[JSON]:
+    # One row per finished step (a run_id with an action and a score event), in log
+    # order. Embedded snapshots are reduced to their fingerprint as they stream by.
+    runs: Dict[str, JSON] = {}
+    for ev in events:
+        kind = ev.get("kind")
+        if kind not in _STEP_KINDS:
+            continue
+        base = kind[:-3] if kind.endswith("_v2") else kind
+        payload = ev.get("payload") or {}
+        if base.startswith("snapshot_"):
+            payload = {"fingerprint": _snapshot_fp(payload)}
+        runs.setdefault(ev.get("run_id") or "", {})[base] = {"ok": ev.get("ok"), "payload": payload}
+    rows: List[JSON] = []
+    for rid, evs in runs.items():
+        action = evs.get("action")
+        if action is None or "score" not in evs:
+            continue
+        payload = action["payload"]
+        counts = (evs.get("diff") or {}).get("payload", {}).get("counts") or {}
+        score = evs["score"]["payload"].get("score")
+        row: JSON = {
+            "run_id": rid,
+            "action_tool": str(payload.get("tool") or ""),
+            "action_ok": bool(action.get("ok")),
+            "added": int(counts.get("added", 0)),
+            "removed": int(counts.get("removed", 0)),
+            "changed": int(counts.get("changed", 0)),
+            "score": float(score) if score is not None else math.nan,
+            "before_fingerprint": (evs.get("snapshot_before") or {}).get("payload", {}).get("fingerprint", ""),
+            "after_fingerprint": (evs.get("snapshot_after") or {}).get("payload", {}).get("fingerprint", ""),
+        }
+        args: JSON = {}
+        _flatten(payload.get("args") or {}, "arg", args)
+        row.update(args)
+        rows.append(row)
+    return rows
+
+
+def _columns(rows: List[JSON], start: int) -> Dict[str, List[Any]]:
+    # column -> values; arg columns are float64 if every present value is a number, else str
+    names = list(BASE_COLUMNS[1:]) + sorted({k for r in rows for k in r if k.startswith("arg.")})
+    cols: Dict[str, List[Any]] = {"row_index": list(range(start, start + len(rows)))}
+    for name in names:
+        vals = [r.get(name) for r in rows]
+        if name.startswith("arg."):
+            present = [v for v in vals if v is not None]
+            if all(isinstance(v, (int, float)) for v in present):
+                vals = [float(v) if v is not None else math.nan for v in vals]
+            else:
+                vals = ["" if v is None else v if isinstance(v, str) else json.dumps(v) for v in vals]
+        cols[name] = vals
+    return cols
+
+
+def _npy_bytes(values: List[Any]) -> bytes:
+    # .npy v1.0 (what numpy.save writes), built with the stdlib
+    if all(isinstance(v, bool) for v in values) and values:
+        descr, data = "|b1", bytes(bytearray(int(v) for v in values))
+    elif all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        descr, data = f"{_ENDIAN}i8", array("q", values).tobytes()
+    elif all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        descr, data = f"{_ENDIAN}f8", array("d", values).tobytes()
+    else:
+        width = max([len(v) for v in values] + [1])
+        descr = f"{_ENDIAN}U{width}"
+        enc = "utf-32-le" if _ENDIAN == "<" else "utf-32-be"
+        data = b"".join(v.encode(enc) + b"\0" * (4 * (width - len(v))) for v in values)
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    pad = 64 - (10 + len(header) + 1) % 64
+    header += " " * pad + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1") + data
+
+
+def _write_shard(shard: Path, cols: Dict[str, List[Any]], fmt: str) -> None:
+    tmp = shard.with_name(f".{shard.name}.{uuid.uuid4().hex[:8]}.tmp")
+    if fmt == "parquet":
+        pa = _pyarrow()
+        pa.parquet.write_table(pa.table(cols), str(tmp))
+    else:
+        tmp.mkdir(parents=True)
+        for name, values in cols.items():
+            (tmp / f"{name}.npy").write_bytes(_npy_bytes(values))
+    # a shard not in the manifest is left over from an export that died before its
+    # manifest update: this one replaces it
+    if shard.is_dir():
+        shutil.rmtree(shard)
+    os.replace(tmp, shard)
+
+
+def _load_manifest(out_dir: Path) -> JSON:
+    p = out_dir / "manifest.json"
+    if not p.exists():
+        return {"schema": DATASET_SCHEMA, "format": None, "rows": 0, "shards": [], "run_ids": []}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def export_dataset(
+    log_paths: Sequence[PathLike],
+    out_dir: PathLike,
+    *,
+    fmt: Optional[str] = None,
+    shard_rows: int = 65536,
+) -> JSON:
+    # Step logs -> columnar shards under out_dir, plus manifest.json (shards, row count,
+    # exported run_ids). Incremental: runs already in the manifest are skipped and new
+    # ones go to new shards. npy shards are directories of .npy files (np.load(...,
+    # mmap_mode="r")); parquet shards need pyarrow. Default format: parquet if
+    # pyarrow imports, else npy; an existing dataset keeps its format.
+    out = Path(out_dir).resolve()
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out)
+    if fmt is None:
+        fmt = manifest["format"]
+    if fmt is None:
+        try:
+            _pyarrow()
+            fmt = "parquet"
+        except AtlasError:
+            fmt = "npy"
+    if fmt not in FORMATS:
+        raise AtlasError("INVALID_ARGUMENTS", f"format must be one of: {', '.join(FORMATS)}")
+    if manifest["format"] not in (None, fmt):
+        raise AtlasError("INVALID_ARGUMENTS", f"dataset at {out} is {manifest['format']}, not {fmt}")
+
+    seen = set(manifest["run_ids"])
+    events = iter_log_events(log_paths, LogQuery(kinds=_STEP_KINDS))
+    rows = [r for r in step_rows(events) if r["run_id"] not in seen]
+    new_shards: List[JSON] = []
+    for i in range(0, len(rows), max(int(shard_rows), 1)):
+        chunk = rows[i : i + shard_rows]
+        cols = _columns(chunk, manifest["rows"])
+        name = f"shard-{len(manifest['shards']) + 1:06d}" + (".parquet" if fmt == "parquet" else "")
+        _write_shard(out / name, cols, fmt)
+        entry = {"name": name, "rows": len(chunk), "columns": list(cols)}
+        manifest["shards"].append(entry)
+        manifest["rows"] += len(chunk)
+        manifest["run_ids"].extend(r["run_id"] for r in chunk)
+        new_shards.append(entry)
+        manifest["format"] = fmt
+        # manifest after each shard: an interrupted export resumes where it stopped
+        tmp = out / f".manifest.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, out / "manifest.json")
+    return {
+        "schema": "atlas.dataset.export.v1",
+        "out_dir": str(out),
+        "format": fmt,
+        "added_rows": sum(s["rows"] for s in new_shards),
+        "new_shards": [s["name"] for s in new_shards],
+        "total_rows": manifest["rows"],
+    }
+
+
+def load_shards(out_dir: PathLike, *, mmap: bool = True) -> List[Dict[str, Any]]:
+    # numpy arrays per shard ({column: ndarray}); npy columns are memory-mapped
+    import numpy as np
+
+    out = Path(out_dir)
+    manifest = _load_manifest(out)
+    shards: List[Dict[str, Any]] = []
+    for s in manifest["shards"]:
+        p = out / s["name"]
+        if manifest["format"] == "parquet":
+            table = _pyarrow().parquet.read_table(str(p), memory_map=mmap)
+            shards.append({c: table.column(c).to_numpy() for c in s["columns"]})
+        else:
+            shards.append({c: np.load(p / f"{c}.npy", mmap_mode="r" if mmap else None) for c in s["columns"]})
+    return shards
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import IO, Any, BinaryIO, Callable, Deque, Dict, List, Optional
+
+# Length-prefixed JSON frames, safe to interleave with Blender's own stdout noise:
+#   b"\x1eATLAS-FRAME <nbytes>\n" + <utf-8 json payload> + b"\n"
+# tools/atlas_bpy_io.py carries the Blender-side copy (Blender's Python can't import atlas).
+FRAME_MARKER = b"\x1eATLAS-FRAME "
+
+# Child env var naming the result channel: an inherited fd number, or "stdout".
+RESULT_FD_ENV = "ATLAS_RESULT_FD"
+
+# Longest chunk read as one "line"; longer noise lines are split, never buffered whole.
+MAX_LINE = 64 * 1024
+
+JSON = Dict[str, Any]
+
+NoiseSink = Callable[[bytes], None]
+
+
+def encode_frame(obj: Any) -> bytes:
+    payload = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    return FRAME_MARKER + str(len(payload)).encode("ascii") + b"\n" + payload + b"\n"
+
+
+def _read_exact(stream: BinaryIO, n: int) -> Optional[bytes]:
+    chunks = []
+    remaining = n
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(stream: BinaryIO, on_noise: Optional[NoiseSink] = None) -> Optional[Any]:
+    # Returns the next decoded frame, or None on EOF. Non-frame bytes go to on_noise.
+    while True:
+        line = stream.readline(MAX_LINE)
+        if not line:
+            return None
+        i = line.find(FRAME_MARKER)
+        if i < 0:
+            if on_noise is not None:
+                on_noise(line)
+            continue
+        if i > 0 and on_noise is not None:
+            # marker glued to a partially flushed line
+            on_noise(line[:i])
+        try:
+            n = int(line[i + len(FRAME_MARKER) :].strip())
+        except ValueError:
+            if on_noise is not None:
+                on_noise(line[i:])
+            continue
+        payload = _read_exact(stream, n)
+        if payload is None:
+            return None
+        stream.read(1)  # trailing newline
+        return json.loads(payload.decode("utf-8"))
+
+
+def read_frames(stream: BinaryIO, sink: List[Any], on_noise: Optional[NoiseSink] = None) -> None:
+    # Thread target: collect every frame until EOF.
+    try:
+        while True:
+            frame = read_frame(stream, on_noise)
+            if frame is None:
+                return
+            sink.append(frame)
+    except Exception:
+        return
+
+
+async def _readline_async(stream: asyncio.StreamReader) -> bytes:
+    # StreamReader twin of stream.readline(MAX_LINE) (the reader's limit is MAX_LINE)
+    try:
+        return await stream.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError:
+        return await stream.read(MAX_LINE)
+
+
+async def read_frame_async(stream: asyncio.StreamReader, on_noise: Optional[NoiseSink] = None) -> Optional[Any]:
+    # read_frame for asyncio subprocess pipes
+    while True:
+        line = await _readline_async(stream)
+        if not line:
+            return None
+        i = line.find(FRAME_MARKER)
+        if i < 0:
+            if on_noise is not None:
+                on_noise(line)
+            continue
+        if i > 0 and on_noise is not None:
+            on_noise(line[:i])
+        try:
+            n = int(line[i + len(FRAME_MARKER) :].strip())
+        except ValueError:
+            if on_noise is not None:
+                on_noise(line[i:])
+            continue
+        try:
+            payload = await stream.readexactly(n)
+        except asyncio.IncompleteReadError:
+            return None
+        await stream.read(1)  # trailing newline
+        return json.loads(payload.decode("utf-8"))
+
+
+async def read_frames_async(stream: asyncio.StreamReader, sink: List[Any], on_noise: Optional[NoiseSink] = None) -> None:
+    try:
+        while True:
+            frame = await read_frame_async(stream, on_noise)
+            if frame is None:
+                return
+            sink.append(frame)
+    except Exception:
+        return
+
+
+class OutputTail:
+    # Bounded ring buffer over a child's output: keeps the last lines only, so a chatty
+    # Blender (add-on noise, huge scenes) can't grow host memory.
+
+    def __init__(self, max_lines: int = 200, max_line_chars: int = 2000) -> None:
+        self._lines: Deque[str] = deque(maxlen=max_lines)
+        self.max_line_chars = max_line_chars
+        self.total_bytes = 0
+
+    def append(self, chunk: bytes) -> None:
+        self.total_bytes += len(chunk)
+        text = chunk.decode("utf-8", "replace").rstrip("\r\n")
+        self._lines.append(text[: self.max_line_chars])
+
+    def drain(self, stream: IO[bytes]) -> None:
+        try:
+            while True:
+                chunk = stream.readline(MAX_LINE)
+                if not chunk:
+                    return
+                self.append(chunk)
+        except Exception:
+            return
+
+    async def drain_async(self, stream: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                chunk = await _readline_async(stream)
+                if not chunk:
+                    return
+                self.append(chunk)
+        except Exception:
+            return
+
+    def lines(self, n: Optional[int] = None) -> List[str]:
+        items = list(self._lines)
+        return items if n is None else items[-n:]
+
+    def text(self, max_chars: int = 4000) -> str:
+        return "\n".join(self._lines)[-max_chars:]
+
+
+class ResultChannel:
+    # Where a Blender child writes its result frames: a dedicated inherited pipe on POSIX,
+    # framed stdout elsewhere (Windows can't pass fds through subprocess).
+
+    def __init__(self) -> None:
+        self._r: Optional[int] = None
+        self._w: Optional[int] = None
+        self._on_stdout = os.name != "posix"
+        if not self._on_stdout:
+            self._r, self._w = os.pipe()
+
+    @property
+    def on_stdout(self) -> bool:
+        return self._on_stdout
+
+    def popen_kwargs(self) -> JSON:
+        env = dict(os.environ)
+        if self._w is None:
+            env[RESULT_FD_ENV] = "stdout"
+            return {"env": env}
+        env[RESULT_FD_ENV] = str(self._w)
+        return {"env": env, "pass_fds": (self._w,)}
+
+    def spawned(self) -> None:
+        # drop the parent's write end so the reader sees EOF when the child exits
+        if self._w is not None:
+            os.close(self._w)
+            self._w = None
+
+    def reader(self, stdout: IO[bytes]) -> BinaryIO:
+        if self._on_stdout or self._r is None:
+            return stdout  # type: ignore[return-value]
+        r, self._r = self._r, None
+        return os.fdopen(r, "rb")
+
+    def close(self) -> None:
+        for fd in (self._r, self._w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._r = self._w = None
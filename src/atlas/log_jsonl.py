@@ -1,18 +1,39 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import IO, Any, Dict, Iterator, List, Literal, Optional, Union
+
+from .contract import AtlasError
+from .snapshot_diff_v2 import fingerprint
+from .snapshot_store import SnapshotStore
 
 JSON = Dict[str, Any]
 
+FsyncPolicy = Literal["none", "step", "event"]
+FSYNC_POLICIES = ("none", "step", "event")
+
 
 def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except ValueError:
+        raise AtlasError("INVALID_REQUEST", f"{name} must be a number")
+
+
 @dataclass
 class LogEvent:
     ts: str
@@ -28,13 +49,64 @@ class LogEvent:
 
 
 class JsonlLogger:
-    def __init__(self, path: Path, run_id: str):
+    # Append-only JSONL event log. The file stays open and lines are buffered; the buffer
+    # is written out once it holds `buffer_bytes`, when a write comes `flush_interval`
+    # seconds after the last write-out, at end_step(), start_run() and close(). One logger
+    # can serve a whole loop: start_run() points it at the next step's run_id and file.
+    #
+    # fsync: "none" (leave it to the OS), "step" (at end_step/close) or "event" (every
+    # line). Defaults come from ATLAS_LOG_BUFFER_BYTES / ATLAS_LOG_FLUSH_SECS / ATLAS_LOG_FSYNC.
+
+    def __init__(
+        self,
+        path: Path,
+        run_id: str,
+        *,
+        buffer_bytes: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        fsync: Optional[FsyncPolicy] = None,
+    ):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
         self.run_id = run_id
         self.step = 0
+        self.buffer_bytes = int(buffer_bytes if buffer_bytes is not None else _env_float("ATLAS_LOG_BUFFER_BYTES", 64 * 1024))
+        self.flush_interval = float(flush_interval if flush_interval is not None else _env_float("ATLAS_LOG_FLUSH_SECS", 1.0))
+        policy = fsync or os.environ.get("ATLAS_LOG_FSYNC") or "none"
+        if policy not in FSYNC_POLICIES:
+            raise AtlasError("INVALID_REQUEST", f"fsync policy must be one of: {', '.join(FSYNC_POLICIES)}")
+        self.fsync: FsyncPolicy = policy  # type: ignore[assignment]
+        self._f: Optional[IO[str]] = None
+        self._buf: List[str] = []
+        self._buf_len = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
 
-    def write(self, kind: str, payload: JSON, ok: bool = True, error: Optional[JSON] = None) -> None:
+    def __enter__(self) -> "JsonlLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _next_file(self, path: Path) -> None:
+        # write out the previous run's events (as at end_step), then switch files
+        with self._lock:
+            self._flush(sync=self.fsync != "none")
+            if path != self.path:
+                if self._f is not None:
+                    self._f.close()
+                    self._f = None
+                self.path = path
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def start_run(self, run_id: str, path: Path) -> None:
+        # following events belong to run_id (numbered from 0) and go to path
+        self._next_file(path)
+        self.run_id = run_id
+        self.step = 0
+
+    def event(self, kind: str, payload: JSON, ok: bool = True, error: Optional[JSON] = None) -> LogEvent:
+        # next event in sequence (numbers it; doesn't write it)
         ev = LogEvent(
             ts=_utc_iso(),
             kind=kind,
@@ -45,5 +117,224 @@ class JsonlLogger:
             error=error,
         )
         self.step += 1
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(ev.to_json() + "\n")
+        return ev
+
+    def write(self, kind: str, payload: JSON, ok: bool = True, error: Optional[JSON] = None) -> None:
+        self.write_line(self.event(kind, payload, ok=ok, error=error).to_json())
+
+    def write_line(self, line: str) -> None:
+        with self._lock:
+            self._buf.append(line + "\n")
+            self._buf_len += len(line) + 1
+            if self.fsync == "event":
+                self._flush(sync=True)
+            elif self._buf_len >= self.buffer_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush(sync=False)
+
+    def _flush(self, *, sync: bool) -> None:
+        if self._buf:
+            if self._f is None:
+                self._f = self.path.open("a", encoding="utf-8")
+            self._f.write("".join(self._buf))
+            self._buf.clear()
+            self._buf_len = 0
+        if self._f is not None:
+            self._f.flush()
+            if sync:
+                os.fsync(self._f.fileno())
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush(sync=False)
+
+    def end_step(self) -> None:
+        # step boundary: everything so far reaches the file (and the disk unless fsync="none")
+        with self._lock:
+            self._flush(sync=self.fsync != "none")
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush(sync=self.fsync != "none")
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+class AsyncJsonlLogger(JsonlLogger):
+    # JsonlLogger whose serialization and file I/O run on a writer thread. Events are
+    # numbered by the caller and go through a bounded FIFO, so the log stays ordered and
+    # complete; write() blocks while the queue is full. flush()/close() wait for the
+    # writer to catch up, end_step() only when its fsync policy needs the disk; the
+    # writer also writes out a buffer left idle for `flush_interval` seconds. A writer
+    # failure is raised (as INTERNAL_ERROR) from the next write/flush/end_step/close;
+    # later events are dropped. Open loggers are closed at interpreter exit. Payloads
+    # must not be mutated after write().
+
+    def __init__(self, path: Path, run_id: str, *, queue_size: Optional[int] = None, **kwargs: Any):
+        super().__init__(path, run_id, **kwargs)
+        size = int(queue_size if queue_size is not None else _env_float("ATLAS_LOG_QUEUE_SIZE", 1024))
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(size, 1))
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"atlas-log-{run_id}", daemon=True)
+        self._thread.start()
+        _OPEN.add(self)
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        try:
+            self.close()
+        except AtlasError:
+            if exc_type is None:
+                raise  # don't mask the exception that ended the block
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_interval if self._buf else None)
+            except queue.Empty:
+                item = (False, None)  # idle with a buffer: the time threshold passed
+            if item is None:
+                return
+            done = None
+            try:
+                if isinstance(item, tuple):
+                    sync, done = item
+                    if self._error is None:
+                        with self._lock:
+                            self._flush(sync=sync)
+                elif isinstance(item, Path):
+                    if self._error is None:
+                        self._next_file(item)  # start_run
+                elif self._error is None:
+                    JsonlLogger.write_line(self, item if isinstance(item, str) else item.to_json())
+            except BaseException as e:
+                self._error = e
+            finally:
+                if done is not None:
+                    done.set()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            e = self._error
+            raise AtlasError("INTERNAL_ERROR", f"log writer failed: {e}", data={"path": str(self.path)}) from e
+
+    def _put(self, item: Any) -> None:
+        self._check()
+        if self._closed:
+            raise AtlasError("INTERNAL_ERROR", "log is closed", data={"path": str(self.path)})
+        self._q.put(item)
+
+    def _sync(self, sync: bool) -> None:
+        done = threading.Event()
+        self._put((sync, done))
+        done.wait()
+        self._check()
+
+    def start_run(self, run_id: str, path: Path) -> None:
+        self._put(path)
+        self.run_id = run_id
+        self.step = 0
+
+    def write(self, kind: str, payload: JSON, ok: bool = True, error: Optional[JSON] = None) -> None:
+        self._put(self.event(kind, payload, ok=ok, error=error))
+
+    def write_line(self, line: str) -> None:
+        self._put(line)
+
+    def flush(self) -> None:
+        self._sync(False)
+
+    def end_step(self) -> None:
+        if self.fsync == "none":
+            self._put((False, None))  # queued write-out: the step doesn't wait for the disk
+        else:
+            self._sync(True)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        _OPEN.discard(self)
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+        if self._error is None:
+            try:
+                super().close()
+            except BaseException as e:
+                self._error = e
+        elif self._f is not None:
+            self._f.close()
+            self._f = None
+        self._check()
+
+
+# async loggers not closed yet; one exit hook closes them all
+_OPEN: "weakref.WeakSet[AsyncJsonlLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_loggers() -> None:
+    error: Optional[AtlasError] = None
+    for logger in list(_OPEN):
+        try:
+            logger.close()
+        except AtlasError as e:
+            error = error or e
+    if error is not None:
+        raise error
+
+
+def open_logger(path: Path, run_id: str) -> JsonlLogger:
+    # Step logger: background writer unless ATLAS_LOG_ASYNC=0.
+    if os.environ.get("ATLAS_LOG_ASYNC", "1") == "0":
+        return JsonlLogger(path, run_id)
+    return AsyncJsonlLogger(path, run_id)
+
+
+@contextmanager
+def step_logger(path: Path, run_id: str, logger: Optional[JsonlLogger] = None) -> Iterator[JsonlLogger]:
+    # One step's logger: `logger` (kept open across a loop's steps; the step ends with
+    # end_step()) or a new one, closed with the step.
+    if logger is None:
+        with open_logger(path, run_id) as own:
+            yield own
+        return
+    logger.start_run(run_id, path)
+    yield logger
+    logger.end_step()
+
+
+def snapshot_ref(path: Path, snapshot: JSON, fp: Optional[str] = None) -> JSON:
+    # what a snapshot event carries instead of the snapshot itself (snapshot_refs=True)
+    return {"fingerprint": fp or fingerprint(snapshot), "path": str(path), "bytes": path.stat().st_size}
+
+
+def iter_events(path: Union[str, Path]) -> Iterator[JSON]:
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def resolve_snapshot(payload: JSON, *, store: Optional[SnapshotStore] = None, verify: bool = False) -> Optional[JSON]:
+    # Snapshot of a snapshot_* event payload: embedded, or loaded from its reference
+    # (store entry, or the file at payload["path"]). None if the event has neither.
+    if "snapshot" in payload:
+        return payload["snapshot"]
+    fp = payload.get("fingerprint")
+    if not fp:
+        return None
+    if store is not None and store.has(fp):
+        return store.get(fp, verify=verify)
+    p = Path(payload["path"])
+    if p.stem == fp and p.parent.name == fp[:2] and p.parent.parent.name in ("snapshots", "manifests"):
+        # written by a SnapshotStore: <root>/<kind>/<fp[:2]>/<fp>.json
+        return SnapshotStore(p.parents[2]).get(fp, verify=verify)
+    try:
+        snap = json.loads(p.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise AtlasError("INVALID_ARGUMENTS", f"logged snapshot is missing: {p}", data={"fingerprint": fp})
+    if verify and fingerprint(snap) != fp:
+        raise AtlasError("INTERNAL_ERROR", f"snapshot file changed since it was logged: {p}", data={"fingerprint": fp})
+    return snap
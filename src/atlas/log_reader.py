@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .contract import AtlasError
+from .log_segments import SegmentedLogStore
+
+JSON = Dict[str, Any]
+
+PathLike = Union[str, Path]
+
+# below this much JSONL, a process pool costs more than it saves
+PARALLEL_MIN_BYTES = 16 << 20
+# parallel scans hand out byte ranges of this size (whole lines: a line belongs to the
+# range it starts in); at most 2 per worker are in flight or waiting to be yielded
+CHUNK_BYTES = 8 << 20
+
+
+def _parse_ts(value: str) -> datetime:
+    try:
+        t = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise AtlasError("INVALID_ARGUMENTS", f"not an ISO-8601 timestamp: {value!r}")
+    return t if t.tzinfo is not None else t.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class LogQuery:
+    kinds: Optional[Tuple[str, ...]] = None
+    run_ids: Optional[Tuple[str, ...]] = None
+    ok: Optional[bool] = None
+    since: Optional[str] = None  # inclusive
+    until: Optional[str] = None  # exclusive
+    fields: Optional[Tuple[str, ...]] = None  # dotted paths, e.g. "payload.diff.counts.added"
+
+    def needles(self) -> List[List[bytes]]:
+        # Byte patterns a matching line must contain (one per group), checked before
+        # json.loads. Our loggers write LogEvent.to_json(), i.e. json.dumps defaults.
+        groups = []
+        if self.kinds:
+            groups.append([f'"kind": {json.dumps(k, ensure_ascii=False)}'.encode("utf-8") for k in self.kinds])
+        if self.run_ids:
+            groups.append([f'"run_id": {json.dumps(r, ensure_ascii=False)}'.encode("utf-8") for r in self.run_ids])
+        return groups
+
+    def match(self, ev: JSON) -> bool:
+        if self.kinds and ev.get("kind") not in self.kinds:
+            return False
+        if self.run_ids and ev.get("run_id") not in self.run_ids:
+            return False
+        if self.ok is not None and bool(ev.get("ok")) != self.ok:
+            return False
+        if self.since or self.until:
+            try:
+                ts = _parse_ts(ev.get("ts"))  # type: ignore[arg-type]
+            except AtlasError:
+                return False
+            if self.since and ts < _parse_ts(self.since):
+                return False
+            if self.until and ts >= _parse_ts(self.until):
+                return False
+        return True
+
+    def project(self, ev: JSON) -> JSON:
+        if not self.fields:
+            return ev
+        out: JSON = {}
+        for f in self.fields:
+            cur: Any = ev
+            for part in f.split("."):
+                cur = cur.get(part) if isinstance(cur, dict) else None
+            out[f] = cur
+        return out
+
+
+def _scan_lines(lines: Iterable[bytes], q: LogQuery) -> Iterator[JSON]:
+    needles = q.needles()
+    for line in lines:
+        if needles and not all(any(n in line for n in group) for group in needles):
+            continue
+        if not line.strip():
+            continue
+        try:
+            ev = json.loads(line)
+        except ValueError:
+            continue  # torn last line of a log that is still being written
+        if isinstance(ev, dict) and q.match(ev):
+            yield q.project(ev)
+
+
+def _range_lines(f: Any, start: int, end: int) -> Iterator[bytes]:
+    if start > 0:
+        f.seek(start - 1)
+        f.readline()  # the rest of the line that began before start
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            return
+        yield line
+
+
+def _scan_range(path: str, start: int, end: int, q: LogQuery) -> List[JSON]:
+    with open(path, "rb") as f:
+        return list(_scan_lines(_range_lines(f, start, end), q))
+
+
+def _chunks(files: List[Path]) -> Iterator[Tuple[str, int, int]]:
+    for f in files:
+        size = f.stat().st_size
+        for start in range(0, size, CHUNK_BYTES):
+            yield str(f), start, min(start + CHUNK_BYTES, size)
+
+
+def _scan_parallel(files: List[Path], q: LogQuery, workers: int) -> Iterator[JSON]:
+    # In order, with a bounded window of submitted ranges: a consumer that stops early
+    # (query_logs' limit) leaves the rest unparsed. spawn: no fork of a threaded server.
+    ctx = multiprocessing.get_context("spawn")
+    chunks = _chunks(files)
+    window: "deque[Future[List[JSON]]]" = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        try:
+            for path, start, end in chunks:
+                window.append(ex.submit(_scan_range, path, start, end, q))
+                if len(window) < 2 * workers:
+                    continue
+                yield from window.popleft().result()
+            while window:
+                yield from window.popleft().result()
+        finally:
+            for fut in window:
+                fut.cancel()
+            ex.shutdown(cancel_futures=True)
+
+
+def _is_segment_store(p: Path) -> bool:
+    return p.is_dir() and any(p.glob("seg-*.idx.jsonl"))
+
+
+def collect_sources(paths: Sequence[PathLike]) -> Tuple[List[Path], List[Path]]:
+    # -> (jsonl files, segmented store roots), each sorted; directories are searched recursively
+    files: List[Path] = []
+    stores: List[Path] = []
+    for raw in paths:
+        p = Path(raw)
+        if not p.exists():
+            raise AtlasError("INVALID_ARGUMENTS", f"log path not found: {p}")
+        if p.is_file():
+            files.append(p)
+            continue
+        for d in [p, *sorted(x for x in p.rglob("*") if x.is_dir())]:
+            if _is_segment_store(d):
+                stores.append(d)
+        for f in sorted(p.rglob("*.jsonl")):
+            if not f.name.endswith(".idx.jsonl") and f.parent not in stores:
+                files.append(f)
+    return sorted(dict.fromkeys(files)), sorted(dict.fromkeys(stores))
+
+
+def _store_events(root: Path, q: LogQuery) -> Iterator[JSON]:
+    store = SegmentedLogStore(root)
+    # the sidecar index already knows run_id/kind: only matching lines are decoded
+    for rid in store.run_ids():
+        if q.run_ids and rid not in q.run_ids:
+            continue
+        for e in store.lookup(rid):
+            if q.kinds and e[2] not in q.kinds:
+                continue
+            ev = store.read_entry(e)
+            if q.match(ev):
+                yield q.project(ev)
+
+
+def iter_log_events(
+    paths: Sequence[PathLike],
+    query: Optional[LogQuery] = None,
+    *,
+    workers: Optional[int] = None,
+) -> Iterator[JSON]:
+    # Matching events from JSONL files / directories / segmented stores, file by file in
+    # path order (lines in file order). Large inputs are parsed in a process pool
+    # (ATLAS_LOG_WORKERS, default: all cores), CHUNK_BYTES at a time; the output
+    # order is the same.
+    q = query or LogQuery()
+    files, stores = collect_sources(paths)
+    if workers is None:
+        workers = int(os.environ.get("ATLAS_LOG_WORKERS", "0") or 0) or (os.cpu_count() or 1)
+    big = sum(f.stat().st_size for f in files) >= PARALLEL_MIN_BYTES
+    if workers > 1 and big:
+        yield from _scan_parallel(files, q, workers)
+    else:
+        for f in files:
+            with f.open("rb") as fh:
+                yield from _scan_lines(fh, q)
+    for root in stores:
+        yield from _store_events(root, q)
+
+
+def query_logs(
+    paths: Sequence[PathLike],
+    query: Optional[LogQuery] = None,
+    *,
+    limit: int = 1000,
+    workers: Optional[int] = None,
+) -> JSON:
+    events: List[JSON] = []
+    truncated = False
+    for ev in iter_log_events(paths, query, workers=workers):
+        if len(events) >= limit:
+            truncated = True
+            break
+        events.append(ev)
+    return {"schema": "atlas.logs.query.v1", "count": len(events), "truncated": truncated, "events": events}
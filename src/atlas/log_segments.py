@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+from .contract import AtlasError
+from .log_jsonl import LogEvent, _utc_iso
+
+JSON = Dict[str, Any]
+
+PathLike = Union[str, Path]
+
+Compression = Literal["none", "gzip", "zstd"]
+COMPRESSIONS = ("none", "gzip", "zstd")
+_EXT = {"none": ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+# index entry: (run_id, step, kind, segment, block offset, block length, offset in block, length)
+IndexEntry = Tuple[str, int, str, int, int, int, int, int]
+
+
+def _compression_of(path: Path) -> str:
+    for c in ("gzip", "zstd"):
+        if path.name.endswith(_EXT[c]):
+            return c
+    return "none"
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError:
+        raise AtlasError("INVALID_ARGUMENTS", "zstd log compression needs the 'zstandard' package")
+    return zstandard
+
+
+def _compressor(compression: str) -> Any:
+    if compression == "gzip":
+        return lambda raw: gzip.compress(raw, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=3).compress
+    return lambda raw: raw
+
+
+def _decompress(compression: str, data: bytes) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+class SegmentedLogStore:
+    # Append-only event log for many runs, in size-rotated segments:
+    #   <root>/seg-000001.jsonl[.gz|.zst]   blocks of JSONL lines (compressed per block)
+    #   <root>/seg-000001.idx.jsonl         [run_id, step, kind, block_off, block_len, off, len]
+    # Lines are gathered into blocks of ~block_bytes; a block is compressed on its own
+    # (concatenated gzip members / zstd frames are still a valid stream), written, and
+    # only then indexed, so the index never points past the data. Reading an event
+    # decompresses just its block. One writer per store.
+
+    def __init__(
+        self,
+        root: PathLike,
+        *,
+        segment_bytes: int = 64 << 20,
+        block_bytes: int = 256 << 10,
+        compression: Optional[Compression] = None,
+        fsync: bool = False,
+    ) -> None:
+        compression = compression or os.environ.get("ATLAS_LOG_COMPRESSION") or "none"  # type: ignore[assignment]
+        if compression not in COMPRESSIONS:
+            raise AtlasError("INVALID_ARGUMENTS", f"compression must be one of: {', '.join(COMPRESSIONS)}")
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = int(segment_bytes)
+        self.block_bytes = int(block_bytes)
+        self.compression: Compression = compression  # type: ignore[assignment]
+        self.fsync = bool(fsync)
+        self._compress = _compressor(compression)
+        self._lock = threading.Lock()
+        self._block: List[bytes] = []
+        self._block_len = 0
+        self._pending: List[Tuple[str, int, str, int, int]] = []
+        self._data: Optional[IO[bytes]] = None
+        self._idx: Optional[IO[str]] = None
+        self._index: Optional[Dict[str, List[IndexEntry]]] = None
+        self._cached_block: Tuple[Any, bytes] = (None, b"")
+        nums = self._segment_numbers()
+        self._seg = nums[-1] if nums else 1
+        if nums:
+            last = self._segment_path(self._seg)
+            # never mix compressions inside one segment
+            if _compression_of(last) != compression or last.stat().st_size >= self.segment_bytes:
+                self._seg += 1
+
+    def __enter__(self) -> "SegmentedLogStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- layout
+
+    def _segment_numbers(self) -> List[int]:
+        return sorted(int(p.name[4:10]) for p in self.root.glob("seg-*.idx.jsonl"))
+
+    def _segment_path(self, n: int) -> Path:
+        for ext in _EXT.values():
+            p = self.root / f"seg-{n:06d}{ext}"
+            if p.exists():
+                return p
+        return self.root / f"seg-{n:06d}{_EXT[self.compression]}"
+
+    def _index_path(self, n: int) -> Path:
+        return self.root / f"seg-{n:06d}.idx.jsonl"
+
+    def segments(self) -> List[Path]:
+        return [self._segment_path(n) for n in self._segment_numbers()]
+
+    # -- writing
+
+    def logger(self, run_id: str) -> "SegmentLogger":
+        return SegmentLogger(self, run_id)
+
+    def append(self, run_id: str, step: int, kind: str, line: str) -> None:
+        data = (line + "\n").encode("utf-8")
+        with self._lock:
+            self._pending.append((run_id, int(step), kind, self._block_len, len(data)))
+            self._block.append(data)
+            self._block_len += len(data)
+            if self._block_len >= self.block_bytes:
+                self._write_block()
+
+    def _write_block(self) -> None:
+        if not self._pending:
+            return
+        if self._data is None:
+            self._recover(self._seg)
+            self._data = self._segment_path(self._seg).open("ab")
+            self._idx = self._index_path(self._seg).open("a", encoding="utf-8")
+        assert self._idx is not None
+        payload = self._compress(b"".join(self._block))
+        boff = self._data.tell()
+        self._data.write(payload)
+        self._data.flush()
+        entries = [(rid, step, kind, self._seg, boff, len(payload), off, n) for rid, step, kind, off, n in self._pending]
+        self._idx.write("".join(json.dumps(list(e[:3]) + list(e[4:])) + "\n" for e in entries))
+        self._idx.flush()
+        if self._index is not None:
+            for e in entries:
+                self._index.setdefault(e[0], []).append(e)
+        self._block.clear()
+        self._block_len = 0
+        self._pending.clear()
+        if boff + len(payload) >= self.segment_bytes:
+            self._close_files(sync=self.fsync)
+            self._seg += 1
+
+    def _recover(self, n: int) -> None:
+        # Before appending to a segment: cut an interrupted write (torn index line, or a
+        # block written but never indexed) back to the last complete index entry.
+        idx, data = self._index_path(n), self._segment_path(n)
+        if not idx.exists():
+            return
+        raw = idx.read_bytes()
+        keep, data_end = 0, 0
+        for line in raw.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn line")
+                _, _, _, boff, blen, _, _ = json.loads(line)
+            except (TypeError, ValueError):
+                break
+            keep += len(line)
+            data_end = max(data_end, boff + blen)
+        if keep < len(raw):
+            with idx.open("r+b") as f:
+                f.truncate(keep)
+        if data.exists() and data.stat().st_size > data_end:
+            with data.open("r+b") as f:
+                f.truncate(data_end)
+
+    def _close_files(self, *, sync: bool) -> None:
+        for f in (self._data, self._idx):
+            if f is not None:
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+                f.close()
+        self._data = self._idx = None
+
+    def flush(self, *, sync: Optional[bool] = None) -> None:
+        with self._lock:
+            self._write_block()
+            for f in (self._data, self._idx):
+                if f is not None:
+                    f.flush()
+                    if self.fsync if sync is None else sync:
+                        os.fsync(f.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_block()
+            self._close_files(sync=self.fsync)
+
+    # -- reading
+
+    def _load_index(self) -> Dict[str, List[IndexEntry]]:
+        if self._index is None:
+            index: Dict[str, List[IndexEntry]] = {}
+            for n in self._segment_numbers():
+                with self._index_path(n).open("r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rid, step, kind, boff, blen, off, ln = json.loads(line)
+                        except ValueError:
+                            continue  # torn tail of a write in progress (or interrupted)
+                        index.setdefault(rid, []).append((rid, step, kind, n, boff, blen, off, ln))
+            self._index = index
+        return self._index
+
+    def run_ids(self) -> List[str]:
+        self.flush(sync=False)
+        with self._lock:
+            return list(self._load_index())
+
+    def lookup(self, run_id: str, step: Optional[int] = None, kind: Optional[str] = None) -> List[IndexEntry]:
+        self.flush(sync=False)
+        with self._lock:
+            entries = self._load_index().get(run_id, [])
+            return [e for e in entries if (step is None or e[1] == step) and (kind is None or e[2] == kind)]
+
+    def read_entry(self, e: IndexEntry) -> JSON:
+        _, _, _, seg, boff, blen, off, n = e
+        path = self._segment_path(seg)
+        compression = _compression_of(path)
+        if compression == "none":
+            with path.open("rb") as f:
+                f.seek(boff + off)
+                return json.loads(f.read(n))
+        if self._cached_block[0] != (seg, boff):
+            with path.open("rb") as f:
+                f.seek(boff)
+                self._cached_block = ((seg, boff), _decompress(compression, f.read(blen)))
+        return json.loads(self._cached_block[1][off : off + n])
+
+    def read(self, run_id: str, step: int, kind: Optional[str] = None) -> JSON:
+        hits = self.lookup(run_id, step, kind)
+        if not hits:
+            raise AtlasError("INVALID_ARGUMENTS", f"no logged event for run {run_id} step {step}", data={"kind": kind})
+        return self.read_entry(hits[0])
+
+    def events(self, run_id: Optional[str] = None) -> Iterator[JSON]:
+        # in write order per run; runs in order of first appearance
+        for rid in [run_id] if run_id is not None else self.run_ids():
+            for e in self.lookup(rid):
+                yield self.read_entry(e)
+
+    def stats(self) -> JSON:
+        segs = self.segments()
+        return {
+            "root": str(self.root),
+            "compression": self.compression,
+            "segments": len(segs),
+            "bytes": sum(p.stat().st_size for p in segs),
+            "runs": len(self.run_ids()),
+        }
+
+
+class SegmentLogger:
+    # JsonlLogger interface for one run, writing into a shared SegmentedLogStore.
+
+    def __init__(self, store: SegmentedLogStore, run_id: str) -> None:
+        self.store = store
+        self.run_id = run_id
+        self.step = 0
+
+    def __enter__(self) -> "SegmentLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def write(self, kind: str, payload: JSON, ok: bool = True, error: Optional[JSON] = None) -> None:
+        ev = LogEvent(ts=_utc_iso(), kind=kind, payload=payload, run_id=self.run_id, step=self.step, ok=ok, error=error)
+        self.step += 1
+        self.store.append(self.run_id, ev.step, kind, ev.to_json())
+
+    def flush(self) -> None:
+        self.store.flush(sync=False)
+
+    def end_step(self) -> None:
+        self.store.flush()
+
+    def close(self) -> None:
+        # the store outlives its loggers; a run's events are complete once they are indexed
+        self.end_step()
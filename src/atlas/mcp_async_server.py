@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from .cancel import CancelToken
+from .mcp_stdio_server import (
+    CANCEL_METHODS,
+    _boot,
+    _call_context,
+    _concurrency,
+    _dispatch,
+    _eprint,
+    _error_response,
+    _InFlight,
+    _invalid_response,
+    _is_valid,
+    _log_timing,
+    _parse_line,
+    _readline,
+    _response,
+    _tool_call_params,
+    _write_lines,
+)
+from .registry import ToolRegistry
+
+JSON = Dict[str, Any]
+
+
+async def _call(reg: ToolRegistry, req: JSON, limit: asyncio.Semaphore, token: CancelToken) -> Any:
+    # a client cancel also cancels the task, which kills an async handler's child
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    assert task is not None
+    unregister = token.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        with _call_context(req, token):
+            async with limit:
+                return await reg.call_tool_async(*_tool_call_params(req))
+    except asyncio.CancelledError:
+        if not token.cancelled:
+            raise  # the server is shutting down
+        task.uncancel()
+        raise token.error()
+    finally:
+        unregister()
+
+
+async def _handle(
+    reg: ToolRegistry,
+    req: JSON,
+    timing: bool,
+    limit: asyncio.Semaphore,
+    calls: _InFlight,
+    token: Optional[CancelToken] = None,
+) -> Optional[str]:
+    # -> response line (None for notifications and cancelled calls)
+    t_req = time.perf_counter()
+    try:
+        if req.get("method") == "tools/call":
+            token = token or calls.start(req)
+            try:
+                result: Any = await _call(reg, req, limit, token)
+            finally:
+                calls.finish(req, token)
+        else:
+            result = _dispatch(reg, req.get("method"), req)
+        line = _response(req, result)
+    except Exception as e:
+        line = _error_response(req, e)
+    if token is not None and token.reason == "cancelled":
+        line = None
+    if timing:
+        _log_timing(req, t_req)
+    return line
+
+
+async def _serve_one(
+    reg: ToolRegistry,
+    req: JSON,
+    timing: bool,
+    limit: asyncio.Semaphore,
+    calls: _InFlight,
+    token: Optional[CancelToken] = None,
+) -> None:
+    _write_lines([await _handle(reg, req, timing, limit, calls, token)], batch=False)
+
+
+async def _serve_batch(
+    reg: ToolRegistry, batch: List[Any], timing: bool, limit: asyncio.Semaphore, calls: _InFlight
+) -> None:
+    if not batch:
+        _write_lines([_invalid_response([], in_batch=True)], batch=False)
+        return
+
+    async def one(req: Any, token: Optional[CancelToken]) -> Optional[str]:
+        if not _is_valid(req):
+            return _invalid_response(req, in_batch=True)
+        if req.get("method") in CANCEL_METHODS:
+            calls.cancel(req)
+            return None
+        return await _handle(reg, req, timing, limit, calls, token)
+
+    # tokens first, so a cancel later in the batch finds its call
+    tokens = [
+        calls.start(req) if _is_valid(req) and req.get("method") == "tools/call" else None
+        for req in batch
+    ]
+    lines = await asyncio.gather(*(one(req, t) for req, t in zip(batch, tokens, strict=True)))
+    _write_lines(list(lines), batch=True)
+
+
+async def serve_stdio_async(reg: Optional[ToolRegistry] = None) -> int:
+    # mcp_stdio_server's protocol on an asyncio loop. Tools with an async handler (the
+    # Blender script tools: asyncio subprocesses) run on the loop, so in-flight Blender
+    # jobs don't hold a thread each; sync handlers run in the loop's default executor.
+    # At most ATLAS_MCP_CONCURRENCY (default 256) tools/call run at once; responses
+    # come out as calls finish, matched by id. Batches run concurrently, one write each.
+    # Cancel notifications cancel the call's task (killing its Blender child).
+    reg, timing = _boot(reg)
+    limit = asyncio.Semaphore(_concurrency(256))
+    loop = asyncio.get_running_loop()
+    # one thread blocks on stdin (portable: no pipe transports on Windows consoles)
+    stdin = ThreadPoolExecutor(1, thread_name_prefix="atlas-mcp-stdin")
+    tasks: Set["asyncio.Task[None]"] = set()
+    calls = _InFlight()
+
+    def spawn(coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    try:
+        while True:
+            line = await loop.run_in_executor(stdin, _readline)
+            if line is None:
+                _eprint("[atlas.mcp] eof")
+                return 0
+            if not line:
+                continue
+
+            msg = _parse_line(line)
+            if isinstance(msg, list):
+                spawn(_serve_batch(reg, msg, timing, limit, calls))
+            elif not _is_valid(msg):
+                _write_lines([_invalid_response(msg)], batch=False)
+            elif msg.get("method") in CANCEL_METHODS:
+                calls.cancel(msg)
+            elif msg.get("method") == "tools/call":
+                spawn(_serve_one(reg, msg, timing, limit, calls, calls.start(msg)))
+            else:
+                await _serve_one(reg, msg, timing, limit, calls)
+    finally:
+        # calls still running at eof are answered before the server exits
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        stdin.shutdown(wait=False)
+
+
+def main() -> int:
+    return asyncio.run(serve_stdio_async())
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
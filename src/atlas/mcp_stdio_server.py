@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+from .cancel import CancelToken, active
 from .contract import AtlasError
+from .progress import Reporter, reporting
+from .registry import ToolRegistry
 from .tools_core import build_registry
 
 JSON = Dict[str, Any]
@@ -17,6 +25,11 @@ ERR_INVALID_REQUEST = -32600
 ERR_METHOD_NOT_FOUND = -32601
 ERR_INVALID_PARAMS = -32602
 ERR_INTERNAL_ERROR = -32603
+ERR_REQUEST_TIMEOUT = -32001
+ERR_REQUEST_CANCELLED = -32800
+
+# cancel notifications: MCP's (params.requestId) and LSP-style (params.id)
+CANCEL_METHODS = ("notifications/cancelled", "$/cancelRequest")
 
 
 def _eprint(*args: Any) -> None:
@@ -30,9 +43,39 @@ def _readline() -> Optional[str]:
     return line.strip()
 
 
-def _write(obj: JSON) -> None:
-    sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    sys.stdout.flush()
+class RawJSON(str):
+    # a result that is already JSON text (spliced into the response as-is)
+    pass
+
+
+# one response line at a time: tools/call responses come from worker threads
+_WRITE_LOCK = threading.Lock()
+
+
+def _write_line(text: str) -> None:
+    with _WRITE_LOCK:
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+
+
+def _dumps(obj: JSON) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _result_line(rid: Any, result: Any) -> str:
+    if isinstance(result, RawJSON):
+        # same text json.dumps would give for the whole response
+        return '{"jsonrpc": "2.0", "id": ' + json.dumps(rid, ensure_ascii=False) + ', "result": ' + result + "}"
+    return _dumps({"jsonrpc": "2.0", "id": rid, "result": result})
+
+
+def _write_lines(lines: List[Optional[str]], *, batch: bool) -> None:
+    # a batch is answered with one array line (nothing if it only held notifications)
+    out = [line for line in lines if line is not None]
+    if batch and out:
+        _write_line("[" + ", ".join(out) + "]")
+    elif out:
+        _write_line(out[0])
 
 
 def _is_obj(x: Any) -> bool:
@@ -46,13 +89,11 @@ def _as_error(code: int, message: str, data: Optional[JSON] = None) -> JSON:
     return err
 
 
-def _handle_tools_list(req: JSON) -> JSON:
-    reg = build_registry()
-    tools = reg.list_tools()
-    return {"tools": tools}
+def _handle_tools_list(reg: ToolRegistry, req: JSON) -> RawJSON:
+    return RawJSON(reg.tools_list_json())
 
 
-def _handle_tools_call(req: JSON) -> JSON:
+def _tool_call_params(req: JSON) -> Tuple[str, JSON]:
     params = req.get("params") or {}
     if not _is_obj(params):
         raise AtlasError("INVALID_ARGUMENTS", "params must be an object")
@@ -66,67 +107,306 @@ def _handle_tools_call(req: JSON) -> JSON:
         arguments = {}
     if not _is_obj(arguments):
         raise AtlasError("INVALID_ARGUMENTS", "params.arguments must be an object")
+    return name, arguments
 
-    reg = build_registry()
-    return reg.call_tool(name, arguments)
 
+def _handle_tools_call(reg: ToolRegistry, req: JSON) -> JSON:
+    return reg.call_tool(*_tool_call_params(req))
 
-def _dispatch(method: str, req: JSON) -> JSON:
+
+def _dispatch(reg: ToolRegistry, method: str, req: JSON) -> Any:
     if method == "tools/list":
-        return _handle_tools_list(req)
+        return _handle_tools_list(reg, req)
     if method == "tools/call":
-        return _handle_tools_call(req)
+        return _handle_tools_call(reg, req)
     raise KeyError(method)
 
 
-def serve_stdio() -> int:
-    _eprint("[atlas.mcp] boot")
+def _response(req: JSON, result: Any) -> Optional[str]:
+    # notifications (no "id"): no response
+    return _result_line(req.get("id"), result) if "id" in req else None
+
+
+def _error_response(req: JSON, e: Exception) -> Optional[str]:
+    method = req.get("method")
+    if isinstance(e, KeyError):
+        err = _as_error(ERR_METHOD_NOT_FOUND, f"Method not found: {method}")
+    elif isinstance(e, AtlasError) and e.code == "CANCELLED":
+        timed_out = e.data.get("reason") == "timeout"
+        code = ERR_REQUEST_TIMEOUT if timed_out else ERR_REQUEST_CANCELLED
+        err = _as_error(code, e.message, e.data)
+    elif isinstance(e, AtlasError):
+        # Map to INVALID_PARAMS unless it's internal
+        code = ERR_INVALID_PARAMS if e.code != "INTERNAL_ERROR" else ERR_INTERNAL_ERROR
+        err = _as_error(code, e.message, e.data)
+    else:
+        tb = "".join(traceback.format_exception(e, limit=8))
+        _eprint("[atlas.mcp] internal error:", tb)
+        err = _as_error(ERR_INTERNAL_ERROR, "Internal error", {"traceback": tb})
+    return _dumps({"jsonrpc": "2.0", "id": req.get("id"), "error": err}) if "id" in req else None
+
+
+def _log_timing(req: JSON, t_req: float) -> None:
+    _eprint(f"[atlas.mcp] request method={req.get('method')} ms={(time.perf_counter() - t_req) * 1000.0:.3f}")
+
+
+def _parse_line(line: str) -> Any:
+    # -> request object, batch list, or None (not JSON: ignored)
+    try:
+        return json.loads(line)
+    except Exception:
+        # not JSON -> ignore (or you can hard error)
+        _eprint("[atlas.mcp] invalid json line ignored")
+        return None
+
 
-    while True:
-        line = _readline()
-        if line is None:
-            _eprint("[atlas.mcp] eof")
-            return 0
-        if not line:
-            continue
+def _is_valid(req: Any) -> bool:
+    return _is_obj(req) and req.get("jsonrpc") == "2.0" and "method" in req
 
-        try:
-            req = json.loads(line)
-        except Exception:
-            # not JSON -> ignore (or you can hard error)
-            _eprint("[atlas.mcp] invalid json line ignored")
-            continue
 
-        if not _is_obj(req) or req.get("jsonrpc") != "2.0" or "method" not in req:
-            # invalid request
-            rid = req.get("id") if _is_obj(req) else None
-            if rid is not None:
-                _write({"jsonrpc": "2.0", "id": rid, "error": _as_error(ERR_INVALID_REQUEST, "Invalid Request")})
-            continue
+def _invalid_response(req: Any, *, in_batch: bool = False) -> Optional[str]:
+    # Invalid Request error; outside a batch only requests with an id get one
+    rid = req.get("id") if _is_obj(req) else None
+    if rid is None and not in_batch:
+        return None
+    return _dumps({"jsonrpc": "2.0", "id": rid, "error": _as_error(ERR_INVALID_REQUEST, "Invalid Request")})
 
-        method = req.get("method")
-        rid = req.get("id")  # may be absent for notifications
 
-        # notifications: no response
-        is_notification = "id" not in req
+def _progress_reporter(req: JSON) -> Optional[Reporter]:
+    # MCP: progress notifications only for calls that sent params._meta.progressToken
+    params = req.get("params")
+    meta = params.get("_meta") if _is_obj(params) else None
+    ptoken = meta.get("progressToken") if _is_obj(meta) else None
+    if not isinstance(ptoken, (str, int)) or isinstance(ptoken, bool):
+        return None
 
+    def notify(event: JSON) -> None:
+        params = {"progressToken": ptoken, **event}
+        _write_line(_dumps({"jsonrpc": "2.0", "method": "notifications/progress", "params": params}))
+
+    return notify
+
+
+@contextmanager
+def _call_context(req: JSON, token: Optional[CancelToken]) -> Iterator[None]:
+    # the request's cancel token and progress listener, current for the tool call
+    with ExitStack() as stack:
+        if token is not None:
+            stack.enter_context(active(token))
+        reporter = _progress_reporter(req)
+        if reporter is not None:
+            stack.enter_context(reporting(reporter))
+        yield
+
+
+def _handle(
+    reg: ToolRegistry, req: JSON, timing: bool, token: Optional[CancelToken] = None
+) -> Optional[str]:
+    # -> response line (None for notifications); token: the request's cancel token
+    t_req = time.perf_counter()
+    try:
+        with _call_context(req, token):
+            line = _response(req, _dispatch(reg, req.get("method"), req))
+    except Exception as e:
+        line = _error_response(req, e)
+    if token is not None and token.reason == "cancelled":
+        line = None  # the client cancelled it: no response (MCP)
+    if timing:
+        _log_timing(req, t_req)
+    return line
+
+
+def _id_key(rid: Any) -> str:
+    return json.dumps(rid, sort_keys=True)
+
+
+class _InFlight:
+    # Cancel tokens of the tools/call requests being served, by id. A token is made by
+    # the reader before the call is queued, so a cancel can never arrive too early.
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, CancelToken] = {}
+        self._lock = threading.Lock()
+
+    def start(self, req: JSON) -> CancelToken:
+        token = CancelToken()
+        if "id" in req:
+            with self._lock:
+                self._tokens[_id_key(req["id"])] = token
+        return token
+
+    def finish(self, req: JSON, token: CancelToken) -> None:
+        key = _id_key(req.get("id"))
+        with self._lock:
+            if self._tokens.get(key) is token:
+                del self._tokens[key]
+
+    def cancel(self, req: JSON) -> None:
+        params = req.get("params") or {}
+        if not _is_obj(params):
+            return
+        rid = params.get("requestId", params.get("id"))
+        with self._lock:
+            token = self._tokens.get(_id_key(rid))
+        if token is not None:
+            _eprint(f"[atlas.mcp] cancel id={_id_key(rid)} reason={params.get('reason')}")
+            token.cancel("cancelled")
+
+
+class _Batch:
+    # Collects the responses of one JSON-RPC batch; the last one in writes them all.
+
+    def __init__(self, n: int) -> None:
+        self._lines: List[Optional[str]] = [None] * n
+        self._left = n
+        self._lock = threading.Lock()
+
+    def put(self, i: int, line: Optional[str]) -> None:
+        with self._lock:
+            self._lines[i] = line
+            self._left -= 1
+            if self._left:
+                return
+        _write_lines(self._lines, batch=True)
+
+
+class _Workers:
+    # The tool-call pool. submit() waits while every worker is busy, so a client can't
+    # queue unbounded work. The reader never runs a call itself: with a free worker it
+    # goes straight back to reading (and sees cancels for the running calls).
+
+    def __init__(self, n: int) -> None:
+        self._pool = ThreadPoolExecutor(n, thread_name_prefix="atlas-mcp")
+        self._slots = threading.BoundedSemaphore(n)
+
+    def submit(self, fn: Callable[..., None], *args: Any) -> None:
+        self._slots.acquire()
         try:
-            result = _dispatch(method, req)
-            if not is_notification:
-                _write({"jsonrpc": "2.0", "id": rid, "result": result})
-        except KeyError:
-            if not is_notification:
-                _write({"jsonrpc": "2.0", "id": rid, "error": _as_error(ERR_METHOD_NOT_FOUND, f"Method not found: {method}")})
-        except AtlasError as e:
-            # Map to INVALID_PARAMS unless it's internal
-            code = ERR_INVALID_PARAMS if e.code != "INTERNAL_ERROR" else ERR_INTERNAL_ERROR
-            if not is_notification:
-                _write({"jsonrpc": "2.0", "id": rid, "error": _as_error(code, e.message, e.data)})
-        except Exception as e:
-            tb = traceback.format_exc(limit=8)
-            _eprint("[atlas.mcp] internal error:", tb)
-            if not is_notification:
-                _write({"jsonrpc": "2.0", "id": rid, "error": _as_error(ERR_INTERNAL_ERROR, "Internal error", {"traceback": tb})})
+            self._pool.submit(fn, *args).add_done_callback(lambda _: self._slots.release())
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def _run_call(
+    reg: ToolRegistry, req: JSON, timing: bool, calls: _InFlight, token: CancelToken
+) -> Optional[str]:
+    try:
+        return _handle(reg, req, timing, token)
+    finally:
+        calls.finish(req, token)
+
+
+def _write_call(
+    reg: ToolRegistry, req: JSON, timing: bool, calls: _InFlight, token: CancelToken
+) -> None:
+    _write_lines([_run_call(reg, req, timing, calls, token)], batch=False)
+
+
+def _serve(reg: ToolRegistry, req: JSON, timing: bool, calls: _InFlight, workers: _Workers) -> None:
+    # one request: tools/call on the pool (cancellable by id), the rest inline
+    if req.get("method") in CANCEL_METHODS:
+        calls.cancel(req)
+    elif req.get("method") != "tools/call":
+        _write_lines([_handle(reg, req, timing)], batch=False)
+    else:
+        workers.submit(_write_call, reg, req, timing, calls, calls.start(req))
+
+
+def _put_call(
+    collected: _Batch, i: int, reg: ToolRegistry, req: JSON, timing: bool, calls: _InFlight, token: CancelToken
+) -> None:
+    collected.put(i, _run_call(reg, req, timing, calls, token))
+
+
+def _serve_batch(
+    reg: ToolRegistry,
+    batch: List[Any],
+    timing: bool,
+    calls: _InFlight,
+    workers: _Workers,
+) -> None:
+    # Elements run like single requests (tools/call in parallel on the pool); the
+    # responses, in request order, go out in one write once every element is done.
+    if not batch:
+        _write_lines([_invalid_response([], in_batch=True)], batch=False)
+        return
+    collected = _Batch(len(batch))
+    for i, req in enumerate(batch):
+        if not _is_valid(req):
+            collected.put(i, _invalid_response(req, in_batch=True))
+        elif req.get("method") in CANCEL_METHODS:
+            calls.cancel(req)
+            collected.put(i, None)
+        elif req.get("method") != "tools/call":
+            collected.put(i, _handle(reg, req, timing))
+        else:
+            workers.submit(_put_call, collected, i, reg, req, timing, calls, calls.start(req))
+
+
+def _concurrency(default: int = 4) -> int:
+    try:
+        return max(int(os.environ.get("ATLAS_MCP_CONCURRENCY", str(default)) or default), 1)
+    except ValueError:
+        raise AtlasError("INVALID_REQUEST", "ATLAS_MCP_CONCURRENCY must be an integer")
+
+
+def _boot(reg: Optional[ToolRegistry]) -> Tuple[ToolRegistry, bool]:
+    # The registry is built once per server; tool groups load on first use unless
+    # ATLAS_MCP_EAGER_TOOLS=1. ATLAS_MCP_TIMING=1 reports the boot and per-request
+    # times on stderr. -> (registry, timing)
+    timing = os.environ.get("ATLAS_MCP_TIMING", "") not in ("", "0")
+    t0 = time.perf_counter()
+    if reg is None:
+        reg = build_registry(lazy=os.environ.get("ATLAS_MCP_EAGER_TOOLS", "") in ("", "0"))
+    reg.tools_list_json()
+    if timing:
+        _eprint(f"[atlas.mcp] boot registry_ms={(time.perf_counter() - t0) * 1000.0:.3f}")
+    else:
+        _eprint("[atlas.mcp] boot")
+    return reg, timing
+
+
+def serve_stdio(reg: Optional[ToolRegistry] = None) -> int:
+    # tools/call runs on up to ATLAS_MCP_CONCURRENCY (default 4) worker threads and
+    # answers when done, so responses can come out of request order (match them by
+    # id); 1 runs calls one at a time, in order. Calls never run on the reader thread,
+    # which waits for a free worker before taking the next call. Everything else is
+    # answered inline.
+    # A JSON-RPC batch (array) gets one array response, written when all of it is done.
+    # notifications/cancelled (or $/cancelRequest) kills a running call's Blender child
+    # and stops it at the next step boundary; a cancelled call gets no response.
+    # A call with params._meta.progressToken gets notifications/progress as it runs
+    # (train/benchmark loops: one per step, with the step's score and diff counts).
+    # (mcp_async_server: the same protocol on an asyncio loop.)
+    reg, timing = _boot(reg)
+    concurrency = _concurrency()
+
+    workers = _Workers(concurrency)
+    calls = _InFlight()
+    try:
+        while True:
+            line = _readline()
+            if line is None:
+                _eprint("[atlas.mcp] eof")
+                return 0
+            if not line:
+                continue
+
+            msg = _parse_line(line)
+            if isinstance(msg, list):
+                _serve_batch(reg, msg, timing, calls, workers)
+                continue
+            if not _is_valid(msg):
+                _write_lines([_invalid_response(msg)], batch=False)
+                continue
+            _serve(reg, msg, timing, calls, workers)
+    finally:
+        # calls still running at eof are answered before the server exits
+        workers.shutdown()
 
 
 if __name__ == "__main__":
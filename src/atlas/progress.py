@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+JSON = Dict[str, Any]
+
+# progress -> the running tool call's listener (a server's notification writer, or an
+# in-process caller's callback)
+Reporter = Callable[[JSON], None]
+
+_CURRENT: ContextVar[Optional[Reporter]] = ContextVar("atlas_progress_reporter", default=None)
+
+
+def report_progress(
+    progress: float,
+    total: Optional[float] = None,
+    *,
+    message: Optional[str] = None,
+    partial: Optional[JSON] = None,
+) -> None:
+    # One step done: progress so far (increasing), total if known, and the step's
+    # result (partial) so a listener can act before the call returns. No-op without one.
+    reporter = _CURRENT.get()
+    if reporter is None:
+        return
+    event: JSON = {"progress": progress}
+    if total is not None:
+        event["total"] = total
+    if message is not None:
+        event["message"] = message
+    if partial is not None:
+        event["partial"] = partial
+    reporter(event)
+
+
+def step_message(i: int, steps: int, entry: JSON) -> str:
+    counts = entry.get("diff_counts") or {}
+    return (
+        f"step {i}/{steps} score={entry.get('score')} "
+        f"+{counts.get('added', 0)} -{counts.get('removed', 0)} ~{counts.get('changed', 0)}"
+    )
+
+
+@contextmanager
+def reporting(reporter: Reporter) -> Iterator[None]:
+    # progress of tool calls made in the block goes to reporter
+    reset = _CURRENT.set(reporter)
+    try:
+        yield
+    finally:
+        _CURRENT.reset(reset)
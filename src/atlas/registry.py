@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import json
-from typing import Any, Callable, Dict, List
+import math
+import operator
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from .cancel import cancel_scope
 from .contract import AtlasError, ToolResult, ToolSpec
+from .result_cache import ResultCache, result_key
 
 JSON = Dict[str, Any]
 Handler = Callable[[JSON], ToolResult]
+ObjHandler = Callable[[JSON], Any]
+AsyncObjHandler = Callable[[JSON], Awaitable[Any]]
+Loader = Callable[["ToolRegistry"], Any]
 
 
 def _is_object(x: Any) -> bool:
@@ -15,6 +26,7 @@ def _is_object(x: Any) -> bool:
 
 def validate_against_schema(args: JSON, schema: JSON) -> None:
     # v0.1: minimal JSONSchema subset: type=object, properties, required, additionalProperties
+    # (top-level only; kept as the reference interpreter - the registry uses compile_schema)
     if schema.get("type") != "object":
         raise AtlasError("INVALID_ARGUMENTS", "inputSchema must be type=object")
     if not _is_object(args):
@@ -51,28 +63,432 @@ def validate_against_schema(args: JSON, schema: JSON) -> None:
             raise AtlasError("INVALID_ARGUMENTS", f"Field '{k}' must be object")
 
 
+Validator = Callable[[Any], None]
+# a compiled (sub)schema check: value, and its path in the arguments for error messages
+_Check = Callable[[Any, str], None]
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": _is_object,
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+# exact types of decoded JSON: `type(v) in ...` is the fast path, _TYPE_CHECKS the fallback
+_JSON_TYPES: Dict[str, Tuple[type, ...]] = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+    "null": (type(None),),
+}
+_KEYWORDS = (
+    "enum",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+    "minLength",
+    "maxLength",
+    "properties",
+    "required",
+    "additionalProperties",
+    "items",
+    "minItems",
+    "maxItems",
+)
+
+
+def _field(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _schema_types(schema: JSON, label: str) -> Optional[Tuple[str, ...]]:
+    # "type" as a name or a list of names (a union such as ["string", "null"])
+    t = schema.get("type")
+    if t is None:
+        return None
+    types = tuple(t) if isinstance(t, list) else (t,)
+    if not types or not all(isinstance(x, str) and x in _TYPE_CHECKS for x in types):
+        raise AtlasError("INVALID_ARGUMENTS", f"unsupported schema type for {label}: {t!r}")
+    return types
+
+
+def _type_rule(types: Tuple[str, ...]) -> Tuple[Tuple[type, ...], Callable[[Any], bool], str]:
+    # (exact types, type check, name for messages) of a type or union
+    if len(types) == 1:
+        return _JSON_TYPES[types[0]], _TYPE_CHECKS[types[0]], types[0]
+    oks = tuple(_TYPE_CHECKS[x] for x in types)
+    exact = tuple(e for x in types for e in _JSON_TYPES[x])
+    return exact, lambda v: any(ok(v) for ok in oks), " or ".join(types)
+
+
+def _type_error(t: str, path: str) -> AtlasError:
+    return AtlasError("INVALID_ARGUMENTS", f"Field '{path}' must be {t}" if path else "arguments must be an object")
+
+
+def _field_error(path: str, text: str) -> AtlasError:
+    return AtlasError("INVALID_ARGUMENTS", f"Field '{path or 'arguments'}' {text}")
+
+
+def _compile_object(schema: JSON, path: str, strict: bool) -> _Check:
+    props = schema.get("properties") or {}
+    required = tuple(schema.get("required") or ())
+    closed = schema.get("additionalProperties", True) is False
+    # property -> (exact types, type check, type name, check): properties that only
+    # declare a type are checked inline, the rest by their own check
+    rules: Dict[str, Tuple[Any, ...]] = {}
+    for k, sub in props.items():
+        sub_path = _field(path, k)
+        st = _schema_types(sub, sub_path)
+        if st is not None and not any(kw in sub for kw in _KEYWORDS):
+            rules[k] = (*_type_rule(st), None)
+        else:
+            rules[k] = (None, None, None, _compile_node(sub, sub_path))
+
+    def check_object(v: Any, at: str) -> None:
+        if type(v) is not dict and not isinstance(v, dict):
+            if strict:
+                raise _type_error("object", at)
+            return
+        for k in required:
+            if k not in v:
+                raise AtlasError("INVALID_ARGUMENTS", f"Missing required field: {_field(at, k)}")
+        # one pass over the arguments (usually fewer than the declared properties)
+        for k, x in v.items():
+            rule = rules.get(k)
+            if rule is None:
+                if closed:
+                    raise AtlasError("INVALID_ARGUMENTS", f"Unexpected field: {_field(at, k)}")
+                continue
+            exact, ok, name, sub_check = rule
+            if exact is not None and type(x) not in exact and not ok(x):
+                raise _type_error(name, _field(at, k))
+            if sub_check is not None:
+                sub_check(x, _field(at, k))
+
+    return check_object
+
+
+def _compile_array(schema: JSON, path: str, strict: bool) -> _Check:
+    items = schema.get("items") if isinstance(schema.get("items"), dict) else {}
+    item_path = f"{path or 'arguments'}[]"
+    item_types = _schema_types(items, item_path)
+    item_exact = item_check = None
+    if item_types is not None and not any(kw in items for kw in _KEYWORDS):
+        # plain item type: checked inline
+        item_exact, item_ok, item_name = _type_rule(item_types)
+    else:
+        item_check = _compile_node(items, item_path)
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+
+    def check_array(v: Any, at: str) -> None:
+        if type(v) is not list and not isinstance(v, list):
+            if strict:
+                raise _type_error("array", at)
+            return
+        label = at or "arguments"
+        if min_items is not None and len(v) < min_items:
+            raise AtlasError("INVALID_ARGUMENTS", f"Field '{label}' must have at least {min_items} items")
+        if max_items is not None and len(v) > max_items:
+            raise AtlasError("INVALID_ARGUMENTS", f"Field '{label}' must have at most {max_items} items")
+        if item_exact is not None:
+            for i, x in enumerate(v):
+                if type(x) not in item_exact and not item_ok(x):
+                    raise _type_error(item_name, f"{label}[{i}]")
+        elif item_check is not None:
+            for i, x in enumerate(v):
+                item_check(x, f"{label}[{i}]")
+
+    return check_array
+
+
+def _compile_node(schema: JSON, path: str) -> Optional[_Check]:
+    # Check for one (sub)schema, or None if it accepts anything. Supported: type (or a
+    # list of types), enum, minimum/maximum/exclusive*, minLength/maxLength, properties/
+    # required/additionalProperties, items/minItems/maxItems. Other keywords are ignored.
+    # path only names the schema in compile errors; checks get the value's path.
+    types = _schema_types(schema, path or "arguments")
+    checks: List[_Check] = []
+
+    is_object = (types is not None and "object" in types) or any(
+        k in schema for k in ("properties", "required", "additionalProperties")
+    )
+    is_array = (types is not None and "array" in types) or any(
+        k in schema for k in ("items", "minItems", "maxItems")
+    )
+    # a lone object/array type is enforced by its own check, anything else by the type check
+    if is_object:
+        checks.append(_compile_object(schema, path, types == ("object",)))
+    if is_array:
+        checks.append(_compile_array(schema, path, types == ("array",)))
+    type_rule = _type_rule(types) if types is not None and types not in (("object",), ("array",)) else None
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        allowed_text = ", ".join(json.dumps(a) for a in allowed)
+
+        def check_enum(v: Any, at: str) -> None:
+            # bool is not a number here (True == 1 in Python)
+            if not any(v == a and isinstance(v, bool) == isinstance(a, bool) for a in allowed):
+                raise _field_error(at, f"must be one of: {allowed_text}")
+
+        checks.append(check_enum)
+
+    num_limits = [
+        (fails, schema[key], sym)
+        for key, fails, sym in (
+            ("minimum", operator.lt, ">="),
+            ("exclusiveMinimum", operator.le, ">"),
+            ("maximum", operator.gt, "<="),
+            ("exclusiveMaximum", operator.ge, "<"),
+        )
+        if key in schema
+    ]
+    if type_rule is not None:
+        # type check, and numeric bounds for a numeric type, in one closure
+        exact, ok, name = type_rule
+        limits = tuple(num_limits) if types in (("number",), ("integer",)) else ()
+
+        def check_type(v: Any, at: str) -> None:
+            if type(v) not in exact and not ok(v):
+                raise _type_error(name, at)
+            for fails, bound, sym in limits:
+                if fails(v, bound):
+                    raise _field_error(at, f"must be {sym} {bound}")
+
+        checks.insert(0, check_type)
+        if limits:
+            num_limits = []
+    if num_limits:
+
+        def check_bounds(v: Any, at: str) -> None:
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                for fails, bound, sym in num_limits:
+                    if fails(v, bound):
+                        raise _field_error(at, f"must be {sym} {bound}")
+
+        checks.append(check_bounds)
+
+    len_limits = [
+        (fails, schema[key], sym)
+        for key, fails, sym in (("minLength", operator.lt, ">="), ("maxLength", operator.gt, "<="))
+        if key in schema
+    ]
+    if len_limits:
+
+        def check_length(v: Any, at: str) -> None:
+            if isinstance(v, str):
+                for fails, bound, sym in len_limits:
+                    if fails(len(v), bound):
+                        raise _field_error(at, f"length must be {sym} {bound}")
+
+        checks.append(check_length)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    steps = tuple(checks)
+
+    def check_all(v: Any, at: str) -> None:
+        for c in steps:
+            c(v, at)
+
+    return check_all
+
+
+def compile_schema(schema: JSON) -> Validator:
+    # inputSchema -> validator closure, built once at register time
+    if schema.get("type") != "object":
+        raise AtlasError("INVALID_ARGUMENTS", "inputSchema must be type=object")
+    check = _compile_node(schema, "")
+    if check is None:
+        return lambda args: None
+    return lambda args: check(args, "")
+
+
+# the tools/list fields of a spec; other keys are registry-internal
+PUBLIC_SPEC_KEYS = ("name", "description", "inputSchema")
+
+
+def _public_spec(spec: ToolSpec) -> ToolSpec:
+    return {k: spec[k] for k in PUBLIC_SPEC_KEYS if k in spec}  # type: ignore[return-value]
+
+
+def _env_timeout() -> Optional[float]:
+    raw = os.environ.get("ATLAS_TOOL_TIMEOUT", "")
+    if not raw:
+        return None
+    try:
+        t = float(raw)
+    except ValueError:
+        raise AtlasError("INVALID_REQUEST", "ATLAS_TOOL_TIMEOUT must be a number")
+    if not (0 <= t < math.inf):
+        raise AtlasError("INVALID_REQUEST", "ATLAS_TOOL_TIMEOUT must be a non-negative number")
+    return t
+
+
 class ToolRegistry:
-    def __init__(self) -> None:
+    def __init__(self, *, result_cache: Optional[ResultCache] = None) -> None:
         self._specs: Dict[str, ToolSpec] = {}
         self._handlers: Dict[str, Handler] = {}
+        self._obj_handlers: Dict[str, ObjHandler] = {}
+        self._async_handlers: Dict[str, AsyncObjHandler] = {}
+        self._validators: Dict[str, Validator] = {}
+        self._loaders: Dict[str, Loader] = {}
+        self._load_lock = threading.Lock()
+        self._tools_list_json: Optional[str] = None
+        # results of tools whose spec says "pure": True (a function of the arguments only)
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        # ATLAS_TOOL_TIMEOUT (seconds) replaces every spec's "timeout"; 0 turns them off
+        self._timeout_override = _env_timeout()
 
     def register(self, spec: ToolSpec, handler: Handler) -> None:
         name = spec["name"]
+        if name in self._loaders and spec == self._specs[name]:
+            # a declared tool's handler (its group is being loaded)
+            del self._loaders[name]
+            self._handlers[name] = handler
+            return
         if name in self._specs:
             raise AtlasError("INVALID_REQUEST", f"Tool already registered: {name}")
+        self._validators[name] = compile_schema(spec["inputSchema"])
         self._specs[name] = spec
         self._handlers[name] = handler
+        self._tools_list_json = None
+
+    def register_json(self, spec: ToolSpec, fn: ObjHandler, *, async_fn: Optional[AsyncObjHandler] = None) -> None:
+        # fn returns the result object: call_tool encodes it as a JSON text block (the
+        # MCP boundary), call_tool_obj hands it over as is. async_fn: same result as a
+        # coroutine, used by call_tool_async.
+        self.register(spec, lambda args: json_result(fn(args)))
+        self._obj_handlers[spec["name"]] = fn
+        if async_fn is not None:
+            self._async_handlers[spec["name"]] = async_fn
+
+    def declare(self, spec: ToolSpec, loader: Loader) -> None:
+        # Spec now, handler on first call: loader(self) must register() the tool (with
+        # an equal spec). Listing and argument validation never run the loader.
+        name = spec["name"]
+        if name in self._specs:
+            raise AtlasError("INVALID_REQUEST", f"Tool already registered: {name}")
+        self._validators[name] = compile_schema(spec["inputSchema"])
+        self._specs[name] = spec
+        self._loaders[name] = loader
+        self._tools_list_json = None
+
+    def _handler(self, name: str) -> Handler:
+        handler = self._handlers.get(name)
+        if handler is None:
+            with self._load_lock:
+                loader = self._loaders.get(name)
+                if loader is not None:
+                    loader(self)
+                handler = self._handlers.get(name)
+            if handler is None:
+                raise AtlasError("INTERNAL_ERROR", f"Tool has no handler after loading: {name}")
+        return handler
 
     def list_tools(self) -> List[ToolSpec]:
-        # Deterministic ordering
-        return [self._specs[k] for k in sorted(self._specs.keys())]
+        # Deterministic ordering; only the MCP fields (internal flags like "pure" stay here)
+        return [_public_spec(self._specs[k]) for k in sorted(self._specs.keys())]
 
-    def call_tool(self, name: str, arguments: JSON) -> ToolResult:
-        if name not in self._handlers:
+    def tools_list_json(self) -> str:
+        # tools/list result, encoded once per set of registered tools
+        if self._tools_list_json is None:
+            self._tools_list_json = json.dumps({"tools": self.list_tools()}, ensure_ascii=False)
+        return self._tools_list_json
+
+    def validate_arguments(self, name: str, arguments: JSON) -> None:
+        if name not in self._specs:
             raise AtlasError("TOOL_NOT_FOUND", f"Unknown tool: {name}")
-        spec = self._specs[name]
-        validate_against_schema(arguments, spec["inputSchema"])
-        return self._handlers[name](arguments)
+        self._validators[name](arguments)
+
+    def _call_pure(self, name: str, arguments: JSON, *, obj: bool) -> Any:
+        # -> result object (obj) or ToolResult; never one the cache (or another caller) holds
+        key = result_key(name, arguments)
+        hit = self.result_cache.get(key)
+        if hit is not None:
+            return result_json(hit.result) if obj else copy.deepcopy(hit.result)
+        handler = self._handler(name)
+        fn = self._obj_handlers.get(name)
+        if fn is None:
+            res = handler(arguments)
+            self.result_cache.put(key, res)
+            return result_json(res) if obj else copy.deepcopy(res)
+        value = fn(arguments)
+        res = json_result(value)
+        self.result_cache.put(key, res)
+        return value if obj else copy.deepcopy(res)
+
+    def timeout(self, name: str) -> Optional[float]:
+        # per-call time limit in seconds (spec "timeout"), None for no limit
+        t = self._timeout_override
+        if t is None:
+            t = self._specs[name].get("timeout")
+        return float(t) if t else None
+
+    def _call(self, name: str, arguments: JSON) -> ToolResult:
+        if self._specs[name].get("pure"):
+            return self._call_pure(name, arguments, obj=False)
+        return self._handler(name)(arguments)
+
+    def _call_obj(self, name: str, arguments: JSON) -> Any:
+        if self._specs[name].get("pure"):
+            return self._call_pure(name, arguments, obj=True)
+        handler = self._handler(name)
+        fn = self._obj_handlers.get(name)
+        if fn is not None:
+            return fn(arguments)
+        return result_json(handler(arguments))
+
+    def call_tool(self, name: str, arguments: JSON) -> ToolResult:
+        self.validate_arguments(name, arguments)
+        timeout = self.timeout(name)
+        if timeout is None:
+            return self._call(name, arguments)
+        # past the timeout the call's Blender child is killed and CANCELLED raised
+        with cancel_scope(timeout):
+            return self._call(name, arguments)
+
+    async def call_tool_async(self, name: str, arguments: JSON) -> ToolResult:
+        # For asyncio servers: tools with an async handler run on the event loop; the
+        # rest (and pure tools, via the result cache) run in the loop's default executor.
+        self.validate_arguments(name, arguments)
+        afn = None
+        if not self._specs[name].get("pure"):
+            self._handler(name)  # loading a lazy group registers its async handlers too
+            afn = self._async_handlers.get(name)
+        if afn is None:
+            return await asyncio.to_thread(self.call_tool, name, arguments)
+        timeout = self.timeout(name)
+        if timeout is None:
+            return json_result(await afn(arguments))
+        deadline = asyncio.timeout(timeout)
+        try:
+            async with deadline:
+                return json_result(await afn(arguments))
+        except TimeoutError:
+            if not deadline.expired():
+                raise
+            data = {"reason": "timeout", "timeout": timeout}
+            raise AtlasError("CANCELLED", f"Tool call timed out after {timeout:g}s", data=data)
+
+    def call_tool_obj(self, name: str, arguments: JSON) -> Any:
+        # In-process callers: the result object, without a json.dumps/json.loads round
+        # trip. Tools registered with plain register() fall back to decoding their text.
+        self.validate_arguments(name, arguments)
+        timeout = self.timeout(name)
+        if timeout is None:
+            return self._call_obj(name, arguments)
+        with cancel_scope(timeout):
+            return self._call_obj(name, arguments)
 
 
 def text_result(text: str) -> ToolResult:
@@ -81,3 +497,15 @@ def text_result(text: str) -> ToolResult:
 
 def json_result(obj: Any) -> ToolResult:
     return {"content": [{"type": "text", "text": json.dumps(obj, ensure_ascii=False)}]}
+
+
+def result_json(res: ToolResult) -> Any:
+    # inverse of json_result
+    try:
+        txt = res["content"][0]["text"]
+    except Exception as e:
+        raise AtlasError("INTERNAL_ERROR", f"Invalid ToolResult content: {e}")
+    try:
+        return json.loads(txt)
+    except ValueError as e:
+        raise AtlasError("INTERNAL_ERROR", f"Tool result is not JSON: {e}")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .contract import ToolResult
+from .snapshot_diff_v2 import canon
+
+JSON = Dict[str, Any]
+
+ResultKey = Tuple[str, bytes]
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    result: ToolResult
+    size: int  # bytes of result text
+
+
+def result_key(name: str, arguments: JSON) -> ResultKey:
+    # canonical JSON of the arguments, hashed: equal arguments give equal keys
+    # regardless of key order
+    return name, hashlib.blake2b(canon(arguments).encode("utf-8"), digest_size=16).digest()
+
+
+def _result_size(result: ToolResult) -> int:
+    return sum(len(block.get("text", "")) for block in result.get("content") or [])
+
+
+class ResultCache:
+    # LRU of pure tools' results, bounded by the total size of their text. Only the
+    # text is kept: callers get copies or freshly decoded objects, never a shared one.
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("ATLAS_RESULT_CACHE_BYTES", str(64 << 20)) or 0)
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[ResultKey, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: ResultKey) -> Optional[CachedResult]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hit
+
+    def put(self, key: ResultKey, result: ToolResult) -> CachedResult:
+        entry = CachedResult(result=result, size=_result_size(result))
+        if entry.size > self.max_bytes:
+            return entry  # would evict everything else (or the cache is off)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self._bytes -= dropped.size
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> JSON:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
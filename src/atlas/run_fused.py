@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+from .blender_backend import run_blender_script, script_failure
+from .contract import AtlasError, ToolResult
+from .registry import ToolRegistry, json_result
+from .tools_blender import blender_action_script
+
+JSON = Dict[str, Any]
+
+FUSED_STEP_SCRIPT = Path("tools/blender_step_v1.py")
+
+SnapshotVersion = Literal["v1", "v2"]
+
+
+@dataclass(frozen=True)
+class FusedAction:
+    script: Path
+    argv: List[str]
+
+
+@dataclass(frozen=True)
+class FusedStepResult:
+    before: JSON
+    after: JSON
+    action_ok: bool
+    action_result: Optional[ToolResult]
+    action_error: Optional[JSON]
+
+
+def plan_fused_action(
+    reg: ToolRegistry,
+    action_tool: str,
+    action_args: JSON,
+    workspace_blend_path: Path,
+) -> Optional[FusedAction]:
+    # None -> the caller runs the regular snapshot/action/snapshot launches
+    entry = blender_action_script(action_tool)
+    if entry is None:
+        return None
+    bp = action_args.get("blend_path")
+    if bp and Path(bp).resolve() != workspace_blend_path:
+        return None
+    script, build_argv = entry
+    try:
+        reg.validate_arguments(action_tool, action_args)
+        argv = build_argv(action_args)
+    except AtlasError:
+        # the regular path logs the exact validation error
+        return None
+    return FusedAction(script=script, argv=argv)
+
+
+def run_fused_step(
+    action: FusedAction,
+    *,
+    snapshot: SnapshotVersion,
+    workspace_blend_path: Path,
+    before_path: Path,
+    after_path: Path,
+    before: Optional[JSON] = None,
+) -> FusedStepResult:
+    # One Blender session: open -> snapshot -> action -> snapshot -> save.
+    # A known `before` (snapshot cache hit) skips the first snapshot.
+    args = ["--snapshot", snapshot]
+    if before is None:
+        args += ["--before-out", str(before_path.resolve())]
+    else:
+        args += ["--skip-before"]
+    args += [
+        "--after-out", str(after_path.resolve()),
+        "--action-script", str(action.script.resolve()),
+        "--action-argv", json.dumps(action.argv, ensure_ascii=False),
+    ]
+    res = run_blender_script(FUSED_STEP_SCRIPT, extra_args=args, blend_path=workspace_blend_path, mutates=True)
+    if before is None:
+        before = res["before"]
+    act = res.get("action") or {}
+    if act.get("ok"):
+        return FusedStepResult(before, res["after"], True, json_result(act.get("result")), None)
+    # the error the action's own run_blender_script call would have raised
+    err = script_failure(act.get("error"))
+    return FusedStepResult(before, res["after"], False, None, {"code": err.code, "message": err.message, "data": err.data})
@@ -4,10 +4,15 @@ import uuid
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-from .contract import AtlasError, ToolResult
-from .log_jsonl import JsonlLogger
+from .cancel import check_cancelled
+from .contract import AtlasError
+from .log_jsonl import JsonlLogger, snapshot_ref, step_logger
+from .log_segments import SegmentedLogStore
 from .registry import ToolRegistry
+from .run_fused import plan_fused_action, run_fused_step
+from .snapshot_cache import SnapshotCache
 from .snapshot_diff_v2 import diff_snapshot_v2
+from .snapshot_store import SnapshotStore
 from .scoring import score_from_diff_v2
 
 JSON = Dict[str, Any]
@@ -17,15 +22,6 @@ def _default_run_id() -> str:
     return uuid.uuid4().hex[:12]
 
 
-def _extract_json_text(res: ToolResult) -> JSON:
-    try:
-        txt = res["content"][0]["text"]
-    except Exception as e:
-        raise AtlasError("INTERNAL_ERROR", f"Invalid ToolResult content: {e}")
-    import json
-    return json.loads(txt)
-
-
 def run_step_v2(
     reg: ToolRegistry,
     *,
@@ -34,7 +30,14 @@ def run_step_v2(
     snapshot_out_dir: Path,
     run_id: Optional[str] = None,
     workspace_blend_path: Optional[Path] = None,
+    fused: bool = False,
+    snapshot_cache: Optional[SnapshotCache] = None,
+    snapshot_store: Optional[SnapshotStore] = None,
+    snapshot_refs: bool = False,
+    log_store: Optional[SegmentedLogStore] = None,
+    logger: Optional[JsonlLogger] = None,
 ) -> JSON:
+    check_cancelled()  # step boundary
     run_id = run_id or _default_run_id()
     snapshot_out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -43,64 +46,129 @@ def run_step_v2(
         workspace_blend_path = snapshot_out_dir / f"{run_id}.workspace.blend"
     workspace_blend_path = workspace_blend_path.resolve()
 
-    if not workspace_blend_path.exists():
-        reg.call_tool("atlas.blender.init_empty_v1", {"blend_path": str(workspace_blend_path)})
-
-    log_path = Path("out") / "runs" / f"{run_id}.jsonl"
-    logger = JsonlLogger(log_path, run_id)
-
-    # snapshot_before (v2)
-    before_path = snapshot_out_dir / f"{run_id}.before.v2.json"
-    snap_before = reg.call_tool(
-        "atlas.blender.snapshot_v2",
-        {"out_path": str(before_path), "blend_path": str(workspace_blend_path)},
-    )
-    before = _extract_json_text(snap_before)
-    logger.write("snapshot_before_v2", {"path": str(before_path), "blend_path": str(workspace_blend_path), "snapshot": before})
-
-    # action
     aargs = dict(action_args or {})
     if action_tool.startswith("atlas.blender.") and "blend_path" not in aargs:
         aargs["blend_path"] = str(workspace_blend_path)
 
-    try:
-        action_res = reg.call_tool(action_tool, aargs)
-        action_ok = True
-        action_err = None
-        action_payload = {"tool": action_tool, "args": aargs, "result": action_res}
-    except AtlasError as e:
-        action_ok = False
-        action_err = {"code": e.code, "message": e.message, "data": e.data}
-        action_payload = {"tool": action_tool, "args": aargs}
-
-    logger.write("action", action_payload, ok=action_ok, error=action_err)
-
-    # snapshot_after (v2)
-    after_path = snapshot_out_dir / f"{run_id}.after.v2.json"
-    snap_after = reg.call_tool(
-        "atlas.blender.snapshot_v2",
-        {"out_path": str(after_path), "blend_path": str(workspace_blend_path)},
-    )
-    after = _extract_json_text(snap_after)
-    logger.write("snapshot_after_v2", {"path": str(after_path), "blend_path": str(workspace_blend_path), "snapshot": after})
-
-    # diff v2 + score
-    d = diff_snapshot_v2(before, after)
-    logger.write("diff_v2", d)
-
-    score = score_from_diff_v2(d)
-    logger.write("score_v2", {"score": score})
-
-    return {
-        "schema": "atlas.run.step.v2",
-        "run_id": run_id,
-        "action": {"tool": action_tool, "args": aargs, "ok": action_ok, "error": action_err},
-        "paths": {
-            "log": str(log_path),
-            "before": str(before_path),
-            "after": str(after_path),
-            "workspace_blend": str(workspace_blend_path),
-        },
-        "diff": d,
-        "score": float(score),
-    }
+    # fused: one Blender session for snapshot/action/snapshot (same events, files and result)
+    plan = plan_fused_action(reg, action_tool, aargs, workspace_blend_path) if fused else None
+
+    if plan is None and not workspace_blend_path.exists():
+        reg.call_tool("atlas.blender.init_empty_v1", {"blend_path": str(workspace_blend_path)})
+
+    # log_store: events go to the shared segmented log instead of a file per run_id
+    # logger: a loop's logger, kept open across its steps (still one file per run_id)
+    log_path = log_store.root if log_store is not None else Path("out") / "runs" / f"{run_id}.jsonl"
+    with log_store.logger(run_id) if log_store is not None else step_logger(log_path, run_id, logger) as logger:
+
+        # snapshot_before (v2)
+        before_path = snapshot_out_dir / f"{run_id}.before.v2.json"
+        after_path = snapshot_out_dir / f"{run_id}.after.v2.json"
+        # snapshot_cache: the previous step's after-snapshot stands in while the workspace is unchanged
+        cached = snapshot_cache.get("v2", workspace_blend_path) if snapshot_cache is not None else None
+        if cached is not None:
+            before_path = cached.path
+        fused_res = None
+        if plan is not None:
+            fused_res = run_fused_step(
+                plan,
+                snapshot="v2",
+                workspace_blend_path=workspace_blend_path,
+                before_path=before_path,
+                after_path=after_path,
+                before=cached.snapshot if cached is not None else None,
+            )
+            before = fused_res.before
+        elif cached is not None:
+            before = cached.snapshot
+        else:
+            before = reg.call_tool_obj(
+                "atlas.blender.snapshot_v2",
+                {"out_path": str(before_path), "blend_path": str(workspace_blend_path)},
+            )
+        # snapshot_store: keep snapshots once, by fingerprint, instead of per-step files
+        fingerprints: JSON = {}
+        if snapshot_store is not None:
+            fingerprints["before"] = snapshot_store.put(before)
+            if cached is None:
+                before_path.unlink(missing_ok=True)
+            before_path = snapshot_store.path(fingerprints["before"])
+        # snapshot_refs: events point at the snapshot file instead of embedding it
+        before_payload: JSON = {"path": str(before_path), "blend_path": str(workspace_blend_path)}
+        if snapshot_refs:
+            before_payload.update(snapshot_ref(before_path, before, fingerprints.get("before")))
+        else:
+            before_payload["snapshot"] = before
+        if snapshot_cache is not None:
+            before_payload["cache_hit"] = cached is not None
+        if snapshot_store is not None:
+            before_payload["fingerprint"] = fingerprints["before"]
+        logger.write("snapshot_before_v2", before_payload)
+
+        # action
+        if fused_res is not None:
+            action_ok = fused_res.action_ok
+            action_err = fused_res.action_error
+            if action_ok:
+                action_payload = {"tool": action_tool, "args": aargs, "result": fused_res.action_result}
+            else:
+                action_payload = {"tool": action_tool, "args": aargs}
+        else:
+            try:
+                action_res = reg.call_tool(action_tool, aargs)
+                action_ok = True
+                action_err = None
+                action_payload = {"tool": action_tool, "args": aargs, "result": action_res}
+            except AtlasError as e:
+                action_ok = False
+                action_err = {"code": e.code, "message": e.message, "data": e.data}
+                action_payload = {"tool": action_tool, "args": aargs}
+
+        logger.write("action", action_payload, ok=action_ok, error=action_err)
+
+        # snapshot_after (v2)
+        if fused_res is not None:
+            after = fused_res.after
+        else:
+            after = reg.call_tool_obj(
+                "atlas.blender.snapshot_v2",
+                {"out_path": str(after_path), "blend_path": str(workspace_blend_path)},
+            )
+        if snapshot_store is not None:
+            fingerprints["after"] = snapshot_store.put(after)
+            after_path.unlink(missing_ok=True)
+            after_path = snapshot_store.path(fingerprints["after"])
+        after_payload: JSON = {"path": str(after_path), "blend_path": str(workspace_blend_path)}
+        if snapshot_refs:
+            after_payload.update(snapshot_ref(after_path, after, fingerprints.get("after")))
+        else:
+            after_payload["snapshot"] = after
+        if snapshot_store is not None:
+            after_payload["fingerprint"] = fingerprints["after"]
+        logger.write("snapshot_after_v2", after_payload)
+        if snapshot_cache is not None:
+            snapshot_cache.put("v2", workspace_blend_path, after, after_path)
+
+        # diff v2 + score
+        d = diff_snapshot_v2(before, after)
+        logger.write("diff_v2", d)
+
+        score = score_from_diff_v2(d)
+        logger.write("score_v2", {"score": score})
+
+        out: JSON = {
+            "schema": "atlas.run.step.v2",
+            "run_id": run_id,
+            "action": {"tool": action_tool, "args": aargs, "ok": action_ok, "error": action_err},
+            "paths": {
+                "log": str(log_path),
+                "before": str(before_path),
+                "after": str(after_path),
+                "workspace_blend": str(workspace_blend_path),
+            },
+            "diff": d,
+            "score": float(score),
+        }
+        if snapshot_store is not None:
+            out["snapshots"] = fingerprints
+        return out
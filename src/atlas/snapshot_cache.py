@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .blender_backend import workspace_generation
+
+JSON = Dict[str, Any]
+
+WorkspaceKey = Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class CachedSnapshot:
+    snapshot: JSON
+    path: Path  # snapshot file already on disk (the previous step's after-snapshot)
+
+
+def workspace_identity(blend_path: Path, *, hash_contents: bool = False) -> Optional[WorkspaceKey]:
+    # (path, size, mtime_ns[, blake2b]) of the .blend plus the backend's mutation
+    # generation: a resident worker defers saves, so the file alone can be stale.
+    p = blend_path.resolve()
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    key: WorkspaceKey = (str(p), st.st_size, st.st_mtime_ns, workspace_generation(p))
+    if hash_contents:
+        h = hashlib.blake2b(digest_size=16)
+        with p.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        key += (h.hexdigest(),)
+    return key
+
+
+class SnapshotCache:
+    # Last known snapshot per (workspace identity, snapshot version). run_step stores its
+    # after-snapshot here; the next step on an unchanged workspace reuses it as "before".
+
+    def __init__(self, max_entries: int = 16, *, hash_contents: bool = False) -> None:
+        self.max_entries = int(max_entries)
+        self.hash_contents = bool(hash_contents)
+        self._entries: "OrderedDict[Tuple[str, WorkspaceKey], CachedSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()  # shared by concurrent tool calls (mcp_stdio_server)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: str, blend_path: Path) -> Optional[CachedSnapshot]:
+        key = workspace_identity(blend_path, hash_contents=self.hash_contents)
+        with self._lock:
+            hit = self._entries.get((version, key)) if key is not None else None
+            if hit is None or not hit.path.exists():
+                self.misses += 1
+                return None
+            self._entries.move_to_end((version, key))
+            self.hits += 1
+            return hit
+
+    def put(self, version: str, blend_path: Path, snapshot: JSON, path: Path) -> None:
+        key = workspace_identity(blend_path, hash_contents=self.hash_contents)
+        if key is None:
+            return
+        with self._lock:
+            # one live entry per workspace: older identities can never match again
+            for k in [k for k in self._entries if k[0] == version and k[1][0] == key[0]]:
+                del self._entries[k]
+            self._entries[(version, key)] = CachedSnapshot(snapshot=snapshot, path=path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> JSON:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_DEFAULT_CACHE = SnapshotCache()
+
+
+def default_snapshot_cache() -> SnapshotCache:
+    # Process-wide cache shared by run.step_* tool calls that opt in.
+    return _DEFAULT_CACHE
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .contract import AtlasError
+from .snapshot_diff_v2 import fingerprint
+
+JSON = Dict[str, Any]
+
+PathLike = Union[str, Path]
+
+MANIFEST_SCHEMA = "atlas.snapshot.manifest.v1"
+
+
+def _dumps(obj: Any) -> str:
+    # same text as the snapshot scripts' --out files
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True)
+
+
+class SnapshotStore:
+    # Content-addressed snapshots, keyed by snapshot_diff_v2.fingerprint:
+    #   <root>/snapshots/<fp[:2]>/<fp>.json   whole snapshot (chunked=False)
+    #   <root>/manifests/<fp[:2]>/<fp>.json   {meta, object hashes} (chunked=True)
+    #   <root>/objects/<h[:2]>/<h>.json       one object, shared by every manifest using it
+    # Identical content is written once; writes are atomic (tmp file + os.replace).
+
+    def __init__(self, root: PathLike, *, chunked: bool = False) -> None:
+        self.root = Path(root).resolve()
+        self.chunked = bool(chunked)
+        self.written = 0
+        self.deduped = 0
+
+    def _blob(self, kind: str, h: str) -> Path:
+        return self.root / kind / h[:2] / f"{h}.json"
+
+    def _write(self, path: Path, text: str) -> None:
+        if path.exists():
+            self.deduped += 1
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        self.written += 1
+
+    def put(self, snap: JSON) -> str:
+        fp = fingerprint(snap)
+        objs = snap.get("objects") if isinstance(snap, dict) else None
+        if not self.chunked or not isinstance(objs, list):
+            self._write(self._blob("snapshots", fp), _dumps(snap))
+            return fp
+        if self._blob("manifests", fp).exists():
+            self.deduped += 1
+            return fp
+        hashes: List[str] = []
+        for o in objs:
+            h = fingerprint(o)
+            self._write(self._blob("objects", h), _dumps(o))
+            hashes.append(h)
+        manifest = {
+            "schema": MANIFEST_SCHEMA,
+            "fingerprint": fp,
+            "meta": {k: v for k, v in snap.items() if k != "objects"},
+            "objects": hashes,
+        }
+        self._write(self._blob("manifests", fp), _dumps(manifest))
+        return fp
+
+    def locate(self, fp: str) -> Optional[Path]:
+        # file that stands for the snapshot (whole snapshot or its manifest)
+        for kind in ("snapshots", "manifests"):
+            p = self._blob(kind, fp)
+            if p.exists():
+                return p
+        return None
+
+    def path(self, fp: str) -> Path:
+        p = self.locate(fp)
+        if p is None:
+            raise AtlasError("INVALID_ARGUMENTS", f"snapshot not in store: {fp}")
+        return p
+
+    def has(self, fp: str) -> bool:
+        return self.locate(fp) is not None
+
+    def get(self, fp: str, *, verify: bool = False) -> JSON:
+        p = self.path(fp)
+        data = json.loads(p.read_text(encoding="utf-8"))
+        if p.parent.parent.name == "manifests":
+            snap = dict(data["meta"])
+            snap["objects"] = [
+                json.loads(self._blob("objects", h).read_text(encoding="utf-8")) for h in data["objects"]
+            ]
+            data = snap
+        if verify and fingerprint(data) != fp:
+            raise AtlasError("INTERNAL_ERROR", f"snapshot store entry is corrupt: {fp}", data={"path": str(p)})
+        return data
+
+    def stats(self) -> JSON:
+        out: JSON = {"root": str(self.root), "chunked": self.chunked, "written": self.written, "deduped": self.deduped}
+        for kind in ("snapshots", "manifests", "objects"):
+            d = self.root / kind
+            files = [p for p in d.glob("*/*.json")] if d.exists() else []
+            out[kind] = {"files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+        return out
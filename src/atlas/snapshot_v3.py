@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .contract import AtlasError
+from .snapshot_diff_v2 import fingerprint, obj_fingerprint_v2
+
+JSON = Dict[str, Any]
+
+# atlas.snapshot.v3: columnar binary encoding of an atlas.snapshot.v2 document.
+#
+#   b"ATLSNAP3" | u32 header length | JSON header | pad to 8 | column data
+#
+# The header keeps everything but the objects ("meta"), the v2 fingerprint and the
+# column table {name: [offset, nbytes, typecode]} (offsets from the data start,
+# little-endian, 8-byte aligned). Objects that don't fit the columns exactly (extra
+# keys, ints where floats belong, ...) are kept verbatim in header["exceptions"], so
+# decoding always gives back the same v2 document.
+MAGIC = b"ATLSNAP3"
+SCHEMA = "atlas.snapshot.v3"
+
+FIELDS = (
+    "name", "type", "parent",
+    "location", "rotation_euler", "scale",
+    "hide_viewport", "hide_render",
+    "collections", "materials",
+    "bbox_world", "mesh_stats",
+)
+DIFF_FIELDS = FIELDS[1:]  # same order as diff_snapshot_v2
+MESH_KEYS = ("verts", "edges", "faces")
+
+# flag bits
+HIDE_VIEWPORT = 1
+HIDE_RENDER = 2
+HAS_BBOX = 4
+HAS_MESH = 8
+
+_INT64 = 1 << 63
+
+# json.loads maps every NaN to this one object, so v2 lists holding NaN compare equal
+# by identity; decoded v3 objects share it to diff the same way.
+_NAN = json.loads("NaN")
+
+PathLike = Union[str, Path]
+
+
+def _is_vec3(v: Any) -> bool:
+    return isinstance(v, list) and len(v) == 3 and all(type(x) is float for x in v)
+
+
+def _is_strs(v: Any) -> bool:
+    return isinstance(v, list) and all(isinstance(x, str) for x in v)
+
+
+def _columnar(o: Any) -> bool:
+    # True if the object round-trips exactly through the fixed columns
+    if not isinstance(o, dict) or set(o) != set(FIELDS):
+        return False
+    if not isinstance(o["name"], str) or not o["name"]:
+        return False
+    if not all(o[k] is None or isinstance(o[k], str) for k in ("type", "parent")):
+        return False
+    if not all(_is_vec3(o[k]) for k in ("location", "rotation_euler", "scale")):
+        return False
+    if not all(type(o[k]) is bool for k in ("hide_viewport", "hide_render")):
+        return False
+    if not (_is_strs(o["collections"]) and _is_strs(o["materials"])):
+        return False
+    bb = o["bbox_world"]
+    if bb is not None and not (isinstance(bb, dict) and set(bb) == {"min", "max"} and _is_vec3(bb["min"]) and _is_vec3(bb["max"])):
+        return False
+    ms = o["mesh_stats"]
+    if ms is not None:
+        if not (isinstance(ms, dict) and set(ms) == set(MESH_KEYS)):
+            return False
+        if not all(type(ms[k]) is int and -_INT64 <= ms[k] < _INT64 for k in MESH_KEYS):
+            return False
+    return True
+
+
+def _le(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def encode_snapshot_v3(snap: JSON) -> bytes:
+    if not isinstance(snap, dict):
+        raise AtlasError("INVALID_ARGUMENTS", "snapshot must be an object")
+    objs = snap.get("objects")
+    meta = {k: v for k, v in snap.items() if k != "objects"}
+    header: JSON = {
+        "schema": SCHEMA,
+        "byteorder": "little",
+        "fingerprint": fingerprint(snap),
+        "meta": meta,
+        "has_objects": "objects" in snap,
+    }
+    if "objects" in snap and not isinstance(objs, list):
+        # not a v2 object list: keep it whole
+        header["raw_objects"] = objs
+    if not isinstance(objs, list):
+        objs = []
+
+    strings: Dict[str, int] = {}
+
+    def sid(s: str) -> int:
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    n = len(objs)
+    name = array("I", [0]) * n
+    typ = array("i", [-1]) * n
+    parent = array("i", [-1]) * n
+    loc = array("d", [0.0]) * (3 * n)
+    rot = array("d", [0.0]) * (3 * n)
+    scl = array("d", [0.0]) * (3 * n)
+    bbox = array("d", [0.0]) * (6 * n)
+    mesh = array("q", [0]) * (3 * n)
+    flags = array("B", [0]) * n
+    cols_off = array("I", [0])
+    cols = array("I")
+    mats_off = array("I", [0])
+    mats = array("I")
+    exceptions: Dict[str, Any] = {}
+
+    for i, o in enumerate(objs):
+        if not _columnar(o):
+            exceptions[str(i)] = o
+            cols_off.append(len(cols))
+            mats_off.append(len(mats))
+            continue
+        name[i] = sid(o["name"])
+        if o["type"] is not None:
+            typ[i] = sid(o["type"])
+        if o["parent"] is not None:
+            parent[i] = sid(o["parent"])
+        loc[3 * i : 3 * i + 3] = array("d", o["location"])
+        rot[3 * i : 3 * i + 3] = array("d", o["rotation_euler"])
+        scl[3 * i : 3 * i + 3] = array("d", o["scale"])
+        f = (HIDE_VIEWPORT if o["hide_viewport"] else 0) | (HIDE_RENDER if o["hide_render"] else 0)
+        if o["bbox_world"] is not None:
+            f |= HAS_BBOX
+            bbox[6 * i : 6 * i + 6] = array("d", o["bbox_world"]["min"] + o["bbox_world"]["max"])
+        if o["mesh_stats"] is not None:
+            f |= HAS_MESH
+            mesh[3 * i : 3 * i + 3] = array("q", [o["mesh_stats"][k] for k in MESH_KEYS])
+        flags[i] = f
+        cols.extend(sid(s) for s in o["collections"])
+        cols_off.append(len(cols))
+        mats.extend(sid(s) for s in o["materials"])
+        mats_off.append(len(mats))
+
+    blob = bytearray()
+    str_off = array("I", [0])
+    for s in strings:
+        blob += s.encode("utf-8")
+        str_off.append(len(blob))
+
+    columns = {
+        "name": name, "type": typ, "parent": parent,
+        "location": loc, "rotation_euler": rot, "scale": scl,
+        "flags": flags, "bbox": bbox, "mesh": mesh,
+        "collections_off": cols_off, "collections": cols,
+        "materials_off": mats_off, "materials": mats,
+        "strings_off": str_off,
+    }
+    data = bytearray()
+    table: Dict[str, List[Any]] = {}
+    for key, col in columns.items():
+        raw = _le(col)
+        table[key] = [len(data), len(raw), col.typecode]
+        data += raw + b"\0" * (-len(raw) % 8)
+    table["strings"] = [len(data), len(blob), "B"]
+    data += blob
+
+    header.update({"count": n, "strings": len(strings), "exceptions": exceptions, "columns": table})
+    hdr = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    head = MAGIC + struct.pack("<I", len(hdr)) + hdr
+    return head + b"\0" * (-len(head) % 8) + bytes(data)
+
+
+def write_snapshot_v3(snap: JSON, path: PathLike) -> int:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    data = encode_snapshot_v3(snap)
+    p.write_bytes(data)
+    return len(data)
+
+
+def is_snapshot_v3(path: PathLike) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotV3:
+    # Read-only view over an encoded snapshot; columns are memoryviews into the
+    # (memory-mapped) buffer and objects are only built on demand.
+
+    def __init__(self, buf: Any, *, _mm: Optional[mmap.mmap] = None) -> None:
+        self._mm = _mm
+        self._buf = memoryview(buf)
+        if bytes(self._buf[: len(MAGIC)]) != MAGIC:
+            raise AtlasError("INVALID_ARGUMENTS", "not an atlas.snapshot.v3 file")
+        (hlen,) = struct.unpack_from("<I", self._buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header: JSON = json.loads(bytes(self._buf[start : start + hlen]).decode("utf-8"))
+        if self.header.get("schema") != SCHEMA:
+            raise AtlasError("INVALID_ARGUMENTS", f"unsupported snapshot schema: {self.header.get('schema')}")
+        self._data = start + hlen + (-(start + hlen) % 8)
+        self.count: int = int(self.header["count"])
+        self.fingerprint: str = self.header["fingerprint"]
+        self.meta: JSON = self.header["meta"]
+        self.exceptions: Dict[int, Any] = {int(k): v for k, v in (self.header.get("exceptions") or {}).items()}
+        self._cols: Dict[str, Any] = {}
+        self._strs: Dict[int, str] = {}
+        self._names: Optional[List[Optional[str]]] = None
+
+    @classmethod
+    def open(cls, path: PathLike) -> "SnapshotV3":
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, _mm=mm)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SnapshotV3":
+        return cls(data)
+
+    def close(self) -> None:
+        self._cols.clear()
+        self._buf.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self) -> "SnapshotV3":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def raw(self, key: str) -> memoryview:
+        off, nbytes, _ = self.header["columns"][key]
+        return self._buf[self._data + off : self._data + off + nbytes]
+
+    def column(self, key: str) -> Any:
+        col = self._cols.get(key)
+        if col is None:
+            typecode = self.header["columns"][key][2]
+            raw = self.raw(key)
+            if sys.byteorder == "little":
+                col = raw.cast(typecode)
+            else:
+                col = array(typecode, raw.tobytes())
+                col.byteswap()
+            self._cols[key] = col
+        return col
+
+    def string(self, i: int) -> str:
+        s = self._strs.get(i)
+        if s is None:
+            off = self.column("strings_off")
+            s = self._strs[i] = bytes(self.raw("strings")[off[i] : off[i + 1]]).decode("utf-8")
+        return s
+
+    def _opt_string(self, i: int) -> Optional[str]:
+        return None if i < 0 else self.string(i)
+
+    def _strings(self, key: str, row: int) -> List[str]:
+        off = self.column(key + "_off")
+        ids = self.column(key)
+        return [self.string(ids[k]) for k in range(off[row], off[row + 1])]
+
+    def is_exception(self, row: int) -> bool:
+        return row in self.exceptions
+
+    def names(self) -> List[Optional[str]]:
+        # per row: the object name diff_snapshot_v2 would index it by (None = not indexed)
+        if self._names is None:
+            blob = bytes(self.raw("strings"))
+            off = self.column("strings_off")
+            col = self.column("name")
+            out: List[Optional[str]] = [blob[off[k] : off[k + 1]].decode("utf-8") for k in col] if len(off) > 1 else [None] * self.count
+            for i, o in self.exceptions.items():
+                out[i] = (o.get("name") or None) if isinstance(o, dict) else None
+            self._names = out
+        return self._names
+
+    def object(self, row: int) -> Any:
+        if row in self.exceptions:
+            return self.exceptions[row]
+        flags = self.column("flags")[row]
+
+        def vec(key: str, k: int = 3) -> List[float]:
+            return [_NAN if x != x else x for x in self.column(key)[k * row : k * row + k]]
+
+        bbox = None
+        if flags & HAS_BBOX:
+            b = vec("bbox", 6)
+            bbox = {"min": b[:3], "max": b[3:]}
+        mesh = None
+        if flags & HAS_MESH:
+            mesh = dict(zip(MESH_KEYS, vec("mesh"), strict=True))
+        return {
+            "name": self.string(self.column("name")[row]),
+            "type": self._opt_string(self.column("type")[row]),
+            "parent": self._opt_string(self.column("parent")[row]),
+            "location": vec("location"),
+            "rotation_euler": vec("rotation_euler"),
+            "scale": vec("scale"),
+            "hide_viewport": bool(flags & HIDE_VIEWPORT),
+            "hide_render": bool(flags & HIDE_RENDER),
+            "collections": self._strings("collections", row),
+            "materials": self._strings("materials", row),
+            "bbox_world": bbox,
+            "mesh_stats": mesh,
+        }
+
+    def objects(self) -> Iterator[Any]:
+        for i in range(self.count):
+            yield self.object(i)
+
+    def to_v2(self) -> JSON:
+        out = dict(self.meta)
+        if "raw_objects" in self.header:
+            out["objects"] = self.header["raw_objects"]
+        elif self.header.get("has_objects", True):
+            out["objects"] = list(self.objects())
+        return out
+
+
+def load_snapshot(path: PathLike) -> JSON:
+    # v2 document from either a .json (v2) or an atlas.snapshot.v3 file
+    if is_snapshot_v3(path):
+        with SnapshotV3.open(path) as snap:
+            return snap.to_v2()
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def snapshot_v2_to_v3(src: PathLike, dst: PathLike) -> int:
+    return write_snapshot_v3(json.loads(Path(src).read_text(encoding="utf-8")), dst)
+
+
+def snapshot_v3_to_v2(src: PathLike, dst: PathLike) -> None:
+    # same bytes as tools/blender_snapshot_v2.py --out
+    p = Path(dst)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(load_snapshot(src), ensure_ascii=False, sort_keys=True), encoding="utf-8")
+
+
+def _name_index(s: SnapshotV3) -> Dict[str, int]:
+    # last row wins on duplicate names, like diff_snapshot_v2's dict
+    return {n: i for i, n in enumerate(s.names()) if n}
+
+
+_FIXED = (("flags", 1), ("location", 24), ("rotation_euler", 24), ("scale", 24), ("bbox", 48), ("mesh", 24))
+
+
+def _ids_equal(av: Any, bv: Any, smap: Dict[int, int]) -> bool:
+    return len(av) == len(bv) and [smap.get(x, -1) if x >= 0 else x for x in av] == list(bv)
+
+
+def _run_equal(a: SnapshotV3, i: int, b: SnapshotV3, j: int, k: int, smap: Dict[int, int]) -> bool:
+    # Rows a[i:i+k] vs b[j:j+k], whole column slices at a time. Conservative: False means
+    # "maybe different" (identical bytes are equal values, NaN included; -0.0 vs 0.0 is not).
+    for key, w in _FIXED:
+        if a.raw(key)[w * i : w * (i + k)] != b.raw(key)[w * j : w * (j + k)]:
+            return False
+    for key in ("type", "parent"):
+        if not _ids_equal(a.column(key)[i : i + k], b.column(key)[j : j + k], smap):
+            return False
+    for key in ("collections", "materials"):
+        ao, bo = a.column(key + "_off"), b.column(key + "_off")
+        if [x - ao[i] for x in ao[i : i + k + 1]] != [x - bo[j] for x in bo[j : j + k + 1]]:
+            return False
+        if not _ids_equal(a.column(key)[ao[i] : ao[i + k]], b.column(key)[bo[j] : bo[j + k]], smap):
+            return False
+    return True
+
+
+def _runs(pairs: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, int]]:
+    # (i, j) row pairs -> maximal (i, j, length) runs of consecutive rows on both sides
+    start = 0
+    for n in range(1, len(pairs) + 1):
+        if n == len(pairs) or pairs[n] != (pairs[n - 1][0] + 1, pairs[n - 1][1] + 1):
+            yield pairs[start][0], pairs[start][1], n - start
+            start = n
+
+
+def diff_snapshot_v3(a: SnapshotV3, b: SnapshotV3) -> JSON:
+    # Same result as diff_snapshot_v2(a.to_v2(), b.to_v2()). Snapshots are sorted by name,
+    # so common objects line up in long runs that are compared column-slice at a time;
+    # only runs that differ are bisected, and only differing rows become dicts.
+    a_idx = _name_index(a)
+    b_idx = _name_index(b)
+
+    added = sorted([n for n in b_idx.keys() if n not in a_idx])
+    removed = sorted([n for n in a_idx.keys() if n not in b_idx])
+    common = sorted(set(a_idx.keys()) & set(b_idx.keys()))
+
+    # a string id -> b string id
+    b_ids: Dict[str, int] = {b.string(k): k for k in range(int(b.header["strings"]))}
+    smap = {k: b_ids.get(a.string(k), -1) for k in range(int(a.header["strings"]))}
+
+    exc = bool(a.exceptions or b.exceptions)
+    maybe: Set[str] = set()
+    rows = {(a_idx[n], b_idx[n]): n for n in common}
+    todo = list(_runs(sorted(rows)))
+    while todo:
+        i, j, k = todo.pop()
+        plain = not exc or not any(a.is_exception(i + x) or b.is_exception(j + x) for x in range(k))
+        if plain and _run_equal(a, i, b, j, k, smap):
+            continue
+        if k == 1:
+            maybe.add(rows[(i, j)])
+            continue
+        h = k // 2
+        todo += [(i, j, h), (i + h, j + h, k - h)]
+
+    changed: List[JSON] = []
+    for name in common:
+        if name not in maybe:
+            continue
+        oa = a.object(a_idx[name])
+        ob = b.object(b_idx[name])
+        diffs: Dict[str, Any] = {}
+        for f in DIFF_FIELDS:
+            if oa.get(f) != ob.get(f):
+                diffs[f] = {"from": oa.get(f), "to": ob.get(f)}
+        if diffs:
+            changed.append({
+                "name": name,
+                "a_fp": obj_fingerprint_v2(oa),
+                "b_fp": obj_fingerprint_v2(ob),
+                "diff": diffs,
+            })
+
+    return {
+        "schema": "atlas.snapshot.diff.v2",
+        "a_fingerprint": a.fingerprint,
+        "b_fingerprint": b.fingerprint,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "counts": {"added": len(added), "removed": len(removed), "changed": len(changed)},
+    }
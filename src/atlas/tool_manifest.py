@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from .contract import ToolSpec
+
+# Tool groups outside tools_core. Specs live here so a server can declare every tool
+# without importing the handler modules (and Blender/logging code behind them); a
+# group's module is imported on the first call to one of its tools.
+# group -> (handler module, register function)
+# Spec "timeout": default limit (seconds) of one call; past it the Blender child is
+# killed and the call fails as CANCELLED (ATLAS_TOOL_TIMEOUT overrides every default).
+# The train and benchmark loops report each finished step as progress (see progress.py).
+TOOL_GROUPS: Dict[str, Tuple[str, str]] = {
+    "diff": ("atlas.tools_diff", "register_diff_tools"),
+    "blender": ("atlas.tools_blender", "register_blender_tools"),
+    "run": ("atlas.tools_run_v2", "register_run_tools"),
+    "train": ("atlas.tools_train", "register_train_tools"),
+    "benchmark": ("atlas.tools_benchmark", "register_benchmark_tools"),
+    "logs": ("atlas.tools_logs", "register_log_tools"),
+}
+
+TOOL_SPECS: Dict[str, List[ToolSpec]] = {
+    "diff": [
+        {
+            "name": "atlas.snapshot.diff_v1",
+            "description": "Diff two atlas.snapshot.v1 JSON objects (or logged {fingerprint, path} references); returns atlas.snapshot.diff.v1",
+            "pure": True,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"a": {"type": "object"}, "b": {"type": "object"}},
+                "required": ["a", "b"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.snapshot.diff_v2",
+            "description": "Diff two atlas.snapshot.v2 JSON objects (or logged {fingerprint, path} references); returns atlas.snapshot.diff.v2 (object fingerprints).",
+            "pure": True,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"a": {"type": "object"}, "b": {"type": "object"}},
+                "required": ["a", "b"],
+                "additionalProperties": False,
+            },
+        },
+    ],
+    "blender": [
+        {
+            "name": "atlas.blender.init_empty_v1",
+            "description": "Create an empty .blend workspace (headless) at blend_path.",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"blend_path": {"type": "string"}},
+                "required": ["blend_path"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.snapshot_v1",
+            "description": "Headless Blender snapshot (scenegraph) schema atlas.snapshot.v1",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"out_path": {"type": "string"}, "blend_path": {"type": "string"}},
+                "required": ["out_path"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.snapshot_v2",
+            "description": "Headless Blender snapshot schema atlas.snapshot.v2 (bbox/materials/collections/mesh_stats).",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"out_path": {"type": "string"}, "blend_path": {"type": "string"}},
+                "required": ["out_path"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.snapshot_v3",
+            "description": "Headless Blender snapshot written as atlas.snapshot.v3 (columnar binary). Returns path, size, object count and v2 fingerprint.",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"out_path": {"type": "string"}, "blend_path": {"type": "string"}},
+                "required": ["out_path"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.add_cube_v1",
+            "description": "Create a cube data-first (no context). Optionally persists into blend_path.",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "location": {
+                        "type": "object",
+                        "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}},
+                        "additionalProperties": False,
+                    },
+                    "blend_path": {"type": "string"},
+                },
+                "required": ["name", "location"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.exec_ops_v1",
+            "description": (
+                "Run an ordered list of scene ops (add_primitive, set_transform, delete, parent, "
+                "assign_material, link_collection) in one Blender invocation with one save. "
+                "Returns per-op results (atlas.blender.exec_ops.v1)."
+            ),
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"ops": {"type": "array"}, "blend_path": {"type": "string"}},
+                "required": ["ops"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.blender.flush_v1",
+            "description": "Save resident (dirty) workspaces to disk; all of them unless blend_path is given.",
+            "timeout": 600,
+            "inputSchema": {
+                "type": "object",
+                "properties": {"blend_path": {"type": "string"}},
+                "additionalProperties": False,
+            },
+        },
+    ],
+    "run": [
+        {
+            "name": "atlas.run.step_v2",
+            "description": "Run one training step v2: snapshot_v2 -> action -> snapshot_v2 -> diff_v2 -> score_v2 -> jsonl log",
+            "timeout": 1800,
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "action_tool": {"type": "string"},
+                    "action_args": {"type": "object"},
+                    "snapshot_out_dir": {"type": "string"},
+                    "run_id": {"type": "string"},
+                    "workspace_blend_path": {"type": "string"},
+                    "fused": {"type": "boolean"},
+                    "reuse_snapshots": {"type": "boolean"},
+                    "snapshot_store": {"type": "string"},
+                    "snapshot_refs": {"type": "boolean"},
+                },
+                "required": ["action_tool", "action_args", "snapshot_out_dir"],
+                "additionalProperties": False,
+            },
+        },
+    ],
+    "train": [
+        {
+            "name": "atlas.train.loop_v1",
+            "description": "Deterministic training loop v1 (adds cubes) using run.step_v2. Returns summary JSON.",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "steps": {"type": "integer"},
+                    "out_dir": {"type": "string"},
+                    "seed": {"type": "integer"},
+                    "run_id": {"type": "string"},
+                    "fused": {"type": "boolean"},
+                    "reuse_snapshots": {"type": "boolean"},
+                    "store_snapshots": {"type": "boolean"},
+                    "snapshot_refs": {"type": "boolean"},
+                    "segment_logs": {"type": "boolean"},
+                    "log_compression": {"type": "string", "enum": ["none", "gzip", "zstd"]},
+                },
+                "required": ["steps", "out_dir"],
+                "additionalProperties": False,
+            },
+        },
+    ],
+    "benchmark": [
+        {
+            "name": "atlas.benchmark.smoke_v1",
+            "description": "Run 3-step smoke benchmark (2 cube adds + ping). Returns summary JSON.",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "out_dir": {"type": "string"},
+                    "run_id": {"type": "string"},
+                },
+                "required": ["out_dir"],
+                "additionalProperties": False,
+            },
+        },
+    ],
+    "logs": [
+        {
+            "name": "atlas.logs.query_v1",
+            "description": "Query run logs (JSONL files, directories, segmented log stores) by kind/run_id/ok/time range, with optional payload field projection. Returns atlas.logs.query.v1",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "paths": {"type": "array", "items": {"type": "string"}},
+                    "kinds": {"type": "array", "items": {"type": "string"}},
+                    "run_ids": {"type": "array", "items": {"type": "string"}},
+                    "ok": {"type": "boolean"},
+                    "since": {"type": "string"},
+                    "until": {"type": "string"},
+                    "fields": {"type": "array", "items": {"type": "string"}},
+                    "limit": {"type": "integer", "minimum": 1},
+                    "workers": {"type": "integer", "minimum": 1},
+                },
+                "required": ["paths"],
+                "additionalProperties": False,
+            },
+        },
+        {
+            "name": "atlas.logs.export_v1",
+            "description": "Export step logs to columnar training shards (npy, or parquet with pyarrow); incremental. Returns atlas.dataset.export.v1",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "paths": {"type": "array", "items": {"type": "string"}},
+                    "out_dir": {"type": "string"},
+                    "format": {"type": "string", "enum": ["npy", "parquet"]},
+                    "shard_rows": {"type": "integer", "minimum": 1},
+                },
+                "required": ["paths", "out_dir"],
+                "additionalProperties": False,
+            },
+        },
+    ],
+}
+
+_SPECS_BY_NAME: Dict[str, ToolSpec] = {s["name"]: s for specs in TOOL_SPECS.values() for s in specs}
+
+
+def tool_spec(name: str) -> ToolSpec:
+    return _SPECS_BY_NAME[name]
@@ -1,109 +1,149 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .registry import ToolRegistry, json_result
-from .blender_backend import run_blender_script
+from .contract import AtlasError
+from .registry import ToolRegistry
+from .tool_manifest import tool_spec
+from .blender_backend import flush_blender_workspaces, run_blender_script, run_blender_script_async
 
 JSON = Dict[str, Any]
 
 
-def _blend_arg(args: JSON) -> List[str]:
+def _blend_path(args: JSON) -> Optional[Path]:
     bp = args.get("blend_path")
     if not bp:
-        return []
-    return ["--blend", str(bp)]
+        return None
+    return Path(str(bp))
+
+
+def _add_cube_argv(args: JSON) -> List[str]:
+    loc = args["location"] or {}
+    return [
+        "--name", str(args["name"]),
+        "--location", str(loc.get("x", 0.0)), str(loc.get("y", 0.0)), str(loc.get("z", 0.0)),
+    ]
+
+
+# exec_ops_v1: op -> required string fields (see tools/blender_exec_ops_v1.py)
+EXEC_OPS: Dict[str, Tuple[str, ...]] = {
+    "add_primitive": ("name",),
+    "set_transform": ("name",),
+    "delete": ("name",),
+    "parent": ("name",),
+    "assign_material": ("name", "material"),
+    "link_collection": ("name", "collection"),
+}
+PRIMITIVE_TYPES = ("cube", "plane", "uv_sphere", "ico_sphere", "cylinder", "cone", "empty")
+
+
+def _validate_ops(ops: Any) -> None:
+    # reject bad programs before paying for a Blender launch
+    if not isinstance(ops, list) or not ops:
+        raise AtlasError("INVALID_ARGUMENTS", "Field 'ops' must be a non-empty array")
+    for i, op in enumerate(ops):
+        if not isinstance(op, dict):
+            raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}] must be object")
+        kind = op.get("op")
+        if kind not in EXEC_OPS:
+            raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}].op must be one of: {', '.join(EXEC_OPS)}")
+        for k in EXEC_OPS[kind]:
+            if not isinstance(op.get(k), str) or not op[k]:
+                raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}].{k} must be a non-empty string")
+        for k in ("location", "rotation", "scale"):
+            if op.get(k) is not None and not isinstance(op[k], dict):
+                raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}].{k} must be object")
+        if kind == "add_primitive" and op.get("type", "cube") not in PRIMITIVE_TYPES:
+            raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}].type must be one of: {', '.join(PRIMITIVE_TYPES)}")
+        if kind == "parent" and op.get("parent") is not None and not isinstance(op["parent"], str):
+            raise AtlasError("INVALID_ARGUMENTS", f"ops[{i}].parent must be string or null")
+
+
+def _exec_ops_argv(args: JSON) -> List[str]:
+    _validate_ops(args["ops"])
+    return ["--ops-json", json.dumps(args["ops"], ensure_ascii=False)]
+
+
+# Mutating actions whose script can also run inside a fused step (argv without --blend).
+ActionArgv = Callable[[JSON], List[str]]
+BLENDER_ACTION_SCRIPTS: Dict[str, Tuple[Path, ActionArgv]] = {
+    "atlas.blender.add_cube_v1": (Path("tools/blender_add_cube_v1.py"), _add_cube_argv),
+    "atlas.blender.exec_ops_v1": (Path("tools/blender_exec_ops_v1.py"), _exec_ops_argv),
+}
+
+
+def blender_action_script(tool: str) -> Optional[Tuple[Path, ActionArgv]]:
+    return BLENDER_ACTION_SCRIPTS.get(tool)
+
+
+# tool args -> run_blender_script keyword arguments
+ScriptKwargs = Callable[[JSON], JSON]
+
+
+def _register_script_tool(reg: ToolRegistry, name: str, script: Path, kwargs: ScriptKwargs) -> None:
+    # sync handler for call_tool, async one (no thread per Blender run) for call_tool_async
+    reg.register_json(
+        tool_spec(name),
+        lambda args: run_blender_script(script, **kwargs(args)),
+        async_fn=lambda args: run_blender_script_async(script, **kwargs(args)),
+    )
 
 
 def register_blender_tools(reg: ToolRegistry) -> ToolRegistry:
     # init workspace
-    reg.register(
-        {
-            "name": "atlas.blender.init_empty_v1",
-            "description": "Create an empty .blend workspace (headless) at blend_path.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"blend_path": {"type": "string"}},
-                "required": ["blend_path"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            run_blender_script(
-                Path("tools/blender_init_empty_v1.py"),
-                extra_args=["--blend", str(args["blend_path"])],
-            )
-        ),
+    _register_script_tool(
+        reg,
+        "atlas.blender.init_empty_v1",
+        Path("tools/blender_init_empty_v1.py"),
+        lambda args: {"extra_args": ["--blend", str(args["blend_path"])]},
     )
 
     # snapshot v1 (kept)
-    reg.register(
-        {
-            "name": "atlas.blender.snapshot_v1",
-            "description": "Headless Blender snapshot (scenegraph) schema atlas.snapshot.v1",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"out_path": {"type": "string"}, "blend_path": {"type": "string"}},
-                "required": ["out_path"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            run_blender_script(
-                Path("tools/blender_snapshot_v1.py"),
-                out_json_path=Path(args["out_path"]),
-                extra_args=_blend_arg(args),
-            )
-        ),
+    _register_script_tool(
+        reg,
+        "atlas.blender.snapshot_v1",
+        Path("tools/blender_snapshot_v1.py"),
+        lambda args: {"out_json_path": Path(args["out_path"]), "blend_path": _blend_path(args)},
     )
 
     # snapshot v2 (NEW)
-    reg.register(
-        {
-            "name": "atlas.blender.snapshot_v2",
-            "description": "Headless Blender snapshot schema atlas.snapshot.v2 (bbox/materials/collections/mesh_stats).",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"out_path": {"type": "string"}, "blend_path": {"type": "string"}},
-                "required": ["out_path"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            run_blender_script(
-                Path("tools/blender_snapshot_v2.py"),
-                out_json_path=Path(args["out_path"]),
-                extra_args=_blend_arg(args),
-            )
-        ),
+    _register_script_tool(
+        reg,
+        "atlas.blender.snapshot_v2",
+        Path("tools/blender_snapshot_v2.py"),
+        lambda args: {"out_json_path": Path(args["out_path"]), "blend_path": _blend_path(args)},
+    )
+
+    # snapshot v3: columnar binary file; only a summary comes back (read it with atlas.snapshot_v3)
+    _register_script_tool(
+        reg,
+        "atlas.blender.snapshot_v3",
+        Path("tools/blender_snapshot_v3.py"),
+        lambda args: {"extra_args": ["--out", str(Path(args["out_path"]).resolve())], "blend_path": _blend_path(args)},
     )
 
     # add cube
-    reg.register(
-        {
-            "name": "atlas.blender.add_cube_v1",
-            "description": "Create a cube data-first (no context). Optionally persists into blend_path.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"name": {"type": "string"}, "location": {"type": "object"}, "blend_path": {"type": "string"}},
-                "required": ["name", "location"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            run_blender_script(
-                Path("tools/blender_add_cube_v1.py"),
-                extra_args=[
-                    "--name", str(args["name"]),
-                    "--location",
-                    str((args["location"] or {}).get("x", 0.0)),
-                    str((args["location"] or {}).get("y", 0.0)),
-                    str((args["location"] or {}).get("z", 0.0)),
-                    *_blend_arg(args),
-                ],
-            )
-        ),
+    _register_script_tool(
+        reg,
+        "atlas.blender.add_cube_v1",
+        Path("tools/blender_add_cube_v1.py"),
+        lambda args: {"extra_args": _add_cube_argv(args), "blend_path": _blend_path(args), "mutates": True},
+    )
+
+    # batched scene program: many ops, one launch, one save
+    _register_script_tool(
+        reg,
+        "atlas.blender.exec_ops_v1",
+        Path("tools/blender_exec_ops_v1.py"),
+        lambda args: {"extra_args": _exec_ops_argv(args), "blend_path": _blend_path(args), "mutates": True},
+    )
+
+    # flush resident workspaces (checkpoint); no-op unless ATLAS_BLENDER_RESIDENT is on
+    reg.register_json(
+        tool_spec("atlas.blender.flush_v1"),
+        lambda args: {"schema": "atlas.blender.flush.v1", "flushed": flush_blender_workspaces(_blend_path(args))},
     )
 
     return reg
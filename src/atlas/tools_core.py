@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import importlib
 from typing import Any, Dict
 
-from .registry import ToolRegistry, text_result, json_result
-from .tools_blender import register_blender_tools
-from .tools_diff import register_diff_tools
-from .tools_run_v2 import register_run_tools
-from .tools_train import register_train_tools
+from .registry import Loader, ToolRegistry, text_result
+from .tool_manifest import TOOL_GROUPS, TOOL_SPECS
 
 JSON = Dict[str, Any]
 
 
-def build_registry() -> ToolRegistry:
+def _group_loader(module: str, func: str) -> Loader:
+    def load(reg: ToolRegistry) -> Any:
+        return getattr(importlib.import_module(module), func)(reg)
+
+    return load
+
+
+def build_registry(*, lazy: bool = True) -> ToolRegistry:
+    # lazy: groups are declared from tool_manifest and imported on first use
     reg = ToolRegistry()
 
     reg.register(
@@ -23,10 +29,11 @@ def build_registry() -> ToolRegistry:
         lambda args: text_result("pong"),
     )
 
-    reg.register(
+    reg.register_json(
         {
             "name": "atlas.echo",
             "description": "Echo back provided text.",
+            "pure": True,
             "inputSchema": {
                 "type": "object",
                 "properties": {"text": {"type": "string"}},
@@ -34,12 +41,16 @@ def build_registry() -> ToolRegistry:
                 "additionalProperties": False,
             },
         },
-        lambda args: json_result({"echo": args["text"]}),
+        lambda args: {"echo": args["text"]},
     )
 
-    register_diff_tools(reg)
-    register_blender_tools(reg)
-    register_run_tools(reg)      # v2
-    register_train_tools(reg)    # loop v1
+    # diff, blender, run (v2), train (loop v1), benchmark, logs
+    for group, (module, func) in TOOL_GROUPS.items():
+        load = _group_loader(module, func)
+        if not lazy:
+            load(reg)
+            continue
+        for spec in TOOL_SPECS[group]:
+            reg.declare(spec, load)
 
     return reg
@@ -2,40 +2,32 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from .registry import ToolRegistry, json_result
+from .log_jsonl import resolve_snapshot
+from .registry import ToolRegistry
 from .snapshot_diff import diff_snapshot_v1
 from .snapshot_diff_v2 import diff_snapshot_v2
+from .tool_manifest import tool_spec
 
 JSON = Dict[str, Any]
 
 
+def _snapshot(arg: JSON) -> JSON:
+    # a snapshot, or a logged reference to one ({"fingerprint", "path"}, see snapshot_ref):
+    # with references the result cache hashes the reference, not the whole scene
+    if "objects" not in arg and "fingerprint" in arg:
+        return resolve_snapshot(arg, verify=True) or arg
+    return arg
+
+
 def register_diff_tools(reg: ToolRegistry) -> ToolRegistry:
-    reg.register(
-        {
-            "name": "atlas.snapshot.diff_v1",
-            "description": "Diff two atlas.snapshot.v1 JSON objects; returns atlas.snapshot.diff.v1",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"a": {"type": "object"}, "b": {"type": "object"}},
-                "required": ["a", "b"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(diff_snapshot_v1(args["a"], args["b"])),
+    reg.register_json(
+        tool_spec("atlas.snapshot.diff_v1"),
+        lambda args: diff_snapshot_v1(_snapshot(args["a"]), _snapshot(args["b"])),
     )
 
-    reg.register(
-        {
-            "name": "atlas.snapshot.diff_v2",
-            "description": "Diff two atlas.snapshot.v2 JSON objects; returns atlas.snapshot.diff.v2 (object fingerprints).",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"a": {"type": "object"}, "b": {"type": "object"}},
-                "required": ["a", "b"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(diff_snapshot_v2(args["a"], args["b"])),
+    reg.register_json(
+        tool_spec("atlas.snapshot.diff_v2"),
+        lambda args: diff_snapshot_v2(_snapshot(args["a"]), _snapshot(args["b"])),
     )
 
     return reg
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+from .contract import AtlasError
+from .dataset_export import export_dataset
+from .log_reader import LogQuery, query_logs
+from .registry import ToolRegistry
+from .tool_manifest import tool_spec
+
+JSON = Dict[str, Any]
+
+
+def _strings(args: JSON, key: str) -> Optional[Tuple[str, ...]]:
+    v = args.get(key)
+    if v is None:
+        return None
+    if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+        raise AtlasError("INVALID_ARGUMENTS", f"Field '{key}' must be an array of strings")
+    return tuple(v)
+
+
+def _query(args: JSON) -> JSON:
+    paths = _strings(args, "paths") or ()
+    if not paths:
+        raise AtlasError("INVALID_ARGUMENTS", "Field 'paths' must not be empty")
+    q = LogQuery(
+        kinds=_strings(args, "kinds"),
+        run_ids=_strings(args, "run_ids"),
+        ok=args.get("ok"),
+        since=args.get("since"),
+        until=args.get("until"),
+        fields=_strings(args, "fields"),
+    )
+    return query_logs(paths, q, limit=int(args.get("limit", 1000)), workers=args.get("workers"))
+
+
+def register_log_tools(reg: ToolRegistry) -> ToolRegistry:
+    reg.register_json(
+        tool_spec("atlas.logs.query_v1"),
+        _query,
+    )
+
+    reg.register_json(
+        tool_spec("atlas.logs.export_v1"),
+        lambda args: export_dataset(
+            _strings(args, "paths") or (),
+            args["out_dir"],
+            fmt=args.get("format"),
+            shard_rows=int(args.get("shard_rows", 65536)),
+        ),
+    )
+    return reg
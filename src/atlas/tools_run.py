@@ -3,17 +3,19 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict
 
-from .registry import ToolRegistry, json_result
+from .registry import ToolRegistry
 from .run_step import run_step_v1
+from .snapshot_cache import default_snapshot_cache
 
 JSON = Dict[str, Any]
 
 
 def register_run_tools(reg: ToolRegistry) -> ToolRegistry:
-    reg.register(
+    reg.register_json(
         {
             "name": "atlas.run.step_v1",
             "description": "Run one training step: snapshot_before -> action -> snapshot_after -> diff -> score -> jsonl log",
+            "timeout": 1800,
             "inputSchema": {
                 "type": "object",
                 "properties": {
@@ -22,20 +24,24 @@ def register_run_tools(reg: ToolRegistry) -> ToolRegistry:
                     "snapshot_out_dir": {"type": "string"},
                     "run_id": {"type": "string"},
                     "workspace_blend_path": {"type": "string"},
+                    "fused": {"type": "boolean"},
+                    "reuse_snapshots": {"type": "boolean"},
+                    "snapshot_refs": {"type": "boolean"},
                 },
                 "required": ["action_tool", "action_args", "snapshot_out_dir"],
                 "additionalProperties": False,
             },
         },
-        lambda args: json_result(
-            run_step_v1(
-                reg,
-                action_tool=args["action_tool"],
-                action_args=args["action_args"],
-                snapshot_out_dir=Path(args["snapshot_out_dir"]),
-                run_id=args.get("run_id"),
-                workspace_blend_path=Path(args["workspace_blend_path"]) if args.get("workspace_blend_path") else None,
-            )
+        lambda args: run_step_v1(
+            reg,
+            action_tool=args["action_tool"],
+            action_args=args["action_args"],
+            snapshot_out_dir=Path(args["snapshot_out_dir"]),
+            run_id=args.get("run_id"),
+            workspace_blend_path=Path(args["workspace_blend_path"]) if args.get("workspace_blend_path") else None,
+            fused=bool(args.get("fused", False)),
+            snapshot_cache=default_snapshot_cache() if args.get("reuse_snapshots") else None,
+            snapshot_refs=bool(args.get("snapshot_refs", False)),
         ),
     )
     return reg
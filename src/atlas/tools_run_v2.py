@@ -3,40 +3,30 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict
 
-from .registry import ToolRegistry, json_result
+from .registry import ToolRegistry
 from .run_step_v2 import run_step_v2
+from .snapshot_cache import default_snapshot_cache
+from .snapshot_store import SnapshotStore
+from .tool_manifest import tool_spec
 
 JSON = Dict[str, Any]
 
 
 def register_run_tools(reg: ToolRegistry) -> ToolRegistry:
     # keep v1 if you want (already exists elsewhere) — but we register v2 here
-    reg.register(
-        {
-            "name": "atlas.run.step_v2",
-            "description": "Run one training step v2: snapshot_v2 -> action -> snapshot_v2 -> diff_v2 -> score_v2 -> jsonl log",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "action_tool": {"type": "string"},
-                    "action_args": {"type": "object"},
-                    "snapshot_out_dir": {"type": "string"},
-                    "run_id": {"type": "string"},
-                    "workspace_blend_path": {"type": "string"},
-                },
-                "required": ["action_tool", "action_args", "snapshot_out_dir"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            run_step_v2(
-                reg,
-                action_tool=args["action_tool"],
-                action_args=args["action_args"],
-                snapshot_out_dir=Path(args["snapshot_out_dir"]),
-                run_id=args.get("run_id"),
-                workspace_blend_path=Path(args["workspace_blend_path"]) if args.get("workspace_blend_path") else None,
-            )
+    reg.register_json(
+        tool_spec("atlas.run.step_v2"),
+        lambda args: run_step_v2(
+            reg,
+            action_tool=args["action_tool"],
+            action_args=args["action_args"],
+            snapshot_out_dir=Path(args["snapshot_out_dir"]),
+            run_id=args.get("run_id"),
+            workspace_blend_path=Path(args["workspace_blend_path"]) if args.get("workspace_blend_path") else None,
+            fused=bool(args.get("fused", False)),
+            snapshot_cache=default_snapshot_cache() if args.get("reuse_snapshots") else None,
+            snapshot_store=SnapshotStore(args["snapshot_store"], chunked=True) if args.get("snapshot_store") else None,
+            snapshot_refs=bool(args.get("snapshot_refs", False)),
         ),
     )
     return reg
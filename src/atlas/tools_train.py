@@ -3,37 +3,28 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict
 
-from .registry import ToolRegistry, json_result
+from .registry import ToolRegistry
+from .tool_manifest import tool_spec
 from .train_loop import train_loop_v1
 
 JSON = Dict[str, Any]
 
 
 def register_train_tools(reg: ToolRegistry) -> ToolRegistry:
-    reg.register(
-        {
-            "name": "atlas.train.loop_v1",
-            "description": "Deterministic training loop v1 (adds cubes) using run.step_v2. Returns summary JSON.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "steps": {"type": "integer"},
-                    "out_dir": {"type": "string"},
-                    "seed": {"type": "integer"},
-                    "run_id": {"type": "string"},
-                },
-                "required": ["steps", "out_dir"],
-                "additionalProperties": False,
-            },
-        },
-        lambda args: json_result(
-            train_loop_v1(
-                reg,
-                steps=int(args["steps"]),
-                out_dir=Path(args["out_dir"]),
-                seed=int(args.get("seed", 0) or 0),
-                run_id=args.get("run_id"),
-            )
+    reg.register_json(
+        tool_spec("atlas.train.loop_v1"),
+        lambda args: train_loop_v1(
+            reg,
+            steps=int(args["steps"]),
+            out_dir=Path(args["out_dir"]),
+            seed=int(args.get("seed", 0) or 0),
+            run_id=args.get("run_id"),
+            fused=bool(args.get("fused", False)),
+            reuse_snapshots=bool(args.get("reuse_snapshots", True)),
+            store_snapshots=bool(args.get("store_snapshots", False)),
+            snapshot_refs=bool(args.get("snapshot_refs", False)),
+            segment_logs=bool(args.get("segment_logs", False)),
+            log_compression=args.get("log_compression"),
         ),
     )
     return reg
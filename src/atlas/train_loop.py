@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import random
 import uuid
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .cancel import check_cancelled
+from .log_jsonl import open_logger
+from .log_segments import SegmentedLogStore
+from .progress import report_progress, step_message
 from .registry import ToolRegistry
 from .run_step_v2 import run_step_v2
+from .snapshot_cache import SnapshotCache
+from .snapshot_store import SnapshotStore
 
 JSON = Dict[str, Any]
 
@@ -22,6 +29,12 @@ def train_loop_v1(
     out_dir: Path,
     seed: int = 0,
     run_id: Optional[str] = None,
+    fused: bool = False,
+    reuse_snapshots: bool = True,
+    store_snapshots: bool = False,
+    snapshot_refs: bool = False,
+    segment_logs: bool = False,
+    log_compression: Optional[str] = None,
 ) -> JSON:
     run_id = run_id or f"train-{_rid()}"
     out_dir = out_dir.resolve()
@@ -31,29 +44,58 @@ def train_loop_v1(
     workspace = out_dir / "workspace.blend"
     snaps = out_dir / "snaps"
 
+    # step N+1's before-snapshot is step N's after-snapshot: skip that launch
+    cache = SnapshotCache() if reuse_snapshots else None
+    # one content-addressed, per-object chunked store instead of two files per step
+    store = SnapshotStore(out_dir / "snapstore", chunked=True) if store_snapshots else None
+    # all steps' events in a few indexed segments instead of one log file per step
+    logs = SegmentedLogStore(out_dir / "logs", compression=log_compression) if segment_logs else None  # type: ignore[arg-type]
+
     history: List[JSON] = []
     total = 0.0
 
-    for i in range(int(steps)):
-        name = f"ATLAS_Train_Cube_{i:04d}"
-        loc = {
-            "x": round(rng.uniform(-3.0, 3.0), 3),
-            "y": round(rng.uniform(-3.0, 3.0), 3),
-            "z": round(rng.uniform(0.0, 2.0), 3),
-        }
+    try:
+        # without a segment store: one logger for the loop, moved to each step's out/runs/<run_id>.jsonl
+        step_log = open_logger(Path("out") / "runs" / f"{run_id}.jsonl", run_id) if logs is None else None
+        with step_log or nullcontext():
+            for i in range(int(steps)):
+                # a cancelled loop stops between steps (a running step's Blender is killed)
+                check_cancelled()
+                name = f"ATLAS_Train_Cube_{i:04d}"
+                loc = {
+                    "x": round(rng.uniform(-3.0, 3.0), 3),
+                    "y": round(rng.uniform(-3.0, 3.0), 3),
+                    "z": round(rng.uniform(0.0, 2.0), 3),
+                }
+
+                s = run_step_v2(
+                    reg,
+                    action_tool="atlas.blender.add_cube_v1",
+                    action_args={"name": name, "location": loc},
+                    snapshot_out_dir=snaps,
+                    run_id=f"{run_id}-{i+1:04d}",
+                    workspace_blend_path=workspace,
+                    fused=fused,
+                    snapshot_cache=cache,
+                    snapshot_store=store,
+                    snapshot_refs=snapshot_refs,
+                    log_store=logs,
+                    logger=step_log,
+                )
+                total += float(s.get("score", 0.0))
+                entry = {"run_id": s["run_id"], "score": s["score"], "diff_counts": s["diff"]["counts"]}
+                if store is not None:
+                    entry["snapshots"] = s["snapshots"]
+                history.append(entry)
+                report_progress(i + 1, int(steps), message=step_message(i + 1, int(steps), entry), partial=entry)
+    finally:
+        if logs is not None:
+            logs.close()  # also on cancel/error: the segment and its index stay readable
 
-        s = run_step_v2(
-            reg,
-            action_tool="atlas.blender.add_cube_v1",
-            action_args={"name": name, "location": loc},
-            snapshot_out_dir=snaps,
-            run_id=f"{run_id}-{i+1:04d}",
-            workspace_blend_path=workspace,
-        )
-        total += float(s.get("score", 0.0))
-        history.append({"run_id": s["run_id"], "score": s["score"], "diff_counts": s["diff"]["counts"]})
+    # checkpoint: a resident worker may still hold unsaved steps
+    reg.call_tool_obj("atlas.blender.flush_v1", {"blend_path": str(workspace)})
 
-    return {
+    out: JSON = {
         "schema": "atlas.train.loop.v1",
         "run_id": run_id,
         "seed": int(seed),
@@ -64,3 +106,8 @@ def train_loop_v1(
         "avg_score": float(total / max(int(steps), 1)),
         "out_dir": str(out_dir),
     }
+    if store is not None:
+        out["snapshot_store"] = str(store.root)
+    if logs is not None:
+        out["logs"] = str(logs.root)
+    return out
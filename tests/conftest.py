@@ -0,0 +1,131 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+import atlas.run_fused as run_fused
+import atlas.tools_blender as tools_blender
+from atlas.blender_backend import _oneshot_result
+from atlas.framing import OutputTail
+
+REPO = Path(__file__).resolve().parents[1]
+FAKE_BLENDER = Path(__file__).resolve().parent / "fake_blender.py"
+
+
+@pytest.fixture
+def fake_blender_exe(tmp_path):
+    # Executable shim so ATLAS_BLENDER_EXE can point at the fake (single path, like blender.exe)
+    if sys.platform == "win32":
+        pytest.skip("fake Blender shim relies on a POSIX shebang")
+    shim = tmp_path / "fake-blender"
+    shim.write_text(
+        f"#!{sys.executable}\nimport runpy\nrunpy.run_path({str(FAKE_BLENDER)!r}, run_name='__main__')\n",
+        encoding="utf-8",
+    )
+    shim.chmod(0o755)
+    return str(shim)
+
+
+@pytest.fixture
+def tools_dir():
+    return REPO / "tools"
+
+
+class FakeBlender:
+    # In-memory stand-in for run_blender_script: scene per .blend path, counts launches.
+    def __init__(self):
+        self.files = {}
+        self.launches = 0
+
+    def _argv(self, args, key, n=1):
+        i = args.index(key)
+        return args[i + 1] if n == 1 else args[i + 1 : i + 1 + n]
+
+    def _snapshot(self, objs):
+        return {"schema": "atlas.snapshot.v2", "objects": [{"name": n, "type": "MESH"} for n in sorted(objs)]}
+
+    def _write(self, path, data):
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+
+    def _save(self, blend, objs):
+        # real scripts save the .blend: size/mtime change with the scene
+        self.files[blend] = objs
+        Path(blend).write_text(json.dumps(objs), encoding="utf-8")
+
+    def _exec_ops(self, objs, ops):
+        # blender_exec_ops_v1.exec_ops for add_primitive/delete; stops at the first error
+        objs, results, failed = list(objs), [], False
+        for i, op in enumerate(ops):
+            if failed:
+                results.append({"index": i, "op": op["op"], "status": "skipped"})
+            elif op["op"] == "add_primitive":
+                objs.append(op["name"])
+                results.append({"index": i, "op": op["op"], "status": "ok", "result": {"name": op["name"], "type": "MESH"}})
+            elif op["op"] == "delete" and op["name"] in objs:
+                objs.remove(op["name"])
+                results.append({"index": i, "op": op["op"], "status": "ok", "result": {"name": op["name"]}})
+            else:
+                failed = True
+                results.append({"index": i, "op": op["op"], "status": "error", "error": f"object not found: {op['name']}"})
+        counts = {s: sum(1 for r in results if r["status"] == s) for s in ("ok", "error", "skipped")}
+        return objs, {"schema": "atlas.blender.exec_ops.v1", "ok": not failed, "results": results, "counts": counts}
+
+    def __call__(self, script_path, *, out_json_path=None, extra_args=None, blend_path=None, mutates=False):
+        self.launches += 1
+        args = list(extra_args or []) + (["--blend", str(blend_path)] if blend_path else [])
+        name = Path(script_path).name
+        if name == "blender_init_empty_v1.py":
+            self._save(self._argv(args, "--blend"), [])
+            return {"schema": "atlas.blender.init_empty.v1"}
+        if name == "blender_snapshot_v2.py":
+            snap = self._snapshot(self.files.get(self._argv(args, "--blend"), []))
+            self._write(out_json_path, snap)
+            return json.loads(out_json_path.read_text(encoding="utf-8"))
+        if name == "blender_add_cube_v1.py":
+            blend = self._argv(args, "--blend")
+            self._save(blend, self.files[blend] + [self._argv(args, "--name")])
+            return {"created": {"name": self._argv(args, "--name"), "type": "MESH"}, "schema": "atlas.blender.add_cube.v1"}
+        if name == "blender_exec_ops_v1.py":
+            blend = self._argv(args, "--blend")
+            objs, result = self._exec_ops(self.files[blend], json.loads(self._argv(args, "--ops-json")))
+            result = json.loads(json.dumps(result, sort_keys=True))  # scripts emit sort_keys JSON
+            if not result["ok"]:
+                # what the one-shot backend raises for a script that reported failure
+                return _oneshot_result(Path(script_path), None, 0, [result], OutputTail(), OutputTail())
+            self._save(blend, objs)
+            return result
+        if name == "blender_step_v1.py":
+            blend = self._argv(args, "--blend")
+            objs = list(self.files.get(blend, []))
+            before = None if "--skip-before" in args else self._snapshot(objs)
+            if before is not None:
+                self._write(self._argv(args, "--before-out"), before)
+            action_argv = json.loads(self._argv(args, "--action-argv"))
+            if "--ops-json" in action_argv:
+                new_objs, result = self._exec_ops(objs, json.loads(action_argv[action_argv.index("--ops-json") + 1]))
+                if result["ok"]:
+                    action, objs = {"ok": True, "result": result}, new_objs
+                else:
+                    # atlas_bpy_io.run_script's failure; the step drops the partial edits
+                    action = {"ok": False, "error": {"message": "script reported failure", "result": result}}
+            else:
+                created = action_argv[action_argv.index("--name") + 1]
+                objs.append(created)
+                result = {"created": {"name": created, "type": "MESH"}, "schema": "atlas.blender.add_cube.v1"}
+                action = {"ok": True, "result": result}
+            after = self._snapshot(objs)
+            self._write(self._argv(args, "--after-out"), after)
+            self._save(blend, objs)
+            res = {"schema": "atlas.blender.step.v1", "before": before, "action": action, "after": after}
+            return json.loads(json.dumps(res, sort_keys=True))  # scripts emit sort_keys JSON
+        raise AssertionError(name)
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    fb = FakeBlender()
+    monkeypatch.setattr(tools_blender, "run_blender_script", fb)
+    monkeypatch.setattr(run_fused, "run_blender_script", fb)
+    monkeypatch.chdir(tmp_path)
+    return fb
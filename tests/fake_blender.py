@@ -0,0 +1,63 @@
+# Stand-in for the Blender executable in tests. Honours `-b --factory-startup --python X -- ...`
+# and installs a tiny `bpy` whose scene is a list of object names persisted as JSON.
+import json
+import runpy
+import sys
+import types
+from pathlib import Path
+
+
+def _make_bpy():
+    objects = ["Camera", "Cube", "Light"]
+    log = []
+
+    def open_mainfile(filepath):
+        objects[:] = json.loads(Path(filepath).read_text(encoding="utf-8"))["objects"]
+        log.append(["open", str(filepath)])
+
+    def save_mainfile(filepath):
+        Path(filepath).write_text(json.dumps({"objects": objects}), encoding="utf-8")
+        log.append(["save", str(filepath)])
+
+    def save_as_mainfile(filepath, copy=False):
+        Path(filepath).write_text(json.dumps({"objects": objects}), encoding="utf-8")
+        log.append(["save_copy" if copy else "save", str(filepath)])
+
+    def read_factory_settings(use_empty=False):
+        objects[:] = [] if use_empty else ["Camera", "Cube", "Light"]
+        log.append(["reset"])
+
+    bpy = types.ModuleType("bpy")
+    bpy.ops = types.SimpleNamespace(
+        wm=types.SimpleNamespace(
+            open_mainfile=open_mainfile,
+            save_mainfile=save_mainfile,
+            save_as_mainfile=save_as_mainfile,
+            read_factory_settings=read_factory_settings,
+        )
+    )
+    bpy.app = types.SimpleNamespace(version=(4, 2, 0), version_string="4.2.0 (fake)")
+    bpy.data = types.SimpleNamespace(objects=objects)
+    bpy.fake_log = log
+    return bpy
+
+
+def main():
+    argv = sys.argv[1:]
+    if "--python" not in argv:
+        raise SystemExit("fake blender: missing --python")
+    script = argv[argv.index("--python") + 1]
+    sys.modules["bpy"] = _make_bpy()
+    print("Blender 4.2.0 (fake) starting", flush=True)
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        raise
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from atlas.blender_backend import run_blender_script
+from atlas.contract import AtlasError
+from atlas.tools_core import build_registry
+
+
+def test_exec_ops_rejects_bad_program_before_launch(monkeypatch):
+    monkeypatch.delenv("ATLAS_BLENDER_EXE", raising=False)
+    reg = build_registry()
+    for ops, msg in [
+        ([], "Field 'ops' must be a non-empty array"),
+        ([{"op": "explode", "name": "A"}], "ops[0].op must be one of"),
+        ([{"op": "add_primitive", "name": "A"}, {"op": "assign_material", "name": "A"}], "ops[1].material"),
+        ([{"op": "add_primitive", "name": "A", "type": "teapot"}], "ops[0].type"),
+    ]:
+        with pytest.raises(AtlasError) as ei:
+            reg.call_tool("atlas.blender.exec_ops_v1", {"ops": ops})
+        assert ei.value.code == "INVALID_ARGUMENTS"
+        assert msg in ei.value.message
+
+
+def test_script_reported_failure_raises(monkeypatch, fake_blender_exe, tmp_path, tools_dir):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.delenv("ATLAS_BLENDER_POOL_SIZE", raising=False)
+    script = tmp_path / "fails.py"
+    script.write_text(
+        f"import sys\nsys.path.insert(0, {str(tools_dir)!r})\n"
+        "from atlas_bpy_io import emit_result\n"
+        "emit_result({'ok': False, 'results': [{'index': 0, 'status': 'error'}]})\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(AtlasError) as ei:
+        run_blender_script(script)
+    assert ei.value.data["error"]["result"]["results"][0]["status"] == "error"
+
+
+def test_exec_ops_runtime(tmp_path):
+    if not os.environ.get("ATLAS_BLENDER_EXE"):
+        pytest.skip("ATLAS_BLENDER_EXE not set")
+
+    reg = build_registry()
+    blend = tmp_path / "ops.blend"
+    reg.call_tool("atlas.blender.init_empty_v1", {"blend_path": str(blend)})
+    ops = [
+        {"op": "add_primitive", "type": "cube", "name": "Base", "location": {"x": 0, "y": 0, "z": 1}},
+        {"op": "add_primitive", "type": "uv_sphere", "name": "Ball", "size": 1.0},
+        {"op": "parent", "name": "Ball", "parent": "Base"},
+        {"op": "assign_material", "name": "Ball", "material": "Red", "color": [1, 0, 0, 1]},
+        {"op": "link_collection", "name": "Ball", "collection": "Props", "move": True},
+        {"op": "set_transform", "name": "Base", "scale": {"x": 2, "y": 2, "z": 2}},
+        {"op": "delete", "name": "Cube"},
+    ]
+    res = reg.call_tool("atlas.blender.exec_ops_v1", {"ops": ops, "blend_path": str(blend)})
+    data = json.loads(res["content"][0]["text"])
+    assert data["schema"] == "atlas.blender.exec_ops.v1"
+    assert data["ok"] is True
+    assert data["counts"] == {"ok": len(ops), "error": 0, "skipped": 0}
+
+    snap = json.loads(
+        reg.call_tool("atlas.blender.snapshot_v2", {"out_path": str(tmp_path / "s.json"), "blend_path": str(blend)})[
+            "content"
+        ][0]["text"]
+    )
+    objs = {o["name"]: o for o in snap["objects"]}
+    assert "Cube" not in objs
+    assert objs["Ball"]["parent"] == "Base"
+    assert objs["Ball"]["materials"] == ["Red"]
+    assert objs["Ball"]["collections"] == ["Props"]
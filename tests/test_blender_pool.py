@@ -0,0 +1,209 @@
+import json
+
+import pytest
+
+from atlas.blender_backend import run_blender_script, shutdown_blender_pool
+from atlas.blender_pool import BlenderWorkerPool
+from atlas.contract import AtlasError
+from atlas.snapshot_cache import SnapshotCache
+
+
+def _script(tmp_path, tools_dir, name, body):
+    p = tmp_path / name
+    p.write_text(
+        "import os, sys\n"
+        f"sys.path.insert(0, {str(tools_dir)!r})\n"
+        "import bpy\n"
+        "from atlas_bpy_io import emit_result\n"
+        "argv = sys.argv[sys.argv.index('--') + 1:]\n" + body,
+        encoding="utf-8",
+    )
+    return p
+
+
+@pytest.fixture
+def echo_script(tmp_path, tools_dir):
+    return _script(
+        tmp_path, tools_dir, "echo.py",
+        "print('noise before result')\n"
+        "bpy.data.objects.append('Scratch')\n"
+        "emit_result({'argv': argv, 'pid': os.getpid(), 'objects': list(bpy.data.objects)})\n",
+    )
+
+
+def test_pool_runs_scripts_in_warm_workers(fake_blender_exe, tools_dir, echo_script):
+    pool = BlenderWorkerPool(2, exe=fake_blender_exe, worker_script=tools_dir / "blender_worker_v1.py")
+    try:
+        worker_pids = {w["pid"] for w in pool.stats()["workers"]}
+        results = [pool.run_script(echo_script, ["--name", f"C{i}"]) for i in range(4)]
+        assert [r["argv"] for r in results] == [["--name", f"C{i}"] for i in range(4)]
+        assert {r["pid"] for r in results} <= worker_pids
+        # every command starts from the factory scene, like a fresh process would
+        assert all(r["objects"] == ["Camera", "Cube", "Light", "Scratch"] for r in results)
+        assert [h["ok"] for h in pool.health_check()] == [True, True]
+    finally:
+        pool.shutdown()
+
+
+def test_pool_restarts_crashed_worker(fake_blender_exe, tmp_path, tools_dir, echo_script):
+    crash = _script(tmp_path, tools_dir, "crash.py", "os._exit(3)\n")
+    pool = BlenderWorkerPool(1, exe=fake_blender_exe, worker_script=tools_dir / "blender_worker_v1.py")
+    try:
+        with pytest.raises(AtlasError) as ei:
+            pool.run_script(crash, [])
+        assert ei.value.message == "Blender worker crashed"
+        assert pool.run_script(echo_script, ["ok"])["argv"] == ["ok"]
+        assert pool.stats()["workers"][0]["restarts"] == 1
+
+        failing = _script(tmp_path, tools_dir, "fail.py", "raise RuntimeError('boom')\n")
+        with pytest.raises(AtlasError) as ei:
+            pool.run_script(failing, [])
+        assert ei.value.data["error"]["message"] == "boom"
+        assert pool.stats()["workers"][0]["restarts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_run_blender_script_routes_through_pool(monkeypatch, fake_blender_exe, tmp_path, tools_dir, echo_script):
+    monkeypatch.chdir(tools_dir.parent)
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.setenv("ATLAS_BLENDER_POOL_SIZE", "1")
+    try:
+        a = run_blender_script(echo_script, extra_args=["x"])
+        b = run_blender_script(echo_script, extra_args=["y"])
+        assert (a["argv"], b["argv"]) == (["x"], ["y"])
+        assert a["pid"] == b["pid"]
+
+        out = tmp_path / "out.json"
+        writer = _script(tmp_path, tools_dir, "writer.py", "open(argv[1], 'w').write('{\"k\": 1}')\n")
+        assert run_blender_script(writer, out_json_path=out) == {"k": 1}
+        assert json.loads(out.read_text()) == {"k": 1}
+    finally:
+        shutdown_blender_pool()
+
+
+def test_resident_workspace_saves_only_at_checkpoints(fake_blender_exe, tmp_path, tools_dir):
+    ws = tmp_path / "workspace.blend"
+    ws.write_text(json.dumps({"objects": ["Seed"]}), encoding="utf-8")
+    add = _script(tmp_path, tools_dir, "add.py", "bpy.data.objects.append(argv[0])\nemit_result(list(bpy.data.objects))\n")
+    log = _script(tmp_path, tools_dir, "log.py", "emit_result(bpy.fake_log)\n")
+
+    def on_disk():
+        return json.loads(ws.read_text(encoding="utf-8"))["objects"]
+
+
+    pool = BlenderWorkerPool(
+        1, exe=fake_blender_exe, worker_script=tools_dir / "blender_worker_v1.py", resident=True, checkpoint_every=2
+    )
+    try:
+        assert pool.run_script(add, ["A"], workspace=ws, mutates=True) == ["Seed", "A"]
+        assert on_disk() == ["Seed"]
+        assert pool.run_script(add, ["B"], workspace=ws, mutates=True) == ["Seed", "A", "B"]
+        assert on_disk() == ["Seed", "A", "B"]  # checkpoint after 2 mutations
+        pool.run_script(add, ["C"], workspace=ws, mutates=True)
+        assert pool.resident_workspaces() == [str(ws.resolve())]
+
+        # the scene was opened once and never reloaded between calls
+        ops = [op[0] for op in pool.run_script(log, [], workspace=ws)]
+        assert ops.count("open") == 1 and ops.count("save") == 1
+
+        assert pool.flush(ws) == [{"path": str(ws.resolve()), "saved": True}]
+        assert on_disk() == ["Seed", "A", "B", "C"]
+        assert pool.flush(ws) == [{"path": str(ws.resolve()), "saved": False}]
+
+        # a non-resident request takes over the only worker: dirty scene is saved first
+        pool.run_script(add, ["D"], workspace=ws, mutates=True)
+        pool.run_script(log, [])
+        assert on_disk() == ["Seed", "A", "B", "C", "D"]
+        assert pool.resident_workspaces() == []
+
+        pool.run_script(add, ["E"], workspace=ws, mutates=True)
+    finally:
+        pool.shutdown()
+    assert on_disk() == ["Seed", "A", "B", "C", "D", "E"]  # saved on shutdown
+
+
+def test_resident_failed_mutation_leaves_scene_and_file_unchanged(fake_blender_exe, tmp_path, tools_dir):
+    ws = tmp_path / "workspace.blend"
+    ws.write_text(json.dumps({"objects": ["Seed"]}), encoding="utf-8")
+    add = _script(tmp_path, tools_dir, "add.py", "bpy.data.objects.append(argv[0])\nemit_result(list(bpy.data.objects))\n")
+    # an exec_ops-style batch that stops partway: first op applied, then reports failure
+    partial = _script(
+        tmp_path, tools_dir, "partial.py",
+        "bpy.data.objects.append(argv[0])\nemit_result({'ok': False, 'results': [{'ok': True}, {'ok': False}]})\n",
+    )
+    scene = _script(tmp_path, tools_dir, "scene.py", "emit_result(list(bpy.data.objects))\n")
+
+    def on_disk():
+        return json.loads(ws.read_text(encoding="utf-8"))["objects"]
+
+    pool = BlenderWorkerPool(
+        1, exe=fake_blender_exe, worker_script=tools_dir / "blender_worker_v1.py", resident=True, checkpoint_every=2
+    )
+    try:
+        # clean scene: rolled back to the checkpoint
+        with pytest.raises(AtlasError):
+            pool.run_script(partial, ["Bad1"], workspace=ws, mutates=True)
+        assert pool.run_script(scene, [], workspace=ws) == ["Seed"]
+        assert pool.flush(ws) == [{"path": str(ws.resolve()), "saved": False}]
+
+        # dirty scene: rolled back to the copy taken before the batch
+        pool.run_script(add, ["A"], workspace=ws, mutates=True)
+        with pytest.raises(AtlasError):
+            pool.run_script(partial, ["Bad2"], workspace=ws, mutates=True)
+        assert pool.run_script(scene, [], workspace=ws) == ["Seed", "A"]
+        assert on_disk() == ["Seed"]  # the failure did not count towards a checkpoint
+        assert not list(tmp_path.glob("*.atlas-rollback.blend"))
+        assert pool.flush(ws) == [{"path": str(ws.resolve()), "saved": True}]
+    finally:
+        pool.shutdown()
+    assert on_disk() == ["Seed", "A"]
+
+
+def test_crashed_resident_worker_reports_lost_workspace(fake_blender_exe, tmp_path, tools_dir):
+    ws = tmp_path / "workspace.blend"
+    ws.write_text(json.dumps({"objects": ["Seed"]}), encoding="utf-8")
+    add = _script(tmp_path, tools_dir, "add.py", "bpy.data.objects.append(argv[0])\nemit_result(list(bpy.data.objects))\n")
+    crash = _script(tmp_path, tools_dir, "crash.py", "os._exit(3)\n")
+    lost = []
+    pool = BlenderWorkerPool(
+        1,
+        exe=fake_blender_exe,
+        worker_script=tools_dir / "blender_worker_v1.py",
+        resident=True,
+        checkpoint_every=0,
+        on_lost_workspace=lost.append,
+    )
+    try:
+        pool.run_script(add, ["A"], workspace=ws, mutates=True)
+        with pytest.raises(AtlasError) as ei:
+            pool.run_script(crash, [], workspace=ws, mutates=True)
+        # "A" was never saved: the file (and so the snapshot cache key) looks unchanged
+        assert ei.value.data["lost_workspace"] == str(ws.resolve())
+        assert lost == [str(ws.resolve())]
+        assert pool.run_script(add, ["B"], workspace=ws, mutates=True) == ["Seed", "B"]
+    finally:
+        pool.shutdown()
+
+
+def test_lost_workspace_invalidates_cached_snapshots(monkeypatch, fake_blender_exe, tmp_path, tools_dir):
+    monkeypatch.chdir(tools_dir.parent)
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.setenv("ATLAS_BLENDER_POOL_SIZE", "1")
+    monkeypatch.setenv("ATLAS_BLENDER_RESIDENT", "1")
+    ws = tmp_path / "workspace.blend"
+    ws.write_text(json.dumps({"objects": ["Seed"]}), encoding="utf-8")
+    add = _script(tmp_path, tools_dir, "add.py", "bpy.data.objects.append(argv[0])\nemit_result(list(bpy.data.objects))\n")
+    crash = _script(tmp_path, tools_dir, "crash.py", "os._exit(3)\n")
+    snap = tmp_path / "after.json"
+    snap.write_text("{}", encoding="utf-8")
+    cache = SnapshotCache()
+    try:
+        run_blender_script(add, extra_args=["A"], blend_path=ws, mutates=True)
+        cache.put("v2", ws, {"objects": ["Seed", "A"]}, snap)
+        assert cache.get("v2", ws) is not None
+        with pytest.raises(AtlasError):
+            run_blender_script(crash, blend_path=ws)
+        assert cache.get("v2", ws) is None  # the scene is back at its checkpoint
+    finally:
+        shutdown_blender_pool()
@@ -29,3 +29,57 @@ def test_blender_snapshot_v1(tmp_path):
     assert "scene" in data
     assert "objects" in data
     assert isinstance(data["objects"], list)
+
+
+def _load_snapshot_v2(monkeypatch):
+    import importlib
+    import sys
+    import types
+
+    monkeypatch.setitem(sys.modules, "bpy", types.ModuleType("bpy"))
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[1] / "tools"))
+    monkeypatch.delitem(sys.modules, "blender_snapshot_v2", raising=False)
+    return importlib.import_module("blender_snapshot_v2")
+
+
+def test_snapshot_v2_vectorized_math_matches_mathutils(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("mathutils")
+    from mathutils import Euler, Matrix, Vector
+
+    mod = _load_snapshot_v2(monkeypatch)
+    rng = np.random.default_rng(7)
+    mats = []
+    for i in range(2000):
+        rot = Euler(rng.uniform(-7, 7, 3).tolist()) if i % 4 else Euler([float(a) for a in rng.choice([0.0, np.pi / 2, -np.pi], 3)])
+        scale = [float(rng.choice([1.0, -2.5, 0.0, rng.uniform(0.01, 10)])) for _ in range(3)]
+        m = Matrix.Translation(Vector(rng.uniform(-100, 100, 3).tolist())) @ rot.to_matrix().to_4x4()
+        mats.append(m @ Matrix.Diagonal(Vector(scale + [1.0])))
+    # Blender's float32 [col][row] storage, as foreach_get("matrix_world") returns it
+    mw = np.array([[[m[r][c] for r in range(4)] for c in range(4)] for m in mats], dtype=np.float32)
+    bb = rng.uniform(-3, 3, (len(mats), 8, 3)).astype(np.float32)
+    mats = [Matrix([[float(mw[i, c, r]) for c in range(4)] for r in range(4)]) for i in range(len(mats))]
+
+    loc, rot, scl, mn, mx, unsure = mod._decompose(mw, bb)
+    for i, m in enumerate(mats):
+        assert mod._stable3(loc[i].tolist()) == mod._stable3(m.to_translation())
+        assert mod._stable3(scl[i].tolist()) == mod._stable3(m.to_scale())
+        if not unsure[i]:
+            assert mod._stable3(rot[i].tolist()) == mod._stable3(m.to_euler())
+        pts = [m @ Vector([float(v) for v in corner]) for corner in bb[i]]
+        assert mod._stable3(mn[i].tolist()) == mod._stable3([min(p[k] for p in pts) for k in range(3)])
+        assert mod._stable3(mx[i].tolist()) == mod._stable3([max(p[k] for p in pts) for k in range(3)])
+
+
+def test_blender_snapshot_v2_vectorized_matches_loop(tmp_path, monkeypatch):
+    if not os.environ.get("ATLAS_BLENDER_EXE"):
+        pytest.skip("ATLAS_BLENDER_EXE not set")
+
+    reg = build_registry()
+    out = {}
+    for mode in ("0", "1"):
+        monkeypatch.setenv("ATLAS_SNAPSHOT_VECTORIZED", mode)
+        path = tmp_path / f"snapshot.{mode}.json"
+        reg.call_tool("atlas.blender.snapshot_v2", {"out_path": str(path)})
+        out[mode] = path.read_bytes()
+    assert out["0"] == out["1"]
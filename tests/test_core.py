@@ -1,3 +1,16 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from atlas import result_cache, tools_diff
+from atlas.cancel import check_cancelled
+from atlas.contract import AtlasError
+from atlas.log_jsonl import snapshot_ref
+from atlas.registry import ToolRegistry, compile_schema, text_result
+from atlas.result_cache import ResultCache
 from atlas.tools_core import build_registry
 
 
@@ -19,3 +32,247 @@ def test_echo_validates_schema():
     reg = build_registry()
     res = reg.call_tool("atlas.echo", {"text": "hello"})
     assert "hello" in res["content"][0]["text"]
+
+
+def test_tools_list_json_is_cached_until_register():
+    reg = build_registry()
+    first = reg.tools_list_json()
+    assert reg.tools_list_json() is first
+    assert json.loads(first) == {"tools": reg.list_tools()}
+    reg.register(
+        {"name": "atlas.zz_extra", "description": "x", "inputSchema": {"type": "object", "properties": {}}},
+        lambda args: text_result("x"),
+    )
+    assert json.loads(reg.tools_list_json())["tools"][-1]["name"] == "atlas.zz_extra"
+
+
+@pytest.mark.parametrize(
+    "location,msg",
+    [
+        ({"x": "1", "y": 0, "z": 0}, "Field 'location.x' must be number"),
+        ({"x": 1, "w": 0}, "Unexpected field: location.w"),
+        ({"x": True}, "Field 'location.x' must be number"),
+        ([1, 2, 3], "Field 'location' must be object"),
+    ],
+)
+def test_add_cube_location_is_validated_before_blender(location, msg, monkeypatch):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", "/nonexistent/blender")
+    reg = build_registry()
+    with pytest.raises(AtlasError) as ei:
+        reg.call_tool("atlas.blender.add_cube_v1", {"name": "C", "location": location})
+    assert (ei.value.code, ei.value.message) == ("INVALID_ARGUMENTS", msg)
+
+
+def test_compiled_schema_nested_arrays_enums_and_bounds():
+    check = compile_schema(
+        {
+            "type": "object",
+            "properties": {
+                "mode": {"enum": ["a", "b"]},
+                "n": {"type": "integer", "minimum": 1, "exclusiveMaximum": 10},
+                "pts": {
+                    "type": "array",
+                    "maxItems": 3,
+                    "items": {"type": "object", "required": ["x"], "properties": {"x": {"type": "number"}}},
+                },
+                "tag": {"type": "string", "minLength": 1},
+            },
+            "additionalProperties": False,
+        }
+    )
+    check({"mode": "a", "n": 9, "pts": [{"x": 1}, {"x": 2.5}], "tag": "t"})
+    for args, msg in [
+        ({"mode": "c"}, 'Field \'mode\' must be one of: "a", "b"'),
+        ({"n": 0}, "Field 'n' must be >= 1"),
+        ({"n": 10}, "Field 'n' must be < 10"),
+        ({"n": 2.0}, "Field 'n' must be integer"),
+        ({"pts": [{"x": 1}, {}]}, "Missing required field: pts[1].x"),
+        ({"pts": [{"x": 1}, {"x": "2"}]}, "Field 'pts[1].x' must be number"),
+        ({"pts": [{"x": 1}] * 4}, "Field 'pts' must have at most 3 items"),
+        ({"tag": ""}, "Field 'tag' length must be >= 1"),
+        ({"extra": 1}, "Unexpected field: extra"),
+        ([], "arguments must be an object"),
+    ]:
+        with pytest.raises(AtlasError) as ei:
+            check(args)
+        assert ei.value.message == msg
+
+
+def test_compiled_schema_type_unions_and_nested_item_paths():
+    check = compile_schema(
+        {
+            "type": "object",
+            "properties": {
+                "note": {"type": ["string", "null"]},
+                "n": {"type": ["integer", "null"], "minimum": 0},
+                "rows": {"type": "array", "items": {"type": "array", "items": {"type": "object", "required": ["id"]}}},
+            },
+        }
+    )
+    check({"note": None, "n": None, "rows": [[{"id": 1}]]})
+    check({"note": "x", "n": 3})
+    for args, msg in [
+        ({"note": 1}, "Field 'note' must be string or null"),
+        ({"n": -1}, "Field 'n' must be >= 0"),
+        ({"n": True}, "Field 'n' must be integer or null"),
+        ({"rows": [[{"id": 1}], [{"id": 2}, {}]]}, "Missing required field: rows[1][1].id"),
+    ]:
+        with pytest.raises(AtlasError) as ei:
+            check(args)
+        assert ei.value.message == msg
+    with pytest.raises(AtlasError) as ei:
+        compile_schema({"type": "object", "properties": {"x": {"type": ["string", "date"]}}})
+    assert ei.value.message == "unsupported schema type for x: ['string', 'date']"
+
+
+def test_lazy_registry_matches_eager_and_imports_groups_on_first_call():
+    assert build_registry().tools_list_json() == build_registry(lazy=False).tools_list_json()
+    probe = (
+        "import sys\n"
+        "from atlas.tools_core import build_registry\n"
+        "reg = build_registry()\n"
+        "reg.tools_list_json()\n"
+        "loaded = lambda: sorted(m for m in sys.modules if m.startswith('atlas.tools_'))\n"
+        "before = loaded()\n"
+        "reg.call_tool('atlas.snapshot.diff_v1', {'a': {'objects': []}, 'b': {'objects': []}})\n"
+        "print(before, loaded())\n"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "['atlas.tools_core'] ['atlas.tools_core', 'atlas.tools_diff']"
+
+
+def test_call_tool_obj_skips_the_json_round_trip(monkeypatch):
+    reg = build_registry()
+    snap = {"objects": [{"name": "Cube", "type": "MESH"}]}
+    res = reg.call_tool_obj("atlas.snapshot.diff_v2", {"a": snap, "b": snap})
+    assert json.loads(reg.call_tool("atlas.snapshot.diff_v2", {"a": snap, "b": snap})["content"][0]["text"]) == res
+    assert reg.call_tool_obj("atlas.echo", {"text": "hi"}) == {"echo": "hi"}
+    reg.register_json(
+        {"name": "atlas.zz_obj", "description": "x", "inputSchema": {"type": "object", "required": ["n"]}},
+        lambda args: {"n": args["n"]},
+    )
+
+    def no_dumps(*a, **k):
+        raise AssertionError("json.dumps on the in-process path")
+
+    monkeypatch.setattr(json, "dumps", no_dumps)
+    assert reg.call_tool_obj("atlas.zz_obj", {"n": 1}) == {"n": 1}
+    with pytest.raises(AtlasError) as ei:
+        reg.call_tool_obj("atlas.zz_obj", {})
+    assert ei.value.code == "INVALID_ARGUMENTS"
+    # text-only tools: the text is decoded as JSON
+    with pytest.raises(AtlasError) as ei:
+        reg.call_tool_obj("atlas.ping", {})
+    assert ei.value.code == "INTERNAL_ERROR"
+
+
+def test_pure_tool_results_are_memoized_by_canonical_arguments():
+    reg = build_registry()
+    a = {"objects": [{"name": "Cube", "type": "MESH", "location": [0, 0, 0]}]}
+    b = {"objects": [{"name": "Cube", "type": "MESH", "location": [1, 0, 0]}]}
+    first = reg.call_tool("atlas.snapshot.diff_v2", {"a": a, "b": b})
+    # same arguments in another key order: one hash, no diff
+    again = reg.call_tool("atlas.snapshot.diff_v2", {"b": dict(b), "a": dict(a)})
+    assert again == first and again is not first
+    assert reg.call_tool_obj("atlas.snapshot.diff_v2", {"a": a, "b": b}) == json.loads(first["content"][0]["text"])
+    stats = reg.result_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    # impure tools are never cached
+    reg.register(
+        {"name": "atlas.zz_count", "description": "x", "inputSchema": {"type": "object", "properties": {}}},
+        lambda args: text_result(str(reg.result_cache.stats()["misses"])),
+    )
+    reg.call_tool("atlas.zz_count", {})
+    assert reg.result_cache.stats()["misses"] == 1
+
+
+def test_pure_diff_of_snapshot_refs_hits_without_serializing_snapshots(tmp_path, monkeypatch):
+    reg = build_registry()
+    refs = {}
+    for k, n in (("a", 1), ("b", 2)):
+        snap = {"objects": [{"name": f"Cube_{i}", "type": "MESH", "location": [i, 0, 0]} for i in range(n * 200)]}
+        p = tmp_path / f"{k}.json"
+        p.write_text(json.dumps(snap), encoding="utf-8")
+        refs[k] = snapshot_ref(p, snap)
+    first = reg.call_tool_obj("atlas.snapshot.diff_v2", refs)
+    assert first["counts"]["added"] == 200
+
+    canon_sizes, loads = [], []
+    canon = result_cache.canon
+    monkeypatch.setattr(result_cache, "canon", lambda obj: canon_sizes.append(len(canon(obj))) or canon(obj))
+    monkeypatch.setattr(tools_diff, "resolve_snapshot", lambda *a, **k: loads.append(a))
+    assert reg.call_tool_obj("atlas.snapshot.diff_v2", refs) == first
+    # the hit hashed the two small references: no snapshot was loaded or serialized
+    assert reg.result_cache.stats()["hits"] == 1
+    assert loads == [] and max(canon_sizes) < 512
+
+
+def test_tools_list_shows_only_mcp_spec_fields():
+    reg = build_registry()
+    listed = {t["name"]: t for t in json.loads(reg.tools_list_json())["tools"]}
+    assert all(set(t) == {"name", "description", "inputSchema"} for t in listed.values())
+    assert "pure" not in listed["atlas.echo"]
+    assert "timeout" not in listed["atlas.blender.add_cube_v1"]
+    assert "timeout" not in listed["atlas.run.step_v2"]
+    assert reg.list_tools() == list(listed.values())
+
+
+def test_pure_tool_results_are_not_shared_between_callers():
+    reg = build_registry()
+    args = {"a": {"objects": []}, "b": {"objects": [{"name": "Cube", "type": "MESH"}]}}
+    text = reg.call_tool("atlas.snapshot.diff_v2", args)["content"][0]["text"]
+    for _ in range(2):
+        obj = reg.call_tool_obj("atlas.snapshot.diff_v2", args)
+        obj["added"].append("Mutated")
+        reg.call_tool("atlas.snapshot.diff_v2", args)["content"][0]["text"] = "mutated"
+    assert reg.call_tool_obj("atlas.snapshot.diff_v2", args) == json.loads(text)
+    assert reg.call_tool("atlas.snapshot.diff_v2", args)["content"][0]["text"] == text
+
+
+def test_result_cache_evicts_least_recently_used_by_size():
+    reg = ToolRegistry(result_cache=ResultCache(max_bytes=64))
+    calls = []
+    reg.register_json(
+        {"name": "atlas.zz_pad", "description": "x", "pure": True, "inputSchema": {"type": "object", "properties": {"n": {"type": "integer"}}}},
+        lambda args: calls.append(args["n"]) or "x" * 20,
+    )
+    for n in (1, 2, 1, 3, 1, 2):
+        assert reg.call_tool_obj("atlas.zz_pad", {"n": n}) == "x" * 20
+    # 22-byte results, 64-byte budget: 3 evicts 2 (1 was used more recently), then 2 comes back
+    assert calls == [1, 2, 3, 2]
+    assert reg.result_cache.stats() == {
+        "entries": 2,
+        "bytes": 44,
+        "max_bytes": 64,
+        "hits": 2,
+        "misses": 4,
+        "evictions": 2,
+    }
+
+
+def test_tool_timeout_cancels_at_the_next_step_boundary():
+    reg = build_registry()
+    spec = {"name": "atlas.zz_steps", "description": "x", "inputSchema": {"type": "object", "properties": {}}}
+    steps = []
+
+    def loop(args):
+        for i in range(200):
+            check_cancelled()
+            steps.append(i)
+            time.sleep(0.01)
+        return {"done": True}
+
+    reg.register_json(dict(spec, timeout=0.2), loop)
+    with pytest.raises(AtlasError) as ei:
+        reg.call_tool("atlas.zz_steps", {})
+    assert ei.value.code == "CANCELLED" and ei.value.data["reason"] == "timeout"
+    assert 0 < len(steps) < 200
+
+
+@pytest.mark.parametrize("value", ["abc", "-1", "nan"])
+def test_bad_tool_timeout_env_is_reported(value, monkeypatch):
+    monkeypatch.setenv("ATLAS_TOOL_TIMEOUT", value)
+    with pytest.raises(AtlasError) as ei:
+        build_registry()
+    assert ei.value.code == "INVALID_REQUEST"
+    assert ei.value.message.startswith("ATLAS_TOOL_TIMEOUT must be")
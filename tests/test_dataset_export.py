@@ -0,0 +1,96 @@
+import ast
+import json
+import math
+
+import pytest
+
+from atlas import dataset_export
+from atlas.dataset_export import export_dataset, load_shards
+from atlas.log_jsonl import JsonlLogger
+from atlas.tools_core import build_registry
+
+
+def _step(root, i, with_score=True):
+    with JsonlLogger(root / f"step-{i}.jsonl", f"step-{i}") as logger:
+        logger.write("snapshot_before_v2", {"path": "b", "snapshot": {"objects": []}})
+        args = {"name": f"Cube_{i}", "location": {"x": float(i), "y": 0.0, "z": 1.0}}
+        if i % 2:
+            args["size"] = 2
+        logger.write("action", {"tool": "atlas.blender.add_cube_v1", "args": args}, ok=True)
+        logger.write("snapshot_after_v2", {"path": "a", "fingerprint": f"fp{i}", "bytes": 10})
+        logger.write("diff_v2", {"counts": {"added": 1, "removed": 0, "changed": i}})
+        if with_score:
+            logger.write("score_v2", {"score": 1.0 + i})
+
+
+def _npy(path):
+    raw = path.read_bytes()
+    n = int.from_bytes(raw[8:10], "little")
+    header = ast.literal_eval(raw[10 : 10 + n].decode("latin1"))
+    return header, (10 + n) % 64
+
+
+def test_export_is_incremental(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    for i in range(3):
+        _step(logs, i)
+    _step(logs, 3, with_score=False)  # still running: not exported yet
+    first = export_dataset([logs], tmp_path / "ds", fmt="npy")
+    assert (first["added_rows"], first["new_shards"]) == (3, ["shard-000001"])
+    shard = tmp_path / "ds" / "shard-000001"
+    assert _npy(shard / "score.npy") == ({"descr": "<f8", "fortran_order": False, "shape": (3,)}, 0)
+    assert _npy(shard / "run_id.npy")[0]["descr"] == "<U6"
+    assert _npy(shard / "arg.location.x.npy")[0]["descr"] == "<f8"
+    assert _npy(shard / "arg.name.npy")[0]["descr"] == "<U6"
+
+    _step(logs, 3)
+    again = export_dataset([logs], tmp_path / "ds")
+    assert (again["added_rows"], again["total_rows"]) == (1, 4)
+    assert export_dataset([logs], tmp_path / "ds")["added_rows"] == 0
+    manifest = json.loads((tmp_path / "ds" / "manifest.json").read_text())
+    assert manifest["run_ids"] == ["step-0", "step-1", "step-2", "step-3"]
+
+
+def test_export_columns_load_with_numpy(tmp_path):
+    np = pytest.importorskip("numpy")
+    for i in range(4):
+        _step(tmp_path / "logs", i)
+    res = build_registry().call_tool(
+        "atlas.logs.export_v1", {"paths": [str(tmp_path / "logs")], "out_dir": str(tmp_path / "ds"), "format": "npy", "shard_rows": 3}
+    )
+    assert json.loads(res["content"][0]["text"])["new_shards"] == ["shard-000001", "shard-000002"]
+    a, b = load_shards(tmp_path / "ds")
+    assert isinstance(a["score"], np.memmap)
+    assert list(a["row_index"]) + list(b["row_index"]) == [0, 1, 2, 3]
+    assert list(a["changed"]) == [0, 1, 2]
+    assert list(a["action_ok"]) == [True, True, True]
+    assert list(a["after_fingerprint"]) == ["fp0", "fp1", "fp2"]
+    assert a["before_fingerprint"][0] == a["before_fingerprint"][1] != ""
+    assert math.isnan(a["arg.size"][0]) and a["arg.size"][1] == 2.0
+    assert list(b["arg.location.x"]) == [3.0]
+
+
+def test_export_resumes_over_a_shard_left_by_a_crash(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    for i in range(2):
+        _step(logs, i)
+    replace = dataset_export.os.replace
+
+    def crash_on_manifest(src, dst):
+        if str(dst).endswith("manifest.json"):
+            raise OSError("killed")
+        replace(src, dst)
+
+    monkeypatch.setattr(dataset_export.os, "replace", crash_on_manifest)
+    with pytest.raises(OSError):
+        export_dataset([logs], tmp_path / "ds", fmt="npy", shard_rows=1)
+    monkeypatch.undo()
+    assert (tmp_path / "ds" / "shard-000001").is_dir()
+    assert not (tmp_path / "ds" / "manifest.json").exists()
+
+    res = export_dataset([logs], tmp_path / "ds", fmt="npy", shard_rows=1)
+    assert (res["added_rows"], res["new_shards"]) == (2, ["shard-000001", "shard-000002"])
+    shard = tmp_path / "ds" / "shard-000001"
+    assert _npy(shard / "row_index.npy")[0]["shape"] == (1,)
+    assert json.loads((tmp_path / "ds" / "manifest.json").read_text())["run_ids"] == ["step-0", "step-1"]
@@ -0,0 +1,98 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+from atlas.blender_backend import run_blender_script, run_blender_script_async
+from atlas.cancel import cancel_scope
+from atlas.contract import AtlasError
+from atlas.framing import OutputTail, encode_frame, read_frame
+
+NOISY_SCRIPT = """
+import sys
+sys.path.insert(0, {tools!r})
+from atlas_bpy_io import emit_result
+
+print('{{"looks": "like json"}}')
+print("x" * 100000)
+sys.stdout.write("no trailing newline")
+sys.stdout.flush()
+emit_result({{"schema": "test.v1", "value": {value}}})
+print('{{"trailing": "noise"}}')
+"""
+
+
+def _script(tmp_path, tools_dir, value="1"):
+    p = tmp_path / "noisy.py"
+    p.write_text(NOISY_SCRIPT.format(tools=str(tools_dir), value=value), encoding="utf-8")
+    return p
+
+
+def test_read_frame_skips_noise_and_glued_marker():
+    noise = []
+    stream = io.BytesIO(b"Blender 4.2\n{\"a\": 1}\n" + b"partial" + encode_frame({"b": 2}) + b"tail\n")
+    assert read_frame(stream, noise.append) == {"b": 2}
+    assert noise == [b"Blender 4.2\n", b"{\"a\": 1}\n", b"partial"]
+    assert read_frame(stream, noise.append) is None
+    assert noise[-1] == b"tail\n"
+
+
+def test_output_tail_is_bounded():
+    tail = OutputTail(max_lines=3, max_line_chars=5)
+    tail.drain(io.BytesIO(b"".join(b"line-%d\n" % i for i in range(10))))
+    assert tail.lines() == ["line-", "line-", "line-"]
+    assert tail.total_bytes == 70
+
+
+def test_oneshot_result_frame_ignores_stdout_noise(tmp_path, fake_blender_exe, tools_dir, monkeypatch):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.delenv("ATLAS_BLENDER_POOL_SIZE", raising=False)
+    assert run_blender_script(_script(tmp_path, tools_dir)) == {"schema": "test.v1", "value": 1}
+
+
+def test_oneshot_without_result_reports_tails(tmp_path, fake_blender_exe, monkeypatch):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.delenv("ATLAS_BLENDER_POOL_SIZE", raising=False)
+    script = tmp_path / "silent.py"
+    script.write_text("print('{\"not\": \"a result\"}')\n", encoding="utf-8")
+    with pytest.raises(AtlasError) as ei:
+        run_blender_script(script)
+    assert ei.value.message == "Blender produced no result"
+    assert '{"not": "a result"}' in ei.value.data["stdout"]
+
+
+def test_async_oneshot_matches_sync_and_runs_concurrently(tmp_path, fake_blender_exe, tools_dir, monkeypatch):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.delenv("ATLAS_BLENDER_POOL_SIZE", raising=False)
+    scripts = []
+    for i in range(4):
+        d = tmp_path / str(i)
+        d.mkdir()
+        scripts.append(_script(d, tools_dir, value=str(i)))
+
+    async def run_all():
+        return await asyncio.gather(*(run_blender_script_async(s) for s in scripts))
+
+    assert asyncio.run(run_all()) == [{"schema": "test.v1", "value": i} for i in range(4)]
+
+    silent = tmp_path / "silent.py"
+    silent.write_text("print('{\"not\": \"a result\"}')\n", encoding="utf-8")
+    with pytest.raises(AtlasError) as ei:
+        asyncio.run(run_blender_script_async(silent))
+    assert ei.value.message == "Blender produced no result"
+    assert '{"not": "a result"}' in ei.value.data["stdout"]
+
+
+def test_cancelled_oneshot_kills_blender(tmp_path, fake_blender_exe, monkeypatch):
+    monkeypatch.setenv("ATLAS_BLENDER_EXE", fake_blender_exe)
+    monkeypatch.delenv("ATLAS_BLENDER_POOL_SIZE", raising=False)
+    script = tmp_path / "hang.py"
+    script.write_text("import time\ntime.sleep(60)\n", encoding="utf-8")
+    t0 = time.monotonic()
+    with pytest.raises(AtlasError) as ei:
+        with cancel_scope(timeout=0.5):
+            run_blender_script(script)
+    assert time.monotonic() - t0 < 30
+    assert ei.value.code == "CANCELLED"
+    assert ei.value.data == {"reason": "timeout", "timeout": 0.5}
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+import pytest
+
+from atlas.contract import AtlasError
+from atlas.log_jsonl import AsyncJsonlLogger, JsonlLogger
+
+
+def _lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_logger_buffers_until_step_boundary(tmp_path):
+    p = tmp_path / "runs" / "r.jsonl"
+    with JsonlLogger(p, "r", buffer_bytes=1 << 20, flush_interval=3600) as logger:
+        logger.write("a", {"x": 1})
+        logger.write("b", {"x": 2}, ok=False, error={"code": "E"})
+        assert _lines(p) == []
+        logger.end_step()
+        evs = _lines(p)
+        assert [(e["kind"], e["step"], e["ok"]) for e in evs] == [("a", 0, True), ("b", 1, False)]
+        logger.write("c", {})
+    assert [e["kind"] for e in _lines(p)] == ["a", "b", "c"]
+    assert logger._f is None
+
+
+def test_logger_size_threshold_and_event_fsync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("atlas.log_jsonl.os.fsync", synced.append)
+    p = tmp_path / "r.jsonl"
+    with JsonlLogger(p, "r", buffer_bytes=1, flush_interval=3600) as logger:
+        logger.write("a", {})
+        assert len(_lines(p)) == 1
+        assert synced == []
+    q = tmp_path / "q.jsonl"
+    with JsonlLogger(q, "q", fsync="event") as logger:
+        logger.write("a", {})
+        logger.write("b", {})
+        assert len(_lines(q)) == 2
+        assert len(synced) == 2
+
+
+def test_logger_appends_and_rejects_bad_policy(tmp_path):
+    p = tmp_path / "r.jsonl"
+    for _ in range(2):
+        with JsonlLogger(p, "r") as logger:
+            logger.write("a", {})
+    assert len(_lines(p)) == 2
+    with pytest.raises(AtlasError):
+        JsonlLogger(p, "r", fsync="always")
+
+
+def test_async_logger_is_ordered_under_backpressure(tmp_path):
+    p = tmp_path / "r.jsonl"
+    with AsyncJsonlLogger(p, "r", queue_size=2, buffer_bytes=1 << 20, flush_interval=3600) as logger:
+        for i in range(500):
+            logger.write("e", {"i": i})
+        logger.flush()
+        assert [e["payload"]["i"] for e in _lines(p)] == list(range(500))
+        logger.write("last", {})
+    evs = _lines(p)
+    assert [e["step"] for e in evs] == list(range(501))
+    assert not logger._thread.is_alive()
+
+
+def test_async_logger_surfaces_writer_errors(tmp_path):
+    p = tmp_path / "r.jsonl"
+    p.mkdir()  # the writer can't open a directory for append
+    logger = AsyncJsonlLogger(p, "r", buffer_bytes=1)
+    logger.write("a", {})
+    with pytest.raises(AtlasError) as ei:
+        logger.flush()
+    assert ei.value.code == "INTERNAL_ERROR"
+    with pytest.raises(AtlasError):
+        logger.write("b", {})
+    with pytest.raises(AtlasError):
+        logger.close()
+    logger.close()  # once closed, stays closed
+
+
+@pytest.mark.parametrize("cls", [JsonlLogger, AsyncJsonlLogger])
+def test_logger_moves_between_runs(tmp_path, cls):
+    with cls(tmp_path / "a.jsonl", "a", buffer_bytes=1 << 20, flush_interval=3600) as logger:
+        logger.write("x", {})
+        logger.start_run("b", tmp_path / "runs" / "b.jsonl")
+        logger.write("y", {})
+        logger.write("z", {})
+        logger.flush()
+        assert [(e["run_id"], e["step"]) for e in _lines(tmp_path / "a.jsonl")] == [("a", 0)]
+        assert [(e["run_id"], e["step"]) for e in _lines(tmp_path / "runs" / "b.jsonl")] == [("b", 0), ("b", 1)]
+
+
+def test_async_logger_writes_out_an_idle_buffer(tmp_path):
+    p = tmp_path / "r.jsonl"
+    with AsyncJsonlLogger(p, "r", buffer_bytes=1 << 20, flush_interval=0.05) as logger:
+        logger.write("a", {})
+        deadline = time.monotonic() + 5
+        while not _lines(p) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # no later write, end_step or close needed
+        assert len(_lines(p)) == 1
+
+
+def test_async_logger_end_step_does_not_wait_for_the_disk(tmp_path, monkeypatch):
+    gate = threading.Event()
+    flush = JsonlLogger._flush
+
+    def slow_flush(self, *, sync):
+        gate.wait(5)
+        flush(self, sync=sync)
+
+    monkeypatch.setattr(JsonlLogger, "_flush", slow_flush)
+    registered = []
+    monkeypatch.setattr("atlas.log_jsonl.atexit.register", registered.append)
+    p = tmp_path / "r.jsonl"
+    logger = AsyncJsonlLogger(p, "r", buffer_bytes=1 << 20, flush_interval=3600)
+    logger.write("a", {})
+    logger.end_step()  # returns while the writer is still blocked
+    assert _lines(p) == []
+    gate.set()
+    logger.close()
+    assert [e["kind"] for e in _lines(p)] == ["a"]
+    assert registered == []  # no exit hook per logger
@@ -0,0 +1,58 @@
+import json
+
+from atlas.log_jsonl import JsonlLogger
+from atlas.log_reader import LogQuery, iter_log_events
+from atlas.log_segments import SegmentedLogStore
+from atlas.tools_core import build_registry
+
+
+def _write_runs(root, n=4):
+    for i in range(n):
+        with JsonlLogger(root / "runs" / f"r{i}.jsonl", f"r{i}") as logger:
+            logger.write("action", {"tool": "atlas.echo", "args": {"i": i}}, ok=i % 2 == 0)
+            logger.write("score_v2", {"score": float(i)})
+
+
+def test_query_filters_and_projects(tmp_path):
+    _write_runs(tmp_path)
+    q = LogQuery(kinds=("score_v2",), run_ids=("r1", "r3"), fields=("run_id", "payload.score", "payload.missing"))
+    assert list(iter_log_events([tmp_path], q)) == [
+        {"run_id": "r1", "payload.score": 1.0, "payload.missing": None},
+        {"run_id": "r3", "payload.score": 3.0, "payload.missing": None},
+    ]
+    failed = [e["run_id"] for e in iter_log_events([tmp_path / "runs"], LogQuery(ok=False))]
+    assert failed == ["r1", "r3"]
+    assert list(iter_log_events([tmp_path], LogQuery(since="2999-01-01T00:00:00+00:00"))) == []
+    assert len(list(iter_log_events([tmp_path], LogQuery(until="2999-01-01T00:00:00")))) == 8
+
+
+def test_parallel_scan_keeps_order(tmp_path, monkeypatch):
+    _write_runs(tmp_path, n=6)
+    monkeypatch.setattr("atlas.log_reader.PARALLEL_MIN_BYTES", 0)
+    serial = list(iter_log_events([tmp_path], workers=1))
+    assert list(iter_log_events([tmp_path], workers=3)) == serial
+    assert [e["run_id"] for e in serial[::2]] == [f"r{i}" for i in range(6)]
+    # ranges that cut through lines: each line is parsed by exactly one of them
+    monkeypatch.setattr("atlas.log_reader.CHUNK_BYTES", 37)
+    assert list(iter_log_events([tmp_path], workers=2)) == serial
+
+
+def test_query_tool_reads_segmented_stores(tmp_path):
+    with SegmentedLogStore(tmp_path / "logs", compression="gzip") as store:
+        for i in range(3):
+            with store.logger(f"s{i}") as logger:
+                logger.write("action", {"i": i})
+                logger.write("score_v2", {"score": i * 0.5})
+    _write_runs(tmp_path, n=1)
+    res = build_registry().call_tool(
+        "atlas.logs.query_v1",
+        {"paths": [str(tmp_path)], "kinds": ["score_v2"], "fields": ["run_id", "payload.score"], "limit": 3},
+    )
+    out = json.loads(res["content"][0]["text"])
+    assert out["schema"] == "atlas.logs.query.v1"
+    assert out["truncated"] is True
+    assert out["events"] == [
+        {"run_id": "r0", "payload.score": 0.0},
+        {"run_id": "s0", "payload.score": 0.0},
+        {"run_id": "s1", "payload.score": 0.5},
+    ]
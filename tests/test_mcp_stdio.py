@@ -1,6 +1,18 @@
+import asyncio
+import io
 import json
 import subprocess
 import sys
+import threading
+import time
+
+import pytest
+
+from atlas.cancel import check_cancelled
+from atlas.mcp_async_server import serve_stdio_async
+from atlas.mcp_stdio_server import serve_stdio
+from atlas.registry import text_result
+from atlas.tools_core import build_registry
 
 def test_mcp_stdio_tools_list_and_ping():
     p = subprocess.Popen(
@@ -17,6 +29,7 @@ def test_mcp_stdio_tools_list_and_ping():
         resp = json.loads(line)
         assert resp["id"] == 1
         assert "tools" in resp["result"]
+        assert line == json.dumps({"jsonrpc": "2.0", "id": 1, "result": resp["result"]}, ensure_ascii=False)
 
         p.stdin.write(json.dumps({"jsonrpc":"2.0","id":2,"method":"tools/call","params":{"name":"atlas.ping","arguments":{}}}) + "\n")
         p.stdin.flush()
@@ -26,3 +39,187 @@ def test_mcp_stdio_tools_list_and_ping():
         assert resp2["result"]["content"][0]["text"] == "pong"
     finally:
         p.terminate()
+
+
+def _serve(reg, requests, monkeypatch, serve=serve_stdio):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(r) + "\n" for r in requests)))
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    assert serve(reg) == 0
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def _wait_release_registry():
+    # atlas.zz_wait blocks until atlas.zz_release runs, so it only answers if they overlap
+    reg = build_registry()
+    released = threading.Event()
+    reg.register(
+        {"name": "atlas.zz_wait", "description": "x", "inputSchema": {"type": "object", "properties": {}}},
+        lambda args: text_result("released" if released.wait(10) else "timed out"),
+    )
+    reg.register(
+        {"name": "atlas.zz_release", "description": "x", "inputSchema": {"type": "object", "properties": {}}},
+        lambda args: released.set() or text_result("ok"),
+    )
+    return reg
+
+
+def test_mcp_stdio_tools_calls_run_concurrently_and_answer_by_id(monkeypatch):
+    reg = _wait_release_registry()
+
+    def call(rid, name):
+        return {"jsonrpc": "2.0", "id": rid, "method": "tools/call", "params": {"name": name}}
+
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", "2")
+    resps = _serve(reg, [call(1, "atlas.zz_wait"), call(2, "atlas.zz_release")], monkeypatch)
+    # the slow call does not hold back the one after it
+    assert [r["id"] for r in resps] == [2, 1]
+    assert resps[1]["result"]["content"][0]["text"] == "released"
+
+
+def test_mcp_stdio_concurrency_1_answers_in_order(monkeypatch):
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", "1")
+    reqs = [{"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "atlas.echo", "arguments": {"text": str(i)}}} for i in range(5)]
+    resps = _serve(build_registry(), reqs, monkeypatch)
+    assert [r["id"] for r in resps] == list(range(5))
+
+
+def test_mcp_async_server_runs_async_and_sync_tools(monkeypatch):
+    reg = build_registry()
+    released = asyncio.Event()
+
+    async def wait(args):
+        await asyncio.wait_for(released.wait(), 10)
+        return {"released": True}
+
+    async def release(args):
+        released.set()
+        return {"ok": True}
+
+    def spec(name):
+        return {"name": name, "description": "x", "inputSchema": {"type": "object", "properties": {}}}
+
+    for name, afn in (("atlas.zz_wait", wait), ("atlas.zz_release", release)):
+        reg.register_json(spec(name), lambda args: {"sync": True}, async_fn=afn)
+    reqs = [
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "atlas.zz_wait"}},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "atlas.zz_release"}},
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "atlas.ping"}},
+        {"jsonrpc": "2.0", "id": 4, "method": "tools/call", "params": {"name": "atlas.echo", "arguments": {}}},
+        {"jsonrpc": "2.0", "id": 5, "method": "nope"},
+    ]
+    resps = {r["id"]: r for r in _serve(reg, reqs, monkeypatch, lambda reg: asyncio.run(serve_stdio_async(reg)))}
+    assert json.loads(resps[1]["result"]["content"][0]["text"]) == {"released": True}
+    assert json.loads(resps[2]["result"]["content"][0]["text"]) == {"ok": True}
+    assert resps[3]["result"]["content"][0]["text"] == "pong"
+    assert resps[4]["error"]["code"] == -32602
+    assert resps[5]["error"]["code"] == -32601
+
+
+BATCH = [
+    {"jsonrpc": "2.0", "id": "w", "method": "tools/call", "params": {"name": "atlas.zz_wait"}},
+    {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "atlas.echo", "arguments": {"text": "n"}}},
+    {"jsonrpc": "2.0", "id": "r", "method": "tools/call", "params": {"name": "atlas.zz_release"}},
+    {"id": "bad"},
+    {"jsonrpc": "2.0", "id": "l", "method": "tools/list"},
+]
+
+
+def _check_batch_response(out):
+    assert len(out) == 1 and isinstance(out[0], list)
+    # request order; the notification gets no entry
+    assert [r["id"] for r in out[0]] == ["w", "r", "bad", "l"]
+    assert out[0][0]["result"]["content"][0]["text"] == "released"
+    assert out[0][2]["error"]["code"] == -32600
+    assert "tools" in out[0][3]["result"]
+
+
+def test_mcp_stdio_batch_runs_in_parallel_and_answers_in_one_line(monkeypatch):
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", "2")
+    _check_batch_response(_serve(_wait_release_registry(), [BATCH], monkeypatch))
+    assert _serve(build_registry(), [[]], monkeypatch) == [
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+    ]
+
+
+def test_mcp_async_server_batch(monkeypatch):
+    out = _serve(_wait_release_registry(), [BATCH], monkeypatch, lambda reg: asyncio.run(serve_stdio_async(reg)))
+    _check_batch_response(out)
+
+
+def _cancel_registry():
+    reg = build_registry()
+    spec = {"name": "atlas.zz_steps", "description": "x", "inputSchema": {"type": "object", "properties": {}}}
+
+    def loop(args):
+        for _ in range(1000):
+            check_cancelled()
+            time.sleep(0.01)
+        return {"done": True}
+
+    async def aloop(args):
+        await asyncio.sleep(10)
+        return {"done": True}
+
+    reg.register_json(spec, loop, async_fn=aloop)
+    return reg
+
+
+CANCEL = [
+    {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "atlas.zz_steps"}},
+    {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1, "reason": "user"}},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "atlas.ping"}},
+]
+
+
+@pytest.mark.parametrize("concurrency", ["1", "2"])
+def test_mcp_stdio_cancelled_call_stops_without_a_response(monkeypatch, concurrency):
+    # with one worker too: the call runs off the reader, which reads the cancel
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", concurrency)
+    t0 = time.monotonic()
+    resps = _serve(_cancel_registry(), CANCEL, monkeypatch)
+    assert time.monotonic() - t0 < 5
+    assert [r["id"] for r in resps] == [2]
+
+
+def test_mcp_stdio_reader_waits_for_a_free_worker(monkeypatch):
+    reg = build_registry()
+    read = []
+    lines = [
+        json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "atlas.zz_count"}}) + "\n"
+        for i in range(4)
+    ]
+
+    class Stdin:
+        def readline(self):
+            read.append(len(read))
+            return lines[len(read) - 1] if len(read) <= len(lines) else ""
+
+    def count(args):
+        time.sleep(0.05)  # time for the reader to run ahead if it could
+        return text_result(str(len(read)))
+
+    reg.register({"name": "atlas.zz_count", "description": "x", "inputSchema": {"type": "object", "properties": {}}}, count)
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", "1")
+    monkeypatch.setattr(sys, "stdin", Stdin())
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    assert serve_stdio(reg) == 0
+    resps = [json.loads(line) for line in out.getvalue().splitlines()]
+    # while call i runs, the reader holds call i+1 and reads nothing past it
+    assert [int(r["result"]["content"][0]["text"]) for r in resps] == [2, 3, 4, 5]
+
+
+def test_mcp_async_server_cancelled_call_stops_without_a_response(monkeypatch):
+    t0 = time.monotonic()
+    resps = _serve(_cancel_registry(), CANCEL, monkeypatch, lambda reg: asyncio.run(serve_stdio_async(reg)))
+    assert time.monotonic() - t0 < 5
+    assert [r["id"] for r in resps] == [2]
+
+
+def test_mcp_stdio_timed_out_call_is_an_error(monkeypatch):
+    monkeypatch.setenv("ATLAS_TOOL_TIMEOUT", "0.2")
+    monkeypatch.setenv("ATLAS_MCP_CONCURRENCY", "2")
+    resps = _serve(_cancel_registry(), CANCEL[:1], monkeypatch)
+    assert resps[0]["error"]["code"] == -32001
+    assert resps[0]["error"]["data"] == {"reason": "timeout", "timeout": 0.2}
@@ -0,0 +1,202 @@
+import json
+from pathlib import Path
+
+from atlas.log_jsonl import iter_events, resolve_snapshot
+from atlas.log_segments import SegmentedLogStore
+from atlas.run_step_v2 import run_step_v2
+from atlas.snapshot_cache import SnapshotCache
+from atlas.snapshot_store import SnapshotStore
+from atlas.tools_core import build_registry
+
+
+def _events(log_path):
+    lines = Path(log_path).read_text(encoding="utf-8").splitlines()
+    return [json.dumps({k: v for k, v in json.loads(ln).items() if k != "ts"}) for ln in lines]
+
+
+def test_fused_step_matches_regular_step(fake, tmp_path):
+    reg = build_registry()
+    results = {}
+    for mode in ("regular", "fused"):
+        out = tmp_path / mode
+        ws = out / "workspace.blend"
+        before = fake.launches
+
+        def step(i, out=out, ws=ws, fused=(mode == "fused")):
+            return run_step_v2(
+                reg,
+                action_tool="atlas.blender.add_cube_v1",
+                action_args={"name": f"Cube_{i}", "location": {"x": 1.0, "y": 0.0, "z": 0.0}},
+                snapshot_out_dir=out,
+                run_id=f"step-{i}",
+                workspace_blend_path=ws,
+                fused=fused,
+            )
+
+        res = [step(1), step(2)]
+        results[mode] = {
+            "launches": fake.launches - before,
+            "events": [_events(r["paths"]["log"]) for r in res],
+            "scores": [r["score"] for r in res],
+            "diffs": [r["diff"] for r in res],
+            "before": (out / "step-2.before.v2.json").read_bytes(),
+        }
+        for r in res:
+            Path(r["paths"]["log"]).unlink()
+
+    reg_, fus = results["regular"], results["fused"]
+    assert (reg_["launches"], fus["launches"]) == (7, 2)
+    # logs only differ by the workspace path embedded in args/payloads
+    swapped = [[e.replace("/fused/", "/regular/") for e in step] for step in fus["events"]]
+    assert swapped == reg_["events"]
+    assert fus["scores"] == reg_["scores"] == [1.0, 1.0]
+    assert fus["before"] == reg_["before"]
+
+
+def test_fused_and_regular_steps_log_the_same_failed_batch(fake, tmp_path):
+    reg = build_registry()
+    ops = [{"op": "add_primitive", "name": "Half"}, {"op": "delete", "name": "Missing"}, {"op": "delete", "name": "Half"}]
+    events = {}
+    for mode in ("regular", "fused"):
+        out = tmp_path / mode
+        r = run_step_v2(
+            reg,
+            action_tool="atlas.blender.exec_ops_v1",
+            action_args={"ops": ops},
+            snapshot_out_dir=out,
+            run_id="fail",
+            workspace_blend_path=out / "workspace.blend",
+            fused=(mode == "fused"),
+        )
+        assert r["diff"]["counts"] == {"added": 0, "removed": 0, "changed": 0}
+        assert fake.files[str((out / "workspace.blend").resolve())] == []
+        events[mode] = [e.replace(f"/{mode}/", "/") for e in _events(r["paths"]["log"])]
+        Path(r["paths"]["log"]).unlink()
+    assert events["fused"] == events["regular"]
+    action = json.loads(events["fused"][1])
+    assert action["ok"] is False
+    assert action["error"]["message"] == "Blender script failed"
+    assert action["error"]["data"]["error"]["result"]["counts"] == {"ok": 1, "error": 1, "skipped": 1}
+
+
+def test_fused_falls_back_for_non_blender_actions(fake, tmp_path):
+    reg = build_registry()
+    run_step_v2(
+        reg,
+        action_tool="atlas.echo",
+        action_args={"text": "hi"},
+        snapshot_out_dir=tmp_path / "snaps",
+        run_id="echo",
+        fused=True,
+    )
+    assert fake.launches == 3  # init + two snapshots
+
+
+def test_snapshot_cache_reuses_previous_after_snapshot(fake, tmp_path):
+    reg = build_registry()
+    results = {}
+    for mode in ("plain", "cached", "cached-fused"):
+        out = tmp_path / mode
+        cache = SnapshotCache() if mode != "plain" else None
+        before = fake.launches
+        res = [
+            run_step_v2(
+                reg,
+                action_tool="atlas.blender.add_cube_v1",
+                action_args={"name": f"Cube_{i}", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+                snapshot_out_dir=out,
+                run_id=f"step-{i}",
+                workspace_blend_path=out / "workspace.blend",
+                fused=mode.endswith("fused"),
+                snapshot_cache=cache,
+            )
+            for i in (1, 2, 3)
+        ]
+        events = [[json.loads(ln) for ln in Path(r["paths"]["log"]).read_text(encoding="utf-8").splitlines()] for r in res]
+        results[mode] = {"launches": fake.launches - before, "res": res, "events": events}
+        for r in res:
+            Path(r["paths"]["log"]).unlink()
+
+    assert [results[m]["launches"] for m in ("plain", "cached", "cached-fused")] == [10, 8, 3]
+    plain, cached = results["plain"], results["cached"]
+    assert [r["diff"] for r in cached["res"]] == [r["diff"] for r in plain["res"]]
+    assert [e[0]["payload"]["cache_hit"] for e in cached["events"]] == [False, True, True]
+    assert "cache_hit" not in plain["events"][0][0]["payload"]
+    assert cached["res"][1]["paths"]["before"] == cached["res"][0]["paths"]["after"]
+    fused = results["cached-fused"]
+    assert [r["diff"] for r in fused["res"]] == [r["diff"] for r in plain["res"]]
+
+
+def test_snapshot_cache_misses_after_outside_edit(fake, tmp_path):
+    reg = build_registry()
+    cache = SnapshotCache()
+    ws = tmp_path / "workspace.blend"
+
+    def step(i):
+        return run_step_v2(
+            reg,
+            action_tool="atlas.blender.add_cube_v1",
+            action_args={"name": f"Cube_{i}", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+            snapshot_out_dir=tmp_path,
+            run_id=f"step-{i}",
+            workspace_blend_path=ws,
+            snapshot_cache=cache,
+        )
+
+    step(1)
+    reg.call_tool("atlas.blender.add_cube_v1", {"name": "Outside", "location": {"x": 0.0, "y": 0.0, "z": 0.0}, "blend_path": str(ws)})
+    res = step(2)
+    assert res["diff"]["counts"]["added"] == 1
+    assert cache.stats()["hits"] == 0
+
+
+def test_snapshot_refs_keep_events_small_and_resolve(fake, tmp_path):
+    reg = build_registry()
+    for store in (None, SnapshotStore(tmp_path / "store", chunked=True)):
+        out = tmp_path / ("store-snaps" if store else "snaps")
+        sizes = []
+        for i in range(1, 5):
+            r = run_step_v2(
+                reg,
+                action_tool="atlas.blender.add_cube_v1",
+                action_args={"name": f"Cube_{i}", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+                snapshot_out_dir=out,
+                run_id=f"ref-{i}",
+                workspace_blend_path=out / "workspace.blend",
+                snapshot_store=store,
+                snapshot_refs=True,
+            )
+            events = {e["kind"]: e["payload"] for e in iter_events(r["paths"]["log"])}
+            after = events["snapshot_after_v2"]
+            assert "snapshot" not in after
+            assert after["path"] == r["paths"]["after"]
+            assert after["bytes"] == Path(after["path"]).stat().st_size
+            snap = resolve_snapshot(after, verify=True)
+            assert [o["name"] for o in snap["objects"]] == [f"Cube_{j}" for j in range(1, i + 1)]
+            assert resolve_snapshot(events["snapshot_before_v2"])["objects"] == snap["objects"][:-1]
+            sizes.append(len(json.dumps(after)))
+            Path(r["paths"]["log"]).unlink()
+        # event size doesn't follow the object count (only the "bytes" digits may change)
+        assert max(sizes) - min(sizes) <= 2
+
+
+def test_steps_share_a_segmented_log_store(fake, tmp_path):
+    reg = build_registry()
+    logs = SegmentedLogStore(tmp_path / "logs", compression="gzip")
+    for i in (1, 2):
+        r = run_step_v2(
+            reg,
+            action_tool="atlas.blender.add_cube_v1",
+            action_args={"name": f"Cube_{i}", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+            snapshot_out_dir=tmp_path / "snaps",
+            run_id=f"seg-{i}",
+            workspace_blend_path=tmp_path / "workspace.blend",
+            log_store=logs,
+        )
+        assert r["paths"]["log"] == str(logs.root)
+    logs.close()
+    assert not (Path("out") / "runs" / "seg-1.jsonl").exists()
+    assert [e["kind"] for e in logs.events("seg-2")] == [
+        "snapshot_before_v2", "action", "snapshot_after_v2", "diff_v2", "score_v2"
+    ]
+    assert logs.read("seg-1", 4, "score_v2")["payload"]["score"] == r["score"]
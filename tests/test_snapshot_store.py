@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from atlas.contract import AtlasError
+from atlas.run_step_v2 import run_step_v2
+from atlas.snapshot_diff_v2 import fingerprint
+from atlas.snapshot_store import SnapshotStore
+from atlas.tools_core import build_registry
+from atlas.train_loop import train_loop_v1
+
+
+def _snap(names):
+    return {"schema": "atlas.snapshot.v2", "scene": {"name": "Scene"}, "objects": [{"name": n, "type": "MESH"} for n in names]}
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_store_roundtrip_and_dedup(tmp_path, chunked):
+    store = SnapshotStore(tmp_path / "store", chunked=chunked)
+    a, b = _snap(["A", "B"]), _snap(["A", "B", "C"])
+    fa = store.put(a)
+    assert store.put(json.loads(json.dumps(a))) == fa == fingerprint(a)
+    fb = store.put(b)
+    assert store.get(fa, verify=True) == a
+    assert store.get(fb, verify=True) == b
+    stats = store.stats()
+    if chunked:
+        # objects A and B are shared by both manifests
+        assert (stats["manifests"]["files"], stats["objects"]["files"], stats["snapshots"]["files"]) == (2, 3, 0)
+    else:
+        assert (stats["snapshots"]["files"], stats["objects"]["files"]) == (2, 0)
+    with pytest.raises(AtlasError):
+        store.get("0" * 64)
+
+
+def test_run_step_references_snapshots_by_fingerprint(fake, tmp_path):
+    reg = build_registry()
+    store = SnapshotStore(tmp_path / "store", chunked=True)
+    res = run_step_v2(
+        reg,
+        action_tool="atlas.blender.add_cube_v1",
+        action_args={"name": "Cube_1", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+        snapshot_out_dir=tmp_path / "snaps",
+        run_id="s1",
+        snapshot_store=store,
+    )
+    fps = res["snapshots"]
+    assert store.get(fps["after"])["objects"] == [{"name": "Cube_1", "type": "MESH"}]
+    assert Path(res["paths"]["after"]) == store.path(fps["after"])
+    assert not list((tmp_path / "snaps").glob("*.json"))  # no per-step snapshot files
+    events = [json.loads(ln) for ln in Path(res["paths"]["log"]).read_text(encoding="utf-8").splitlines()]
+    assert [e["payload"].get("fingerprint") for e in events[:3:2]] == [fps["before"], fps["after"]]
+
+
+def test_train_loop_store_shares_objects(fake, tmp_path):
+    reg = build_registry()
+    res = train_loop_v1(reg, steps=5, out_dir=tmp_path / "train", store_snapshots=True)
+    stats = SnapshotStore(res["snapshot_store"]).stats()
+    # 6 distinct scenes (empty + one cube per step), 5 distinct objects
+    assert (stats["manifests"]["files"], stats["objects"]["files"]) == (6, 5)
+    assert res["history"][1]["snapshots"]["before"] == res["history"][0]["snapshots"]["after"]
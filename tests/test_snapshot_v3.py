@@ -0,0 +1,119 @@
+import copy
+import json
+import os
+
+import pytest
+
+from atlas.snapshot_diff_v2 import diff_snapshot_v2
+from atlas.snapshot_v3 import (
+    SnapshotV3,
+    diff_snapshot_v3,
+    encode_snapshot_v3,
+    load_snapshot,
+    snapshot_v2_to_v3,
+    snapshot_v3_to_v2,
+    write_snapshot_v3,
+)
+from atlas.tools_core import build_registry
+
+
+def _obj(i, **kw):
+    o = {
+        "name": f"Obj_{i:03d}",
+        "type": "MESH",
+        "parent": None,
+        "location": [float(i), 0.5, -1.25],
+        "rotation_euler": [0.0, 0.0, 1.570796],
+        "scale": [1.0, 1.0, 1.0],
+        "hide_viewport": False,
+        "hide_render": False,
+        "collections": ["Collection"],
+        "materials": ["Mät"],
+        "bbox_world": {"min": [-1.0, -1.0, -1.0], "max": [1.0, 1.0, 1.0]},
+        "mesh_stats": {"verts": 8, "edges": 12, "faces": 6},
+    }
+    o.update(kw)
+    return o
+
+
+def _snap(objs):
+    return {
+        "schema": "atlas.snapshot.v2",
+        "blender": {"version_string": "4.2.0", "version": [4, 2, 0]},
+        "scene": {"name": "Scene", "frame_current": 1},
+        "objects": objs,
+    }
+
+
+def _pair():
+    a = _snap(
+        [_obj(i) for i in range(40)]
+        + [
+            _obj(40, type=None, parent="Obj_000", bbox_world=None, mesh_stats=None, collections=[], materials=[]),
+            _obj(41, scale=[1.0, 1.0, -0.0]),
+            {"name": "Odd", "extra": True},  # not columnar: kept verbatim
+            _obj(42, location=[1, 2.0, 3.0]),  # int coordinate
+            "not-an-object",
+        ]
+    )
+    b = copy.deepcopy(a)
+    b["objects"][3]["location"][1] = 0.75
+    b["objects"][5]["collections"] = ["Other"]
+    b["objects"][7]["hide_render"] = True
+    b["objects"][9]["mesh_stats"] = None
+    b["objects"][41]["scale"] = [1.0, 1.0, 0.0]  # -0.0 == 0.0 for the v2 diff
+    b["objects"][42]["extra"] = False
+    del b["objects"][11]
+    b["objects"].append(_obj(99, parent="Obj_001"))
+    return a, b
+
+
+def test_snapshot_v3_roundtrip_is_lossless(tmp_path):
+    a, _ = _pair()
+    src = tmp_path / "a.v2.json"
+    src.write_text(json.dumps(a, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    snapshot_v2_to_v3(src, tmp_path / "a.v3")
+    snapshot_v3_to_v2(tmp_path / "a.v3", tmp_path / "back.v2.json")
+    assert (tmp_path / "back.v2.json").read_bytes() == src.read_bytes()
+    assert load_snapshot(tmp_path / "a.v3") == a == load_snapshot(src)
+
+    with SnapshotV3.open(tmp_path / "a.v3") as s:
+        assert s.count == len(a["objects"])
+        assert sorted(s.exceptions) == [42, 43, 44]
+        assert s.object(41)["scale"][2] == 0.0 and str(s.object(41)["scale"][2]) == "-0.0"
+
+    for odd in ({}, {"objects": None, "schema": "x"}, _snap([])):
+        assert SnapshotV3.from_bytes(encode_snapshot_v3(odd)).to_v2() == odd
+
+
+def test_diff_snapshot_v3_matches_v2(tmp_path):
+    a, b = _pair()
+    write_snapshot_v3(a, tmp_path / "a.v3")
+    write_snapshot_v3(b, tmp_path / "b.v3")
+    with SnapshotV3.open(tmp_path / "a.v3") as sa, SnapshotV3.open(tmp_path / "b.v3") as sb:
+        d3 = diff_snapshot_v3(sa, sb)
+        assert diff_snapshot_v3(sa, sa)["counts"] == {"added": 0, "removed": 0, "changed": 0}
+    d2 = diff_snapshot_v2(a, b)
+    assert json.dumps(d3) == json.dumps(d2)
+    assert d2["counts"] == {"added": 1, "removed": 1, "changed": 4}
+
+
+def test_diff_snapshot_v3_nan_and_duplicates():
+    nan = float("nan")
+    a = _snap([_obj(1), _obj(1, location=[2.0, 2.0, 2.0]), _obj(2, rotation_euler=[nan, 0.0, 0.0])])
+    b = _snap([_obj(1, location=[2.0, 2.0, 2.0]), _obj(2, rotation_euler=[nan, 0.0, 0.0])])
+    sa = SnapshotV3.from_bytes(encode_snapshot_v3(a))
+    sb = SnapshotV3.from_bytes(encode_snapshot_v3(b))
+    assert diff_snapshot_v3(sa, sb) == diff_snapshot_v2(json.loads(json.dumps(a)), json.loads(json.dumps(b)))
+
+
+def test_blender_snapshot_v3_runtime(tmp_path):
+    if not os.environ.get("ATLAS_BLENDER_EXE"):
+        pytest.skip("ATLAS_BLENDER_EXE not set")
+
+    reg = build_registry()
+    res = json.loads(reg.call_tool("atlas.blender.snapshot_v3", {"out_path": str(tmp_path / "s.v3")})["content"][0]["text"])
+    reg.call_tool("atlas.blender.snapshot_v2", {"out_path": str(tmp_path / "s.json")})
+    v2 = json.loads((tmp_path / "s.json").read_text(encoding="utf-8"))
+    assert res["schema"] == "atlas.blender.snapshot_v3.v1"
+    assert load_snapshot(tmp_path / "s.v3")["objects"] == v2["objects"]
@@ -1,8 +1,19 @@
-import os
+import io
 import json
+import os
+import sys
+from pathlib import Path
+
 import pytest
 
+from atlas.cancel import cancel_scope
+from atlas.contract import AtlasError
+from atlas.log_jsonl import iter_events, open_logger
+from atlas.log_segments import SegmentedLogStore
+from atlas.mcp_stdio_server import serve_stdio
+from atlas.progress import reporting
 from atlas.tools_core import build_registry
+from atlas.train_loop import train_loop_v1
 
 
 def test_train_loop_tool_is_registered():
@@ -25,3 +36,79 @@ def test_train_loop_runtime(tmp_path):
     assert data["schema"] == "atlas.train.loop.v1"
     assert data["steps"] == 3
     assert len(data["history"]) == 3
+
+
+def test_train_loop_reports_each_step_as_progress(fake, tmp_path, monkeypatch):
+    req = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {
+            "name": "atlas.train.loop_v1",
+            "arguments": {"steps": 3, "out_dir": str(tmp_path / "train"), "seed": 7},
+            "_meta": {"progressToken": "t"},
+        },
+    }
+    monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps(req) + "\n"))
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    assert serve_stdio(build_registry()) == 0
+    msgs = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    # one notification per step, each before the final response
+    progress = [m["params"] for m in msgs[:-1]]
+    assert [m["method"] for m in msgs[:-1]] == ["notifications/progress"] * 3
+    assert [(p["progressToken"], p["progress"], p["total"]) for p in progress] == [("t", i, 3) for i in (1, 2, 3)]
+    history = json.loads(msgs[-1]["result"]["content"][0]["text"])["history"]
+    assert [p["partial"] for p in progress] == history
+    assert progress[0]["message"] == f"step 1/3 score={history[0]['score']} +1 -0 ~0"
+
+
+def test_train_loop_embeds_snapshots_unless_refs_requested(fake, tmp_path):
+    reg = build_registry()
+    for refs in (False, True):
+        kwargs = {"snapshot_refs": True} if refs else {}
+        res = train_loop_v1(reg, steps=1, out_dir=tmp_path / f"t{refs}", run_id=f"t{refs}", segment_logs=False, **kwargs)
+        events = list(iter_events(Path("out") / "runs" / f"{res['history'][0]['run_id']}.jsonl"))
+        assert ("snapshot" in events[0]["payload"]) is not refs
+
+
+def test_train_loop_segment_logs_are_opt_in_and_closed_on_cancel(fake, tmp_path, monkeypatch):
+    reg = build_registry()
+    res = train_loop_v1(reg, steps=1, out_dir=tmp_path / "plain", run_id="plain")
+    assert "logs" not in res
+    assert (Path("out") / "runs" / "plain-0001.jsonl").exists()
+
+    stores = []
+
+    class Store(SegmentedLogStore):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            stores.append(self)
+
+    monkeypatch.setattr("atlas.train_loop.SegmentedLogStore", Store)
+    with cancel_scope() as token, reporting(lambda event: token.cancel()):
+        with pytest.raises(AtlasError) as ei:
+            train_loop_v1(reg, steps=3, out_dir=tmp_path / "seg", run_id="seg", segment_logs=True)
+    assert ei.value.code == "CANCELLED"
+    # the open segment was closed with the loop
+    assert (stores[0]._data, stores[0]._idx) == (None, None)
+    logs = SegmentedLogStore(tmp_path / "seg" / "logs")
+    assert logs.run_ids() == ["seg-0001"]
+    assert [e["kind"] for e in logs.events("seg-0001")][-1] == "score_v2"
+
+
+def test_train_loop_keeps_one_logger_across_steps(fake, tmp_path, monkeypatch):
+    opened = []
+
+    def counting_open_logger(path, run_id):
+        opened.append(run_id)
+        return open_logger(path, run_id)
+
+    monkeypatch.setattr("atlas.train_loop.open_logger", counting_open_logger)
+    monkeypatch.setattr("atlas.log_jsonl.open_logger", counting_open_logger)
+    train_loop_v1(build_registry(), steps=3, out_dir=tmp_path / "t", run_id="one")
+    assert opened == ["one"]
+    for i in (1, 2, 3):
+        events = list(iter_events(Path("out") / "runs" / f"one-{i:04d}.jsonl"))
+        assert [(e["run_id"], e["step"]) for e in events] == [(f"one-{i:04d}", k) for k in range(5)]
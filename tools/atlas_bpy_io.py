@@ -0,0 +1,116 @@
+import json
+import os
+import runpy
+import sys
+import traceback
+
+# Blender-side copy of atlas.framing (Blender's bundled Python can't import the atlas package).
+FRAME_MARKER = b"\x1eATLAS-FRAME "
+
+# Result sinks for scripts run in-process (worker loop, fused step); innermost last.
+_captures = []
+
+# Set by the worker around a mutating script on a resident scene: restores the scene
+# as it was before the script (see rollback()).
+_rollback = {"fn": None, "used": False}
+
+def encode_frame(obj):
+    # sort_keys keeps payloads byte-identical to the scripts' historical stdout JSON
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return FRAME_MARKER + str(len(payload)).encode("ascii") + b"\n" + payload + b"\n"
+
+def result_fd():
+    # ATLAS_RESULT_FD: dedicated pipe fd from the host, or "stdout"; unset -> plain JSON print
+    v = os.environ.get("ATLAS_RESULT_FD")
+    if not v:
+        return None
+    return 1 if v == "stdout" else int(v)
+
+def write_frame(obj, fd=1):
+    data = encode_frame(obj)
+    if fd == 1:
+        data = b"\n" + data  # start the marker on a fresh line amid Blender's output
+    try:
+        sys.stdout.flush()
+    except Exception:
+        pass
+    view = memoryview(data)
+    while view:
+        n = os.write(fd, view)
+        view = view[n:]
+
+def read_frame(stream):
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        i = line.find(FRAME_MARKER)
+        if i < 0:
+            continue
+        n = int(line[i + len(FRAME_MARKER):].strip())
+        payload = stream.read(n)
+        if len(payload) < n:
+            return None
+        stream.read(1)
+        return json.loads(payload.decode("utf-8"))
+
+def begin_capture():
+    _captures.append({"result": None})
+
+def end_capture():
+    if not _captures:
+        return None
+    return _captures.pop().get("result")
+
+def emit_result(obj):
+    if _captures:
+        _captures[-1]["result"] = obj
+        return
+    fd = result_fd()
+    if fd is None:
+        print(json.dumps(obj, ensure_ascii=False, sort_keys=True))
+        return
+    write_frame(obj, fd)
+
+def arm_rollback(fn):
+    _rollback["fn"] = fn
+    _rollback["used"] = False
+
+def disarm_rollback():
+    # -> whether the scene was rolled back while armed
+    used = _rollback["used"]
+    _rollback["fn"] = None
+    _rollback["used"] = False
+    return used
+
+def rollback():
+    # Drop the running mutation's edits to a resident scene (a failed action must not
+    # be persisted, like in a one-shot run). -> False when there is nothing to restore.
+    if _rollback["fn"] is None or _rollback["used"]:
+        return False
+    _rollback["fn"]()
+    _rollback["used"] = True
+    return True
+
+def run_script(script, argv):
+    # Run a tools/blender_*.py entry point in this Blender session, as if launched
+    # with `--python script -- argv`. Returns {"ok": True, "result": ...} or {"ok": False, "error": ...}.
+    saved_argv = list(sys.argv)
+    sys.argv = [saved_argv[0] if saved_argv else "blender", "-b", "--factory-startup", "--python", script, "--", *argv]
+    begin_capture()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            end_capture()
+            return {"ok": False, "error": {"message": f"script exited: {e.code}"}}
+    except Exception as e:
+        end_capture()
+        return {"ok": False, "error": {"message": str(e), "traceback": traceback.format_exc(limit=8)}}
+    finally:
+        sys.argv = saved_argv
+    result = end_capture()
+    if isinstance(result, dict) and result.get("ok") is False:
+        # scripts that return {"ok": false, ...} (e.g. exec_ops) failed without raising
+        return {"ok": False, "error": {"message": "script reported failure", "result": result}}
+    return {"ok": True, "result": result}
@@ -0,0 +1,81 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Boot vs per-request cost of `python -m atlas.mcp_stdio_server`.
+#   python tools/bench_mcp_stdio.py [--spawns N] [--requests N]
+# boot: spawn -> first response (ping), with lazy tool groups (default) and with
+# ATLAS_MCP_EAGER_TOOLS=1; requests: mean round trip of tools/list and ping on a warm
+# server. Server-side numbers: run the server with ATLAS_MCP_TIMING=1.
+
+def _parse(argv):
+    opts = {"spawns": 5, "requests": 200}
+    it = iter(argv)
+    for a in it:
+        if a in ("--spawns", "--requests"):
+            opts[a[2:]] = int(next(it))
+    return opts
+
+def _spawn(eager=False):
+    env = dict(os.environ)
+    env["ATLAS_MCP_EAGER_TOOLS"] = "1" if eager else "0"
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = src + os.pathsep + env.get("PYTHONPATH", "")
+    return subprocess.Popen(
+        [sys.executable, "-m", "atlas.mcp_stdio_server"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=env,
+    )
+
+def _send(p, rid, method, params):
+    p.stdin.write(json.dumps({"jsonrpc": "2.0", "id": rid, "method": method, "params": params}) + "\n")
+    p.stdin.flush()
+    line = p.stdout.readline()
+    if not line:
+        raise RuntimeError("No response from server (stdout empty).")
+    return json.loads(line)
+
+PING = {"name": "atlas.ping", "arguments": {}}
+
+def _ms(samples):
+    return {"mean": statistics.fmean(samples) * 1000.0, "min": min(samples) * 1000.0}
+
+def main():
+    opts = _parse(sys.argv[1:])
+    boot = {}
+    for mode in ("lazy", "eager"):
+        samples = []
+        for _ in range(opts["spawns"]):
+            t0 = time.perf_counter()
+            p = _spawn(eager=mode == "eager")
+            try:
+                _send(p, 1, "tools/call", PING)
+                samples.append(time.perf_counter() - t0)
+            finally:
+                p.stdin.close()
+                p.wait()
+        boot[mode] = _ms(samples)
+    p = _spawn()
+    try:
+        _send(p, 0, "tools/call", PING)
+        per = {}
+        for method, params in (("tools/list", {}), ("tools/call", PING)):
+            samples = []
+            for i in range(opts["requests"]):
+                t0 = time.perf_counter()
+                _send(p, i + 1, method, params)
+                samples.append(time.perf_counter() - t0)
+            per[method] = _ms(samples)
+    finally:
+        p.stdin.close()
+        p.wait()
+    print(json.dumps({"boot_to_first_response_ms": boot, "request_ms": per}, indent=2))
+
+if __name__ == "__main__":
+    main()
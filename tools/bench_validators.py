@@ -0,0 +1,47 @@
+import functools
+import json
+import os
+import sys
+import timeit
+
+# Per-call cost of argument validation: compiled validators (ToolRegistry) vs the
+# schema interpreter (registry.validate_against_schema).
+#   python tools/bench_validators.py [--number N]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from atlas.registry import compile_schema, validate_against_schema
+from atlas.tools_core import build_registry
+
+CASES = {
+    "atlas.echo": {"text": "hello"},
+    "atlas.blender.add_cube_v1": {"name": "Cube", "location": {"x": 1.0, "y": 2.0, "z": 3.0}, "blend_path": "w.blend"},
+    "atlas.run.step_v2": {
+        "action_tool": "atlas.blender.add_cube_v1",
+        "action_args": {"name": "Cube", "location": {"x": 0.0, "y": 0.0, "z": 0.0}},
+        "snapshot_out_dir": "out/snaps",
+        "fused": True,
+    },
+    "atlas.logs.query_v1": {"paths": ["out/runs"], "kinds": ["score_v2"], "limit": 100},
+}
+
+def main():
+    number = 200000
+    if "--number" in sys.argv:
+        number = int(sys.argv[sys.argv.index("--number") + 1])
+    specs = {t["name"]: t for t in build_registry().list_tools()}
+    out = {}
+    for name, args in CASES.items():
+        schema = specs[name]["inputSchema"]
+        compiled = compile_schema(schema)
+        interp = functools.partial(validate_against_schema, args, schema)
+        t_interp = min(timeit.repeat(interp, number=number, repeat=3))
+        t_comp = min(timeit.repeat(functools.partial(compiled, args), number=number, repeat=3))
+        out[name] = {
+            "interpreter_ns": round(t_interp / number * 1e9, 1),
+            "compiled_ns": round(t_comp / number * 1e9, 1),
+        }
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import bpy
 import sys
-import json
 from pathlib import Path
 from mathutils import Vector
 
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+from atlas_bpy_io import emit_result
+
 def _argv_after_double_dash():
     argv = sys.argv
     if "--" in argv:
@@ -61,7 +65,7 @@ def main():
         bpy.ops.wm.save_mainfile(filepath=str(Path(parsed["blend"]).resolve()))
 
     result = {"schema": "atlas.blender.add_cube.v1", "created": {"name": obj.name, "type": obj.type}}
-    print(json.dumps(result, ensure_ascii=False, sort_keys=True))
+    emit_result(result)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,199 @@
+import bpy
+import bmesh
+import json
+import sys
+from pathlib import Path
+from mathutils import Vector, Euler
+
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+from atlas_bpy_io import emit_result
+
+# Batched scene program: run an ordered list of data-first ops, save once.
+# Stops at the first failing op (remaining ops are "skipped") and then does not save.
+
+def _argv_after_double_dash():
+    argv = sys.argv
+    if "--" in argv:
+        return argv[argv.index("--")+1:]
+    return []
+
+def _parse(args):
+    out = {"ops_json": "[]", "blend": None}
+    i = 0
+    while i < len(args):
+        if args[i] == "--ops-json" and i+1 < len(args):
+            out["ops_json"] = args[i+1]
+            i += 2
+            continue
+        if args[i] == "--blend" and i+1 < len(args):
+            out["blend"] = args[i+1]
+            i += 2
+            continue
+        i += 1
+    return out
+
+def _vec3(d, default):
+    d = d or {}
+    return (float(d.get("x", default[0])), float(d.get("y", default[1])), float(d.get("z", default[2])))
+
+def _obj(name):
+    obj = bpy.data.objects.get(name)
+    if obj is None:
+        raise ValueError(f"object not found: {name}")
+    return obj
+
+def _apply_transform(obj, op):
+    if op.get("location") is not None:
+        obj.location = Vector(_vec3(op["location"], obj.location))
+    if op.get("rotation") is not None:
+        obj.rotation_euler = Euler(_vec3(op["rotation"], obj.rotation_euler), "XYZ")
+    if op.get("scale") is not None:
+        obj.scale = Vector(_vec3(op["scale"], obj.scale))
+
+def _primitive_mesh(name, kind, size):
+    mesh = bpy.data.meshes.new(name + "_Mesh")
+    bm = bmesh.new()
+    try:
+        # sizes follow the bpy.ops.mesh.primitive_*_add conventions
+        if kind == "cube":
+            bmesh.ops.create_cube(bm, size=size)
+        elif kind == "plane":
+            bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=size / 2.0)
+        elif kind == "uv_sphere":
+            bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, radius=size / 2.0)
+        elif kind == "ico_sphere":
+            bmesh.ops.create_icosphere(bm, subdivisions=2, radius=size / 2.0)
+        elif kind == "cylinder":
+            bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=False, segments=32, radius1=size / 2.0, radius2=size / 2.0, depth=size)
+        elif kind == "cone":
+            bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=False, segments=32, radius1=size / 2.0, radius2=0.0, depth=size)
+        else:
+            raise ValueError(f"unknown primitive type: {kind}")
+        bm.to_mesh(mesh)
+    except Exception:
+        bpy.data.meshes.remove(mesh)
+        raise
+    finally:
+        bm.free()
+    return mesh
+
+def op_add_primitive(op):
+    kind = op.get("type", "cube")
+    name = op["name"]
+    data = None if kind == "empty" else _primitive_mesh(name, kind, float(op.get("size", 2.0)))
+    obj = bpy.data.objects.new(name, data)
+    bpy.context.scene.collection.objects.link(obj)
+    _apply_transform(obj, op)
+    return {"name": obj.name, "type": obj.type}
+
+def op_set_transform(op):
+    obj = _obj(op["name"])
+    _apply_transform(obj, op)
+    return {"name": obj.name}
+
+def op_delete(op):
+    obj = _obj(op["name"])
+    name = obj.name
+    bpy.data.objects.remove(obj, do_unlink=True)
+    return {"name": name}
+
+def op_parent(op):
+    obj = _obj(op["name"])
+    keep = bool(op.get("keep_transform", True))
+    parent_name = op.get("parent")
+    if parent_name is None:
+        mw = obj.matrix_world.copy()
+        obj.parent = None
+        if keep:
+            obj.matrix_world = mw
+        return {"name": obj.name, "parent": None}
+    parent = _obj(parent_name)
+    if parent == obj:
+        raise ValueError("object cannot be its own parent")
+    obj.parent = parent
+    if keep:
+        bpy.context.view_layer.update()
+        obj.matrix_parent_inverse = parent.matrix_world.inverted()
+    return {"name": obj.name, "parent": parent.name}
+
+def op_assign_material(op):
+    obj = _obj(op["name"])
+    if obj.data is None or not hasattr(obj.data, "materials"):
+        raise ValueError(f"object has no material slots: {obj.name}")
+    mat = bpy.data.materials.get(op["material"])
+    created = mat is None
+    if created:
+        mat = bpy.data.materials.new(op["material"])
+    if op.get("color") is not None:
+        c = list(op["color"]) + [1.0] * (4 - len(op["color"]))
+        mat.diffuse_color = [float(x) for x in c[:4]]
+    mats = obj.data.materials
+    if op.get("replace"):
+        mats.clear()
+    if all(m is None or m.name != mat.name for m in mats):
+        mats.append(mat)
+    return {"name": obj.name, "material": mat.name, "created": created}
+
+def op_link_collection(op):
+    obj = _obj(op["name"])
+    col = bpy.data.collections.get(op["collection"])
+    created = col is None
+    if created:
+        col = bpy.data.collections.new(op["collection"])
+        bpy.context.scene.collection.children.link(col)
+    if obj.name not in col.objects:
+        col.objects.link(obj)
+    if op.get("move"):
+        for other in list(obj.users_collection):
+            if other != col:
+                other.objects.unlink(obj)
+    return {"name": obj.name, "collection": col.name, "created": created}
+
+OPS = {
+    "add_primitive": op_add_primitive,
+    "set_transform": op_set_transform,
+    "delete": op_delete,
+    "parent": op_parent,
+    "assign_material": op_assign_material,
+    "link_collection": op_link_collection,
+}
+
+def exec_ops(ops):
+    results = []
+    failed = False
+    for i, op in enumerate(ops):
+        kind = op.get("op")
+        if failed:
+            results.append({"index": i, "op": kind, "status": "skipped"})
+            continue
+        try:
+            fn = OPS.get(kind)
+            if fn is None:
+                raise ValueError(f"unknown op: {kind}")
+            results.append({"index": i, "op": kind, "status": "ok", "result": fn(op)})
+        except Exception as e:
+            failed = True
+            results.append({"index": i, "op": kind, "status": "error", "error": str(e)})
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("ok", "error", "skipped")}
+    return {"schema": "atlas.blender.exec_ops.v1", "ok": not failed, "results": results, "counts": counts}
+
+def main():
+    args = _parse(_argv_after_double_dash())
+
+    if args["blend"]:
+        p = Path(args["blend"]).resolve()
+        if p.exists():
+            bpy.ops.wm.open_mainfile(filepath=str(p))
+
+    result = exec_ops(json.loads(args["ops_json"]))
+
+    # one save for the whole batch, and none if an op failed
+    if args["blend"] and result["ok"]:
+        bpy.ops.wm.save_mainfile(filepath=str(Path(args["blend"]).resolve()))
+
+    emit_result(result)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import bpy
 import sys
-import json
 from pathlib import Path
 
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+from atlas_bpy_io import emit_result
+
 def _argv_after_double_dash():
     argv = sys.argv
     if "--" in argv:
@@ -31,7 +35,7 @@ def main():
     # factory-startup scene, just save it
     bpy.ops.wm.save_mainfile(filepath=str(path))
 
-    print(json.dumps({"schema":"atlas.blender.init_empty.v1","blend_path":str(path)}, ensure_ascii=False, sort_keys=True))
+    emit_result({"schema":"atlas.blender.init_empty.v1","blend_path":str(path)})
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,11 @@ import json
 import sys
 from pathlib import Path
 
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+from atlas_bpy_io import emit_result
+
 def _argv_after_double_dash():
     argv = sys.argv
     if "--" in argv:
@@ -66,7 +71,7 @@ def main():
         with open(args["out"], "w", encoding="utf-8") as f:
             f.write(txt)
     else:
-        print(txt)
+        emit_result(data)
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,20 @@
 import bpy
 import json
+import os
 import sys
 from pathlib import Path
 from mathutils import Vector
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+from atlas_bpy_io import emit_result
+
 def _argv_after_double_dash():
     argv = sys.argv
     if "--" in argv:
@@ -59,37 +70,160 @@ def _collections(obj):
         pass
     return sorted(set(cols))
 
-def _mesh_stats(obj):
-    if obj.type != "MESH" or not obj.data:
-        return None
-    me = obj.data
+def _mesh_stats(objects):
+    # -> {name: counts or None} in one pass, alongside the transforms. Collection lengths
+    # have no foreach_get, so counts are read once per mesh datablock; objects sharing a
+    # mesh (linked duplicates) reuse its entry.
     # NOTE: polygons/edges/verts available without depsgraph eval
-    return {
-        "verts": int(len(me.vertices)),
-        "edges": int(len(me.edges)),
-        "faces": int(len(me.polygons)),
-    }
+    by_mesh = {}
+    out = {}
+    for obj in objects:
+        me = obj.data if obj.type == "MESH" else None
+        if not me:
+            out[obj.name] = None
+            continue
+        key = me.as_pointer()
+        stats = by_mesh.get(key)
+        if stats is None:
+            stats = by_mesh[key] = {
+                "verts": int(len(me.vertices)),
+                "edges": int(len(me.edges)),
+                "faces": int(len(me.polygons)),
+            }
+        out[obj.name] = dict(stats)
+    return out
+
+# Vectorized path: matrix_world/bound_box are pulled with foreach_get and decomposed as
+# float32 array math that mirrors mathutils op for op, so the rounded output is
+# byte-identical to the per-object loop. Rotations whose atan2f result could round
+# either way (or whose two euler solutions tie) are recomputed with mathutils.
+# ATLAS_SNAPSHOT_VECTORIZED=0 forces the loop.
+
+_EPS16 = 16.0 * 1.1920928955078125e-07  # 16 * FLT_EPSILON, as in mat3_normalized_to_eul2
+
+def _atan2f(y, x):
+    # libm atan2f is off by up to 1 ulp: returns the nearest float32 angle and a mask of
+    # where Blender's value (nearest +-1 ulp) may round to a different 6-decimal result
+    f = np.arctan2(y.astype(np.float64), x.astype(np.float64)).astype(np.float32)
+    down = np.nextafter(f, np.float32(-np.inf))
+    up = np.nextafter(f, np.float32(np.inf))
+    return f, _round_unsure(f, down) | _round_unsure(f, up)
+
+def _round_unsure(a, b):
+    # True where a and b may not round to the same 6-decimal value
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    return (np.round(a, 6) != np.round(b, 6)) | _near_mid(a) | _near_mid(b)
+
+def _near_mid(v):
+    # True where v is within rounding noise of a 6-decimal midpoint
+    return np.abs(np.abs(v * 1e6) % 1.0 - 0.5) < 1e-6
+
+def _decompose(mw, bb):
+    # mw: (n, 4, 4) float32 in Blender's [col][row] layout; bb: (n, 8, 3) float32 local corners.
+    # Returns loc, rot, scale, bbox min, bbox max as (n, 3) float32 and a per-object "unsure" mask.
+    n = mw.shape[0]
+    loc = mw[:, 3, :3]
+
+    # mat3_to_rot_size: column lengths (sqrtf(dot), 0 below 1e-35), negated for a
+    # left-handed basis; normalize_m3 scales the columns by 1.0f / length
+    cols = mw[:, :3, :3]
+    d = cols[:, :, 0] * cols[:, :, 0] + cols[:, :, 1] * cols[:, :, 1] + cols[:, :, 2] * cols[:, :, 2]
+    ok = d > np.float32(1e-35)
+    length = np.where(ok, np.sqrt(d), np.float32(0.0))
+    inv = np.float32(1.0) / np.where(ok, length, np.float32(1.0))
+    u = np.where(ok[:, :, None], cols * inv[:, :, None], np.float32(0.0))
+    det = (u[:, 0, 0] * (u[:, 1, 1] * u[:, 2, 2] - u[:, 1, 2] * u[:, 2, 1])
+           - u[:, 1, 0] * (u[:, 0, 1] * u[:, 2, 2] - u[:, 0, 2] * u[:, 2, 1])
+           + u[:, 2, 0] * (u[:, 0, 1] * u[:, 1, 2] - u[:, 0, 2] * u[:, 1, 1]))
+    scl = np.where((det < 0)[:, None], -length, length)
+
+    # mat3_normalized_to_eul2 (XYZ), then the solution with the smaller |x|+|y|+|z|
+    cy = np.hypot(u[:, 0, 0], u[:, 0, 1])
+    big = cy > np.float32(_EPS16)
+    zero = np.zeros(n, dtype=np.float32)
+    one = np.ones(n, dtype=np.float32)
+    e1 = np.empty((n, 3), dtype=np.float32)
+    e2 = np.empty((n, 3), dtype=np.float32)
+    un1 = np.empty((n, 3), dtype=bool)
+    un2 = np.empty((n, 3), dtype=bool)
+    e1[:, 0], un1[:, 0] = _atan2f(np.where(big, u[:, 1, 2], -u[:, 2, 1]), np.where(big, u[:, 2, 2], u[:, 1, 1]))
+    e1[:, 1], un1[:, 1] = _atan2f(-u[:, 0, 2], cy)
+    e1[:, 2], un1[:, 2] = _atan2f(np.where(big, u[:, 0, 1], zero), np.where(big, u[:, 0, 0], one))
+    e2[:, 0], un2[:, 0] = _atan2f(-u[:, 1, 2], -u[:, 2, 2])
+    e2[:, 1], un2[:, 1] = _atan2f(-u[:, 0, 2], -cy)
+    e2[:, 2], un2[:, 2] = _atan2f(-u[:, 0, 1], -u[:, 0, 0])
+    e2 = np.where(big[:, None], e2, e1)
+    un2 = np.where(big[:, None], un2, un1)
+    s1 = np.abs(e1[:, 0]) + np.abs(e1[:, 1]) + np.abs(e1[:, 2])
+    s2 = np.abs(e2[:, 0]) + np.abs(e2[:, 1]) + np.abs(e2[:, 2])
+    pick2 = s1 > s2
+    rot = np.where(pick2[:, None], e2, e1)
+
+    tie = big & (np.abs(s1 - s2) <= 8.0 * np.spacing(np.maximum(s1, s2)))
+    edge = np.abs(cy - np.float32(_EPS16)) <= np.float32(_EPS16) * 0.01
+    unsure = tie | edge | np.where(pick2[:, None], un2, un1).any(axis=1)
+
+    # world bbox: Matrix @ Vector sums float32 products in double, then rounds to float
+    pts = np.empty((n, 8, 3), dtype=np.float32)
+    for r in range(3):
+        acc = (mw[:, None, 0, r] * bb[:, :, 0]).astype(np.float64)
+        acc += (mw[:, None, 1, r] * bb[:, :, 1]).astype(np.float64)
+        acc += (mw[:, None, 2, r] * bb[:, :, 2]).astype(np.float64)
+        acc += mw[:, None, 3, r].astype(np.float64)
+        pts[:, :, r] = acc.astype(np.float32)
+    return loc, rot, scl, pts.min(axis=1), pts.max(axis=1), unsure
+
+def _vectorized_enabled():
+    return np is not None and os.environ.get("ATLAS_SNAPSHOT_VECTORIZED", "1") not in ("", "0")
+
+def _transforms_vectorized(objects):
+    # -> {name: (loc, rot, scale, bbox)} for every object, or None to use the loop
+    n = len(objects)
+    try:
+        mw = np.empty(n * 16, dtype=np.float32)
+        objects.foreach_get("matrix_world", mw)
+        bb = np.empty(n * 24, dtype=np.float32)
+        objects.foreach_get("bound_box", bb)
+    except Exception:
+        return None
+    loc, rot, scl, mn, mx, unsure = _decompose(mw.reshape(n, 4, 4), bb.reshape(n, 8, 3))
+    loc, rot, scl, mn, mx = loc.tolist(), rot.tolist(), scl.tolist(), mn.tolist(), mx.tolist()
+    out = {}
+    for i, obj in enumerate(objects):
+        r = rot[i]
+        if unsure[i]:
+            r = obj.matrix_world.to_euler("XYZ")
+        out[obj.name] = (_stable3(loc[i]), _stable3(r), _stable3(scl[i]), {"min": _stable3(mn[i]), "max": _stable3(mx[i])})
+    return out
+
+def _transforms_loop(obj):
+    mw = obj.matrix_world
+    return (_stable3(mw.to_translation()), _stable3(mw.to_euler("XYZ")), _stable3(mw.to_scale()), _bbox_world(obj))
 
 def snapshot_v2():
     scene = bpy.context.scene
+    transforms = _transforms_vectorized(scene.objects) if _vectorized_enabled() else None
+    mesh_stats = _mesh_stats(scene.objects)
     objs = []
     for obj in sorted(scene.objects, key=lambda o: o.name):
-        loc = obj.matrix_world.to_translation()
-        rot = obj.matrix_world.to_euler("XYZ")
-        scl = obj.matrix_world.to_scale()
+        if transforms is not None:
+            loc, rot, scl, bbox = transforms[obj.name]
+        else:
+            loc, rot, scl, bbox = _transforms_loop(obj)
         objs.append({
             "name": obj.name,
             "type": obj.type,
             "parent": obj.parent.name if obj.parent else None,
-            "location": _stable3(loc),
-            "rotation_euler": _stable3(rot),
-            "scale": _stable3(scl),
+            "location": loc,
+            "rotation_euler": rot,
+            "scale": scl,
             "hide_viewport": bool(obj.hide_viewport),
             "hide_render": bool(obj.hide_render),
             "collections": _collections(obj),
             "materials": _materials(obj),
-            "bbox_world": _bbox_world(obj),
-            "mesh_stats": _mesh_stats(obj),
+            "bbox_world": bbox,
+            "mesh_stats": mesh_stats[obj.name],
         })
 
     return {
@@ -114,7 +248,7 @@ def main():
         Path(args["out"]).parent.mkdir(parents=True, exist_ok=True)
         Path(args["out"]).write_text(txt, encoding="utf-8")
     else:
-        print(txt)
+        emit_result(data)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+import bpy
+import sys
+from pathlib import Path
+
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+# the v3 encoder is pure stdlib: use the host package straight from the repo
+_SRC_DIR = str(Path(__file__).resolve().parents[1] / "src")
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+from atlas_bpy_io import emit_result
+from blender_snapshot_v2 import snapshot_v2
+from atlas.snapshot_v3 import SnapshotV3, write_snapshot_v3
+
+# atlas.snapshot.v3: the v2 snapshot written as a columnar binary file (atlas/snapshot_v3.py).
+# Only a small summary goes back over the result channel, never the objects.
+
+def _argv_after_double_dash():
+    argv = sys.argv
+    if "--" in argv:
+        return argv[argv.index("--")+1:]
+    return []
+
+def _parse(args):
+    out = {"out": None, "blend": None}
+    i = 0
+    while i < len(args):
+        if args[i] == "--out" and i+1 < len(args):
+            out["out"] = args[i+1]
+            i += 2
+            continue
+        if args[i] == "--blend" and i+1 < len(args):
+            out["blend"] = args[i+1]
+            i += 2
+            continue
+        i += 1
+    return out
+
+def main():
+    args = _parse(_argv_after_double_dash())
+    if not args["out"]:
+        raise SystemExit("Missing --out")
+
+    if args["blend"]:
+        p = Path(args["blend"]).resolve()
+        if p.exists():
+            bpy.ops.wm.open_mainfile(filepath=str(p))
+
+    data = snapshot_v2()
+    out = Path(args["out"]).resolve()
+    nbytes = write_snapshot_v3(data, out)
+
+    with SnapshotV3.open(out) as snap:
+        emit_result({
+            "schema": "atlas.blender.snapshot_v3.v1",
+            "path": str(out),
+            "bytes": nbytes,
+            "objects": snap.count,
+            "fingerprint": snap.fingerprint,
+        })
+
+if __name__ == "__main__":
+    main()
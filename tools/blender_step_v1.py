@@ -0,0 +1,100 @@
+import bpy
+import json
+import sys
+from pathlib import Path
+
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+import atlas_bpy_io
+from atlas_bpy_io import emit_result
+
+# Fused run step: snapshot_before -> action -> snapshot_after -> one save, in one session.
+# The action script runs in-process without --blend, so it neither reopens nor saves.
+# Without --blend (resident worker) the loaded scene is used and saving is left to the worker.
+# --skip-before omits the first snapshot ("before" is then null in the result).
+
+def _argv_after_double_dash():
+    argv = sys.argv
+    if "--" in argv:
+        return argv[argv.index("--")+1:]
+    return []
+
+def _parse(args):
+    out = {"blend": None, "snapshot": "v2", "before_out": None, "after_out": None, "action_script": None, "action_argv": "[]", "skip_before": False}
+    keys = {
+        "--blend": "blend",
+        "--snapshot": "snapshot",
+        "--before-out": "before_out",
+        "--after-out": "after_out",
+        "--action-script": "action_script",
+        "--action-argv": "action_argv",
+    }
+    i = 0
+    while i < len(args):
+        if args[i] == "--skip-before":
+            out["skip_before"] = True
+            i += 1
+            continue
+        if args[i] in keys and i+1 < len(args):
+            out[keys[args[i]]] = args[i+1]
+            i += 2
+            continue
+        i += 1
+    return out
+
+def _snapshot_fn(version):
+    if version == "v1":
+        import blender_snapshot_v1
+        return blender_snapshot_v1.snapshot_v1
+    import blender_snapshot_v2
+    return blender_snapshot_v2.snapshot_v2
+
+def _write(path, data):
+    # same bytes as blender_snapshot_v*.py --out
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+
+def _load(blend):
+    if blend.exists():
+        bpy.ops.wm.open_mainfile(filepath=str(blend))
+    else:
+        bpy.ops.wm.read_factory_settings(use_empty=False)
+
+def main():
+    args = _parse(_argv_after_double_dash())
+    if not args["action_script"]:
+        raise SystemExit("Missing --action-script")
+
+    blend = Path(args["blend"]).resolve() if args["blend"] else None
+    snapshot = _snapshot_fn(args["snapshot"])
+
+    # a missing workspace starts as the factory scene (what init_empty_v1 would have saved)
+    if blend is not None:
+        _load(blend)
+
+    # --skip-before: the host already has this scene's snapshot (cached after-snapshot)
+    before = None if args["skip_before"] else snapshot()
+    if before is not None and args["before_out"]:
+        _write(args["before_out"], before)
+
+    action = atlas_bpy_io.run_script(str(Path(args["action_script"]).resolve()), json.loads(args["action_argv"]))
+    if not action["ok"]:
+        # non-fused steps never persist a failed action: drop partial edits
+        if blend is not None:
+            _load(blend)
+        else:
+            atlas_bpy_io.rollback()  # resident scene: the worker restores it
+
+    after = snapshot()
+    if args["after_out"]:
+        _write(args["after_out"], after)
+
+    if blend is not None:
+        bpy.ops.wm.save_mainfile(filepath=str(blend))
+
+    emit_result({"schema": "atlas.blender.step.v1", "before": before, "action": action, "after": after})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import bpy
+import sys
+import traceback
+from pathlib import Path
+
+_TOOLS_DIR = str(Path(__file__).resolve().parent)
+if _TOOLS_DIR not in sys.path:
+    sys.path.insert(0, _TOOLS_DIR)
+import atlas_bpy_io
+
+# Long-lived headless worker (atlas.blender_pool): reads request frames on stdin,
+# runs tool scripts in-process, answers with one response frame per request on the
+# result channel (ATLAS_RESULT_FD; stdout when unset).
+#   {"id": n, "op": "ping"}
+#   {"id": n, "op": "run", "script": "<path>", "argv": [...],
+#    "workspace": "<.blend>"|null, "mutates": bool, "checkpoint_every": N}
+#   {"id": n, "op": "flush"}
+#   {"id": n, "op": "shutdown"}
+# With a workspace the .blend stays loaded between runs (no --blend for the script);
+# mutations mark it dirty and it is saved every N mutations, on flush, on switch and on exit.
+# A failed mutation is rolled back (scene and dirty state): to the last checkpoint when
+# the scene is clean, else to a copy saved just before it.
+
+_resident = {"path": None, "dirty": False, "pending": 0}
+
+def _reset_factory():
+    # same starting state as a fresh `blender -b --factory-startup`
+    bpy.ops.wm.read_factory_settings(use_empty=False)
+
+def _save_resident():
+    if not (_resident["path"] and _resident["dirty"]):
+        return False
+    bpy.ops.wm.save_mainfile(filepath=_resident["path"])
+    _resident["dirty"] = False
+    _resident["pending"] = 0
+    return True
+
+def _release_resident():
+    saved = _save_resident()
+    _resident["path"] = None
+    return saved
+
+def _make_resident(path):
+    if _resident["path"] == path:
+        return
+    _release_resident()
+    if Path(path).exists():
+        bpy.ops.wm.open_mainfile(filepath=path)
+    else:
+        _reset_factory()
+    _resident["path"] = path
+
+def _rollback_copy_path():
+    return _resident["path"] + ".atlas-rollback.blend"
+
+def _arm_rollback():
+    # clean: the checkpoint on disk is the scene; dirty: keep a copy (the scene
+    # file's path and dirty state are left alone)
+    if _resident["dirty"]:
+        src = _rollback_copy_path()
+        bpy.ops.wm.save_as_mainfile(filepath=src, copy=True)
+    else:
+        src = _resident["path"]
+
+    def restore():
+        if Path(src).exists():
+            bpy.ops.wm.open_mainfile(filepath=src)
+        else:
+            _reset_factory()
+
+    atlas_bpy_io.arm_rollback(restore)
+
+def _disarm_rollback():
+    rolled_back = atlas_bpy_io.disarm_rollback()
+    copy = Path(_rollback_copy_path())
+    if copy.exists():
+        copy.unlink()
+    return rolled_back
+
+def _run_mutation(script, argv):
+    _arm_rollback()
+    try:
+        resp = atlas_bpy_io.run_script(script, argv)
+        if not resp["ok"]:
+            atlas_bpy_io.rollback()
+    finally:
+        rolled_back = _disarm_rollback()
+    # -> (response, whether the scene now holds a new mutation)
+    return resp, resp["ok"] and not rolled_back
+
+def _resident_info(saved):
+    return {"path": _resident["path"], "dirty": _resident["dirty"], "saved": bool(saved)}
+
+def _run(req):
+    script = str(req["script"])
+    argv = [str(a) for a in req.get("argv") or []]
+    workspace = req.get("workspace")
+    saved = False
+    if not workspace:
+        saved = _release_resident()
+        _reset_factory()
+        resp = atlas_bpy_io.run_script(script, argv)
+    else:
+        _make_resident(str(workspace))
+        if not req.get("mutates"):
+            resp = atlas_bpy_io.run_script(script, argv)
+        else:
+            resp, changed = _run_mutation(script, argv)
+            if changed:
+                _resident["dirty"] = True
+                _resident["pending"] += 1
+                every = int(req.get("checkpoint_every") or 0)
+                if every > 0 and _resident["pending"] >= every:
+                    saved = _save_resident()
+    resp["resident"] = _resident_info(saved)
+    return resp
+
+def _handle(req):
+    op = req.get("op")
+    if op == "ping":
+        return {"ok": True, "result": {"pong": True, "version": list(bpy.app.version)}}
+    if op == "run":
+        return _run(req)
+    if op == "flush":
+        saved = _save_resident()
+        return {"ok": True, "result": None, "resident": _resident_info(saved)}
+    return {"ok": False, "error": {"message": f"unknown op: {op}"}}
+
+def main():
+    stdin = sys.stdin.buffer
+    out_fd = atlas_bpy_io.result_fd() or 1
+    while True:
+        req = atlas_bpy_io.read_frame(stdin)
+        if req is None:
+            _save_resident()
+            return
+        if req.get("op") == "shutdown":
+            saved = _save_resident()
+            atlas_bpy_io.write_frame({"id": req.get("id"), "ok": True, "result": None, "resident": _resident_info(saved)}, out_fd)
+            return
+        try:
+            resp = _handle(req)
+        except Exception as e:
+            resp = {"ok": False, "error": {"message": str(e), "traceback": traceback.format_exc(limit=8)}}
+        resp["id"] = req.get("id")
+        atlas_bpy_io.write_frame(resp, out_fd)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import json
+import itertools
 import os
 import queue
 import subprocess
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any, Dict, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
 
 JSON = Dict[str, Any]
 
@@ -16,6 +17,10 @@ class MCPProcess:
         self._proc: Optional[subprocess.Popen[str]] = None
         self._lock = threading.Lock()
         self._stderr_lines: "queue.Queue[str]" = queue.Queue(maxsize=500)
+        self._write_lock = threading.Lock()
+        self._pending: Dict[Any, "queue.Queue[Optional[JSON]]"] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
 
     def start(self) -> None:
         with self._lock:
@@ -36,6 +41,7 @@ class MCPProcess:
             assert self._proc.stderr is not None
             t = threading.Thread(target=self._drain_stderr, args=(self._proc.stderr,), daemon=True)
             t.start()
+            threading.Thread(target=self._read_stdout, args=(self._proc,), daemon=True).start()
 
     def _drain_stderr(self, stream) -> None:
         try:
@@ -63,33 +69,74 @@ class MCPProcess:
         items = list(self._stderr_lines.queue)
         return items[-n:]
 
-    def request(self, method: str, params: JSON) -> JSON:
-        self.start()
-        assert self._proc is not None
-        assert self._proc.stdin is not None
-        assert self._proc.stdout is not None
-
-        with self._lock:
-            if self._proc.poll() is not None:
-                # died — restart once
-                self._proc = None
-                self.start()
-                assert self._proc is not None
-                assert self._proc.stdin is not None
-                assert self._proc.stdout is not None
-
-            req = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
-            self._proc.stdin.write(json.dumps(req, ensure_ascii=False) + "\n")
+    def _read_stdout(self, proc: "subprocess.Popen[str]") -> None:
+        # responses go to their request by id, progress notifications by progressToken
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(msg, dict):
+                continue
+            if msg.get("method") == "notifications/progress":
+                key = (msg.get("params") or {}).get("progressToken")
+            else:
+                key = msg.get("id")
+            with self._pending_lock:
+                q = self._pending.get(key)
+            if q is not None:
+                q.put(msg)
+        # server died: fail whatever is still waiting
+        with self._pending_lock:
+            waiting = list(self._pending.values())
+        for q in waiting:
+            q.put(None)
+
+    def _send(self, msg: JSON) -> None:
+        assert self._proc is not None and self._proc.stdin is not None
+        with self._write_lock:
+            self._proc.stdin.write(json.dumps(msg, ensure_ascii=False) + "\n")
             self._proc.stdin.flush()
 
-            line = self._proc.stdout.readline().strip()
-            if not line:
-                raise RuntimeError("MCP server returned empty stdout line")
+    def request(
+        self, method: str, params: JSON, on_progress: Optional[Callable[[JSON], None]] = None
+    ) -> JSON:
+        # Requests run concurrently (the server answers by id). on_progress gets each
+        # notifications/progress of the call; if it raises (the HTTP client went away)
+        # the call is cancelled and the exception propagates.
+        self.start()
+        rid = next(self._ids)
+        q: "queue.Queue[Optional[JSON]]" = queue.Queue()
+        if on_progress is not None:
+            params = dict(params, _meta={"progressToken": rid})
+        with self._pending_lock:
+            self._pending[rid] = q
+        try:
+            self._send({"jsonrpc": "2.0", "id": rid, "method": method, "params": params})
+            while True:
+                msg = q.get()
+                if msg is None:
+                    raise RuntimeError("MCP server exited")
+                if "id" in msg:
+                    break
+                if on_progress is not None:
+                    try:
+                        on_progress(msg["params"])
+                    except Exception:
+                        cancel = {"requestId": rid, "reason": "client disconnected"}
+                        self._send({"jsonrpc": "2.0", "method": "notifications/cancelled", "params": cancel})
+                        raise
+        finally:
+            with self._pending_lock:
+                del self._pending[rid]
 
-            resp = json.loads(line)
-            if "error" in resp:
-                raise RuntimeError(f"MCP error: {resp['error']}")
-            return resp["result"]
+        if "error" in msg:
+            raise RuntimeError(f"MCP error: {msg['error']}")
+        return msg["result"]
 
 
 MCP = MCPProcess()
@@ -112,6 +159,44 @@ def _write_json(handler: BaseHTTPRequestHandler, code: int, obj: Any) -> None:
     handler.wfile.write(data)
 
 
+def _sse_event(handler: BaseHTTPRequestHandler, event: str, obj: Any) -> None:
+    data = json.dumps(obj, ensure_ascii=False)
+    handler.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+    handler.wfile.flush()
+
+
+def _wants_stream(handler: BaseHTTPRequestHandler, body: JSON) -> bool:
+    return bool(body.get("stream")) or "text/event-stream" in handler.headers.get("Accept", "")
+
+
+def _stream_call(handler: BaseHTTPRequestHandler, name: str, arguments: JSON) -> None:
+    # Server-sent events: one "progress" event per step as the tool reports it, then
+    # "result" (or "error"). A client that disconnects cancels the call.
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+    handler.send_header("Cache-Control", "no-cache")
+    handler.end_headers()
+    gone = threading.Event()
+
+    def progress(params: JSON) -> None:
+        try:
+            _sse_event(handler, "progress", params)
+        except OSError:
+            gone.set()
+            raise
+
+    try:
+        try:
+            result = MCP.request("tools/call", {"name": name, "arguments": arguments}, on_progress=progress)
+        except Exception as e:
+            if not gone.is_set():
+                _sse_event(handler, "error", {"ok": False, "error": str(e), "stderr_tail": MCP.tail_stderr(40)})
+            return
+        _sse_event(handler, "result", {"ok": True, "result": result})
+    except OSError:
+        pass  # client went away
+
+
 class Handler(BaseHTTPRequestHandler):
     def log_message(self, format: str, *args: Any) -> None:
         # silence default access log (n8n can be noisy)
@@ -149,6 +234,10 @@ class Handler(BaseHTTPRequestHandler):
                     _write_json(self, 400, {"ok": False, "error": "arguments must be object"})
                     return
 
+                if _wants_stream(self, body):
+                    _stream_call(self, name, arguments)
+                    return
+
                 result = MCP.request("tools/call", {"name": name, "arguments": arguments})
                 _write_json(self, 200, {"ok": True, "result": result})
                 return
@@ -161,7 +250,8 @@ class Handler(BaseHTTPRequestHandler):
 def main() -> int:
     host = os.environ.get("ATLAS_HTTP_HOST", "127.0.0.1")
     port = int(os.environ.get("ATLAS_HTTP_PORT", "8009"))
-    httpd = HTTPServer((host, port), Handler)
+    # a thread per HTTP request: calls share the MCP process, answered by id
+    httpd = ThreadingHTTPServer((host, port), Handler)
     print(f"[atlas.http] listening on http://{host}:{port}", flush=True)
     httpd.serve_forever()
     return 0